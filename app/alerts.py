@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.request
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.db import DATA_DIR, _clean_plate
+from app.fuzzy_index import FuzzyPlateIndex
+from app.pl_prefix import _load as _prefix_table
+from app.pl_prefix import fix_voivodeship, region_for_plate
+
+# Lista obserwowanych: reguły na tablicę (dokładnie albo z tolerancją pomyłek OCR), tag z bazy,
+# prefiks tablicy, powiat, województwo. Reguły kompilowane raz do słowników, więc ocena jednej tablicy
+# to kilka sond dict + jedno zapytanie do indeksu przybliżonego – niezależnie od liczby reguł.
+# Alarmy idą do ujść (log JSONL, webhook, dźwięk) w osobnym wątku; ta sama tablica + reguła
+# nie alarmuje ponownie przez debounce_s.
+#   data/alert_rules.json, inna ścieżka: ANPR_ALERTS=reguly.json, "0" wyłącza
+
+ALERT_RULES_PATH = DATA_DIR / "alert_rules.json"
+ALERTS_ENV = "ANPR_ALERTS"
+DEFAULT_DEBOUNCE_S = 60.0
+
+RULE_KINDS = ("plate", "tag", "prefix", "powiat", "voivodeship")
+
+
+@dataclass
+class Rule:
+    name: str
+    kind: str            # plate | tag | prefix | powiat | voivodeship
+    value: str
+    max_dist: float = 0.0  # plate: > 0 -> także odczyty z pomyłkami OCR (odległość jak w fuzzy_index)
+    severity: str = "alert"
+    sinks: Optional[List[str]] = None  # None = wszystkie ujścia silnika
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Rule":
+        kinds = [k for k in RULE_KINDS if d.get(k)]
+        if len(kinds) != 1:
+            raise ValueError(f"reguła {d.get('name')!r}: dokładnie jedno z {', '.join(RULE_KINDS)}")
+        kind = kinds[0]
+        return cls(
+            name=str(d.get("name") or f"{kind}:{d[kind]}"),
+            kind=kind,
+            value=str(d[kind]),
+            max_dist=float(d.get("max_dist", 0.0)),
+            severity=str(d.get("severity", "alert")),
+            sinks=list(d["sinks"]) if d.get("sinks") else None,
+        )
+
+
+@dataclass
+class Alert:
+    rule: str
+    severity: str
+    plate: str
+    matched: str         # co zadziałało: tablica z listy, tag, prefiks, region
+    kind: str
+    distance: float = 0.0
+    confidence: float = 0.0
+    region: Optional[str] = None
+    t: float = field(default_factory=time.time)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _norm_tag(tag: str) -> str:
+    return tag.strip().casefold()
+
+
+def _split_region(name: str) -> Tuple[str, str]:
+    # "krakowski / małopolskie" -> (powiat, województwo); samo "małopolskie" -> ("", woj.)
+    if " / " in name:
+        powiat, voiv = name.rsplit(" / ", 1)
+        return powiat.strip().casefold(), voiv.strip().casefold()
+    return "", name.strip().casefold()
+
+
+class RuleSet:
+    """
+    Reguły skompilowane do tablic wyszukiwania:
+      tablica -> reguły, tag -> reguły, prefiks (1–3 znaki) -> reguły,
+      nazwa regionu z mapy prefiksów -> reguły powiatu/województwa (rozwinięte przy kompilacji),
+      tablice z max_dist > 0 -> FuzzyPlateIndex.
+    """
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = list(rules)
+        self.by_plate: Dict[str, List[Rule]] = {}
+        self.by_tag: Dict[str, List[Rule]] = {}
+        self.by_prefix: Dict[str, List[Rule]] = {}
+        self.by_region: Dict[str, List[Rule]] = {}
+        self.fuzzy_rules: Dict[str, List[Rule]] = {}
+
+        powiats: Dict[str, List[Rule]] = {}
+        voivs: Dict[str, List[Rule]] = {}
+        for r in self.rules:
+            if r.kind == "plate":
+                plate = _clean_plate(r.value)
+                self.by_plate.setdefault(plate, []).append(r)
+                if r.max_dist > 0:
+                    self.fuzzy_rules.setdefault(plate, []).append(r)
+            elif r.kind == "tag":
+                self.by_tag.setdefault(_norm_tag(r.value), []).append(r)
+            elif r.kind == "prefix":
+                self.by_prefix.setdefault(_clean_plate(r.value)[:3], []).append(r)
+            elif r.kind == "powiat":
+                powiats.setdefault(r.value.strip().casefold(), []).append(r)
+            elif r.kind == "voivodeship":
+                voivs.setdefault(fix_voivodeship(r.value.strip()).casefold(), []).append(r)
+
+        if powiats or voivs:
+            # wszystkie nazwy regionów z mapy (kilkaset) – reguła powiatu/województwa staje się wpisem
+            # w słowniku po dokładnym stringu, który zwraca region_for_plate
+            for name in set(_prefix_table().names):
+                if not name:
+                    continue
+                powiat, voiv = _split_region(name)
+                hit = powiats.get(powiat, []) + voivs.get(voiv, [])
+                if hit:
+                    self.by_region[name] = hit
+
+        self._fuzzy = FuzzyPlateIndex(self.fuzzy_rules.keys()) if self.fuzzy_rules else None
+        self._fuzzy_max = max((r.max_dist for rs in self.fuzzy_rules.values() for r in rs), default=0.0)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, plate: str, tag: Optional[str] = None,
+              region: Optional[str] = None) -> List[Tuple[Rule, str, float]]:
+        """(reguła, co dopasowano, odległość) – każda reguła najwyżej raz."""
+        p = _clean_plate(plate or "")
+        if not p:
+            return []
+        out: List[Tuple[Rule, str, float]] = []
+        seen = set()
+
+        def add(rules: List[Rule], matched: str, dist: float = 0.0):
+            for r in rules:
+                if id(r) not in seen:
+                    seen.add(id(r))
+                    out.append((r, matched, dist))
+
+        add(self.by_plate.get(p, ()), p)
+        if self._fuzzy is not None:
+            for key, d in self._fuzzy.search(p, max_dist=self._fuzzy_max, k=8):
+                add([r for r in self.fuzzy_rules[key] if d <= r.max_dist], key, d)
+        if tag and self.by_tag:
+            add(self.by_tag.get(_norm_tag(tag), ()), tag)
+        if self.by_prefix:
+            for n in (3, 2, 1):
+                add(self.by_prefix.get(p[:n], ()), p[:n])
+        if self.by_region:
+            if region is None:
+                region = region_for_plate(p)
+            if region:
+                add(self.by_region.get(region, ()), region)
+        return out
+
+
+def load_rules(path: Path) -> Tuple[List[Rule], Dict[str, Any]]:
+    # {"debounce_s": 60, "sinks": {...}, "rules": [{"name": ..., "tag": "nieoznakowani"}, ...]}
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    rules = [Rule.from_dict(d) for d in data.get("rules", [])]
+    return rules, data
+
+
+# --- ujścia ---
+
+class LogSink:
+    """Alarm jako linia JSONL w pliku (i na konsoli)."""
+
+    name = "log"
+
+    def __init__(self, path: Optional[Path] = None, echo: bool = True):
+        self.path = Path(path) if path else None
+        self.echo = echo
+
+    def __call__(self, alert: Alert) -> None:
+        if self.echo:
+            print(f"[ALERT] {alert.severity}: {alert.plate} ({alert.rule}: {alert.matched})", file=sys.stderr)
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(alert.as_dict(), ensure_ascii=False) + "\n")
+
+
+class WebhookSink:
+    """POST JSON pod lokalny adres (np. skrypt domowej automatyki); błędy sieci tylko logowane."""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout_s: float = 2.0):
+        self.url = url
+        self.timeout_s = timeout_s
+
+    def __call__(self, alert: Alert) -> None:
+        body = json.dumps(alert.as_dict(), ensure_ascii=False).encode("utf-8")
+        req = urllib.request.Request(self.url, data=body, method="POST",
+                                     headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout_s) as resp:
+                resp.read()
+        except OSError as e:
+            print(f"[ALERT] webhook {self.url}: {e!r}")
+
+
+class SoundSink:
+    """Sygnał dźwiękowy: winsound na Windows, inaczej dzwonek terminala."""
+
+    name = "sound"
+
+    def __call__(self, alert: Alert) -> None:
+        if sys.platform == "win32":
+            import winsound
+            winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+        else:
+            sys.stdout.write("\a")
+            sys.stdout.flush()
+
+
+def make_sinks(config: Dict[str, Any]) -> List[Callable[[Alert], None]]:
+    # "sinks": {"log": "data/alerts.jsonl", "webhook": "http://127.0.0.1:8080/alert", "sound": true}
+    cfg = config.get("sinks", {"log": str(DATA_DIR / "alerts.jsonl")})
+    sinks: List[Callable[[Alert], None]] = []
+    if cfg.get("log"):
+        log = None if cfg["log"] is True else Path(cfg["log"])
+        if log is not None and not log.is_absolute():
+            log = DATA_DIR.parent / log  # względem katalogu projektu, nie bieżącego
+        sinks.append(LogSink(log))
+    if cfg.get("webhook"):
+        sinks.append(WebhookSink(str(cfg["webhook"])))
+    if cfg.get("sound"):
+        sinks.append(SoundSink())
+    return sinks
+
+
+class AlertEngine:
+    """
+    evaluate() w wątku wywołującym (sondy w RuleSet + debounce), wywołania ujść w wątku „alerts”,
+    żeby wolny webhook nie zatrzymał GUI/OCR.
+    """
+
+    def __init__(self, rules: RuleSet, sinks: Optional[List[Callable[[Alert], None]]] = None,
+                 debounce_s: float = DEFAULT_DEBOUNCE_S):
+        self.rules = rules
+        self.sinks = list(sinks or [])
+        self.debounce_s = float(debounce_s)
+        self._last: Dict[Tuple[str, str], float] = {}  # (tablica, reguła) -> ostatni alarm (monotonic)
+        self.fired = 0
+        self.suppressed = 0
+        self._q: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def evaluate(self, plate: Optional[str], tag: Optional[str] = None, region: Optional[str] = None,
+                 confidence: float = 0.0, now: Optional[float] = None) -> List[Alert]:
+        """Nowe (nie wytłumione) alarmy dla odczytu; ujścia dostają je asynchronicznie."""
+        hits = self.rules.match(plate or "", tag=tag, region=region)
+        if not hits:
+            return []
+        now = time.monotonic() if now is None else now
+        p = _clean_plate(plate or "")
+        alerts = []
+        for rule, matched, dist in hits:
+            key = (p, rule.name)
+            last = self._last.get(key)
+            if last is not None and now - last < self.debounce_s:
+                self.suppressed += 1
+                continue
+            self._last[key] = now
+            alerts.append(Alert(rule.name, rule.severity, p, matched, rule.kind, dist, confidence, region))
+            self._dispatch(alerts[-1], rule.sinks)
+        if len(self._last) > 4096:
+            self._last = {k: t for k, t in self._last.items() if now - t < self.debounce_s}
+        self.fired += len(alerts)
+        return alerts
+
+    def _dispatch(self, alert: Alert, rule_sinks: Optional[List[str]]) -> None:
+        if not self.sinks:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sink_loop, name="alerts", daemon=True)
+            self._thread.start()
+        self._q.put((alert, rule_sinks))
+
+    def _sink_loop(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            alert, rule_sinks = item
+            for sink in self.sinks:
+                if rule_sinks is not None and getattr(sink, "name", None) not in rule_sinks:
+                    continue
+                try:
+                    sink(alert)
+                except Exception as e:
+                    print(f"[ALERT] ujście {type(sink).__name__}: {e!r}")
+
+    def close(self, timeout: float = 2.0) -> None:
+        if self._thread is not None:
+            self._q.put(None)
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+
+def open_alert_engine(path: Optional[str] = None) -> Optional[AlertEngine]:
+    # plik z argumentu albo ANPR_ALERTS (domyślnie data/alert_rules.json); brak pliku / "0" -> None
+    spec = path if path is not None else os.environ.get(ALERTS_ENV, "")
+    if spec.strip().lower() in ("0", "off", "no", "false"):
+        return None
+    p = Path(spec) if spec else ALERT_RULES_PATH
+    if not p.exists():
+        return None
+    rules, config = load_rules(p)
+    return AlertEngine(RuleSet(rules), make_sinks(config),
+                       debounce_s=float(config.get("debounce_s", DEFAULT_DEBOUNCE_S)))
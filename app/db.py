@@ -1,61 +1,204 @@
 from __future__ import annotations
 
 import json
+import os
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
 
 # ROOT/data/plates_db.json (bo db.py jest w ROOT/app/db.py)
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 PLATES_DB_PATH = DATA_DIR / "plates_db.json"
+PLATES_SQLITE_PATH = DATA_DIR / "plates_db.sqlite"
 
-# prosty cache (szybko + działa w wątku OCR)
-_db_cache: Dict[str, Dict[str, str]] | None = None
-_db_mtime: float | None = None
+# wybór backendu: ANPR_DB_BACKEND=json|sqlite; domyślnie sqlite, jeśli baza była już zmigrowana
+BACKEND_ENV = "ANPR_DB_BACKEND"
 
 
 def _clean_plate(s: str) -> str:
     return (s or "").upper().replace(" ", "").strip()
 
 
-def _ensure_file_exists() -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if not PLATES_DB_PATH.exists():
-        PLATES_DB_PATH.write_text("{}", encoding="utf-8")
+def _entry(opis: Any, tag: Any) -> Dict[str, str]:
+    return {"opis": str(opis or ""), "tag": str(tag or "")}
 
 
-def _load_db() -> Dict[str, Dict[str, str]]:
-    global _db_cache, _db_mtime
+class PlateBackend:
+    """
+    Interfejs magazynu wpisów: klucz = tablica po _clean_plate, wartość = {"opis", "tag"}.
+    Implementacje: JsonBackend (plik JSON, całość w pamięci), SqliteBackend (app/db_sqlite.py).
+    generation rośnie, gdy dane zmieniły się poza tym API (np. przeładowany plik) –
+    indeks przybliżony jest wtedy budowany od nowa.
+    """
 
-    _ensure_file_exists()
-    mtime = PLATES_DB_PATH.stat().st_mtime
+    generation = 0
 
-    # jeśli nie zmienił się plik, zwróć cache
-    if _db_cache is not None and _db_mtime == mtime:
-        return _db_cache
+    def get(self, plate: str) -> Optional[Dict[str, str]]:
+        raise NotImplementedError
 
-    try:
-        raw = PLATES_DB_PATH.read_text(encoding="utf-8")
-        data = json.loads(raw) if raw.strip() else {}
-        if not isinstance(data, dict):
+    def upsert(self, plate: str, opis: str, tag: str) -> None:
+        raise NotImplementedError
+
+    def delete(self, plate: str) -> bool:
+        raise NotImplementedError
+
+    def upsert_many(self, rows: Iterable[Tuple[str, str, str]]) -> int:
+        # (tablica, opis, tag) – implementacje robią to jednym zapisem / jedną transakcją
+        n = 0
+        for plate, opis, tag in rows:
+            self.upsert(plate, opis, tag)
+            n += 1
+        return n
+
+    def delete_many(self, plates: Iterable[str]) -> int:
+        return sum(1 for p in plates if self.delete(p))
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def items(self, prefix: str = "", tag: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, str]]]:
+        # strumień wpisów posortowanych po tablicy, opcjonalnie tylko z prefiksem / tagiem
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonBackend(PlateBackend):
+    """
+    Cały plik w dict; każdy zapis przepisuje plik.
+    Odczyt to samo trafienie w dict – bez stat() na każdą klatkę. Świeżość pliku
+    (edycja z zewnątrz, np. db_cli) sprawdza wątek w tle co revalidate_s i podmienia cache.
+    """
+
+    def __init__(self, path: Path = PLATES_DB_PATH, revalidate_s: float = 2.0):
+        self.path = Path(path)
+        self.revalidate_s = revalidate_s
+        self._cache: Optional[Dict[str, Dict[str, str]]] = None
+        self._mtime: Optional[float] = None
+        self._lock = threading.RLock()  # przeładowanie i zapisy (GUI, wątki OCR, watcher)
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def _ensure_file_exists(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.path.exists():
+            self.path.write_text("{}", encoding="utf-8")
+
+    def _read_file(self) -> Dict[str, Dict[str, str]]:
+        try:
+            raw = self.path.read_text(encoding="utf-8")
+            data = json.loads(raw) if raw.strip() else {}
+            if not isinstance(data, dict):
+                data = {}
+        except Exception:
             data = {}
-    except Exception:
-        data = {}
-
-    # normalizacja kluczy (tablic) – zawsze uppercase bez spacji
-    normalized: Dict[str, Dict[str, str]] = {}
-    for k, v in data.items():
-        kk = _clean_plate(k)
-        if not kk:
-            continue
-        if isinstance(v, dict):
-            normalized[kk] = {
-                "opis": str(v.get("opis", "") or ""),
-                "tag": str(v.get("tag", "") or ""),
-            }
-
-    _db_cache = normalized
-    _db_mtime = mtime
-    return normalized
+
+        # normalizacja kluczy (tablic) – zawsze uppercase bez spacji
+        normalized: Dict[str, Dict[str, str]] = {}
+        for k, v in data.items():
+            kk = _clean_plate(k)
+            if not kk:
+                continue
+            if isinstance(v, dict):
+                normalized[kk] = _entry(v.get("opis", ""), v.get("tag", ""))
+        return normalized
+
+    def _revalidate(self) -> Dict[str, Dict[str, str]]:
+        # stat + ewentualne przeładowanie; tylko poza ścieżką odczytu (watcher, zapisy, pierwsze użycie)
+        with self._lock:
+            self._ensure_file_exists()
+            mtime = self.path.stat().st_mtime
+            if self._cache is None or self._mtime != mtime:
+                if self._cache is not None:
+                    self.generation += 1
+                # nowy dict podmieniany w całości – czytelnicy bez blokady widzą stary albo nowy
+                self._cache = self._read_file()
+                self._mtime = mtime
+            return self._cache
+
+    def _load(self) -> Dict[str, Dict[str, str]]:
+        cache = self._cache
+        if cache is None:
+            cache = self._revalidate()
+            self._start_watcher()
+        return cache
+
+    def _start_watcher(self) -> None:
+        with self._lock:
+            if self._watcher is not None or self.revalidate_s <= 0:
+                return
+            self._watcher = threading.Thread(target=self._watch_loop, name="plates-db-watch", daemon=True)
+            self._watcher.start()
+
+    def _watch_loop(self) -> None:
+        while not self._stop.wait(self.revalidate_s):
+            try:
+                self._revalidate()
+            except OSError:
+                pass  # chwilowo niedostępny (dysk sieciowy) – zostaje stary cache
+
+    def _save(self, db: Dict[str, Dict[str, str]]) -> None:
+        self._ensure_file_exists()
+        _atomic_write_json(self.path, db)
+
+        # odśwież cache po zapisie
+        self._cache = db
+        self._mtime = self.path.stat().st_mtime
+
+    def get(self, plate: str) -> Optional[Dict[str, str]]:
+        return self._load().get(plate)
+
+    def upsert(self, plate: str, opis: str, tag: str) -> None:
+        with self._lock:
+            db = dict(self._revalidate())
+            db[plate] = _entry(opis, tag)
+            self._save(db)
+
+    def delete(self, plate: str) -> bool:
+        with self._lock:
+            db = self._revalidate()
+            existed = plate in db
+            if existed:
+                db = dict(db)
+                db.pop(plate, None)
+                self._save(db)
+            return existed
+
+    def upsert_many(self, rows: Iterable[Tuple[str, str, str]]) -> int:
+        with self._lock:
+            db = dict(self._revalidate())
+            n = 0
+            for plate, opis, tag in rows:
+                db[plate] = _entry(opis, tag)
+                n += 1
+            if n:
+                self._save(db)
+            return n
+
+    def delete_many(self, plates: Iterable[str]) -> int:
+        with self._lock:
+            db = dict(self._revalidate())
+            n = sum(1 for p in plates if db.pop(p, None) is not None)
+            if n:
+                self._save(db)
+            return n
+
+    def count(self) -> int:
+        return len(self._load())
+
+    def items(self, prefix: str = "", tag: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, str]]]:
+        # zapisy podmieniają cały dict (copy-on-write), więc iterowany słownik się nie zmieni
+        db = self._load()
+        for plate in sorted(k for k in db if k.startswith(prefix)):
+            v = db[plate]
+            if tag is None or v["tag"] == tag:
+                yield plate, v
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._watcher is not None and self._watcher is not threading.current_thread():
+            self._watcher.join(timeout=1.0)
 
 
 def _atomic_write_json(path: Path, payload: Any) -> None:
@@ -64,41 +207,210 @@ def _atomic_write_json(path: Path, payload: Any) -> None:
     tmp.replace(path)  # atomiczne na Windows
 
 
-def _save_db(db: Dict[str, Dict[str, str]]) -> None:
-    global _db_cache, _db_mtime
-    _ensure_file_exists()
+def open_backend(kind: Optional[str] = None, path: Optional[Path] = None) -> PlateBackend:
+    kind = (kind or os.environ.get(BACKEND_ENV) or "").strip().lower()
+    if not kind:
+        kind = "sqlite" if PLATES_SQLITE_PATH.exists() else "json"
+    if kind == "json":
+        return JsonBackend(path or PLATES_DB_PATH)
+    if kind == "sqlite":
+        from app.db_sqlite import SqliteBackend
+        return SqliteBackend(path or PLATES_SQLITE_PATH)
+    raise ValueError(f"nieznany backend bazy: {kind!r} (json|sqlite)")
 
-    _atomic_write_json(PLATES_DB_PATH, db)
 
-    # odśwież cache po zapisie
-    _db_cache = db
-    _db_mtime = PLATES_DB_PATH.stat().st_mtime
+_backend: Optional[PlateBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> PlateBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = open_backend()
+    return _backend
+
+
+def set_backend(backend: Optional[PlateBackend]) -> None:
+    # podmiana magazynu (testy, benchmarki, migracja); None -> wybór domyślny przy następnym użyciu
+    global _backend
+    with _backend_lock:
+        old, _backend = _backend, backend
+    if old is not None and old is not backend:
+        old.close()
+    _reset_fuzzy()
 
 
 def get_plate_info(plate: Optional[str]) -> Optional[dict]:
     p = _clean_plate(plate or "")
     if not p:
         return None
-    db = _load_db()
-    return db.get(p)
+    return get_backend().get(p)
 
 
 def upsert_plate(plate: str, opis: str, tag: str = "") -> None:
     p = _clean_plate(plate)
     if not p:
         return
-    db = _load_db()
-    db[p] = {"opis": (opis or "").strip(), "tag": (tag or "").strip()}
-    _save_db(db)
+    get_backend().upsert(p, (opis or "").strip(), (tag or "").strip())
+    _fuzzy_changed(p, added=True)
 
 
 def delete_plate(plate: str) -> bool:
     p = _clean_plate(plate)
     if not p:
         return False
-    db = _load_db()
-    existed = p in db
+    existed = get_backend().delete(p)
     if existed:
-        db.pop(p, None)
-        _save_db(db)
+        _fuzzy_changed(p, added=False)
     return existed
+
+
+def _clean_rows(rows: Iterable[Tuple[str, str, str]], seen: List[str]) -> Iterator[Tuple[str, str, str]]:
+    for plate, opis, tag in rows:
+        p = _clean_plate(plate)
+        if p:
+            if len(seen) <= FUZZY_BULK_LIMIT:
+                seen.append(p)
+            yield p, (opis or "").strip(), (tag or "").strip()
+
+
+def upsert_many(rows: Iterable[Tuple[str, str, str]]) -> int:
+    """
+    Wiele wpisów (tablica, opis, tag) jednym zapisem: w SQLite jedna transakcja,
+    w JSON jedno przepisanie pliku. rows może być generatorem (import strumieniowy).
+    """
+    seen: List[str] = []
+    n = get_backend().upsert_many(_clean_rows(rows, seen))
+    _fuzzy_bulk_changed(seen, added=True)
+    return n
+
+
+def delete_many(plates: Iterable[str]) -> int:
+    seen: List[str] = []
+    n = get_backend().delete_many(p for p, _, _ in _clean_rows(((p, "", "") for p in plates), seen))
+    if n:
+        _fuzzy_bulk_changed(seen, added=False)
+    return n
+
+
+def iter_plates(prefix: str = "", tag: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, str]]]:
+    # strumieniowo (SQLite: kursorem w paczkach), bez ładowania całej bazy do listy
+    return get_backend().items(prefix=_clean_plate(prefix), tag=tag)
+
+
+# --- wyszukiwanie przybliżone (pomyłki OCR o jeden znak) ---
+
+_fuzzy = None  # FuzzyPlateIndex nad kluczami bieżącego backendu
+_fuzzy_key: Optional[Tuple[int, int]] = None  # (id backendu, generation) z chwili budowy
+_fuzzy_lock = threading.Lock()
+_fuzzy_building: Optional[threading.Thread] = None
+_fuzzy_writes = 0  # zapisy przez to API – budowa w tle, w trakcie której coś doszło, jest odrzucana
+
+
+def _fuzzy_changed(plate: str, added: bool) -> None:
+    global _fuzzy_writes
+    with _fuzzy_lock:
+        _fuzzy_writes += 1
+        index = _fuzzy
+    if index is not None:
+        index.add(plate) if added else index.remove(plate)
+
+
+FUZZY_BULK_LIMIT = 10_000  # większe zmiany hurtowe -> przebudowa indeksu zamiast add/remove po kluczu
+
+
+def _fuzzy_bulk_changed(plates: List[str], added: bool) -> None:
+    if len(plates) > FUZZY_BULK_LIMIT:
+        _reset_fuzzy()
+        return
+    for p in plates:
+        _fuzzy_changed(p, added)
+
+
+def _reset_fuzzy() -> None:
+    global _fuzzy, _fuzzy_key
+    with _fuzzy_lock:
+        _fuzzy, _fuzzy_key = None, None
+
+
+def _build_fuzzy() -> None:
+    global _fuzzy, _fuzzy_key, _fuzzy_building
+    from app.fuzzy_index import FuzzyPlateIndex
+
+    backend = get_backend()
+    key = (id(backend), backend.generation)
+    writes = _fuzzy_writes
+    index = None
+    try:
+        index = FuzzyPlateIndex(k for k, _ in backend.items())
+    finally:
+        with _fuzzy_lock:
+            if index is not None and writes == _fuzzy_writes:
+                _fuzzy, _fuzzy_key = index, key
+            _fuzzy_building = None
+
+
+def _fuzzy_index(wait: bool):
+    global _fuzzy_building
+    backend = get_backend()
+    if _fuzzy is not None and _fuzzy_key == (id(backend), backend.generation):
+        return _fuzzy
+    if wait:
+        for _ in range(3):  # równoległe zapisy unieważniają budowę – kilka prób, potem bez indeksu
+            _build_fuzzy()
+            if _fuzzy is not None:
+                break
+        return _fuzzy
+    # ścieżka klatki: budowa (sekundy przy 1M wpisów) w tle, do tego czasu tylko dokładne trafienia
+    with _fuzzy_lock:
+        if _fuzzy_building is None:
+            _fuzzy_building = threading.Thread(target=_build_fuzzy, name="plates-fuzzy-build", daemon=True)
+            _fuzzy_building.start()
+    return None
+
+
+def find_similar_plates(plate: Optional[str], max_dist: float = 1.0, k: int = 5,
+                        wait: bool = True) -> List[Tuple[str, float]]:
+    """
+    Klucze bazy w ważonej odległości edycyjnej <= max_dist (pomyłki O/0, I/1, Z/2, S/5 liczą się 0.4),
+    posortowane od najbliższego. wait=False: jeśli indeks jeszcze się buduje – pusta lista.
+    """
+    p = _clean_plate(plate or "")
+    if not p:
+        return []
+    index = _fuzzy_index(wait)
+    return index.search(p, max_dist=max_dist, k=k) if index is not None else []
+
+
+def lookup_plate(plate: Optional[str], max_dist: float = 1.0,
+                 k: int = 3) -> Tuple[Optional[dict], List[Tuple[str, float]]]:
+    """
+    Wpis dla tablicy (tylko dokładne trafienie, inaczej None) + podobne klucze z bazy (bez samej tablicy).
+    Wpis najbliższego klucza – osobno, przez fuzzy_match(similar); jego tag nie należy do tej tablicy.
+    """
+    p = _clean_plate(plate or "")
+    if not p:
+        return None, []
+    info = get_backend().get(p)
+    similar = [(key, d) for key, d in find_similar_plates(p, max_dist, k + 1, wait=False) if key != p][:k]
+    return info, similar
+
+
+def fuzzy_match(similar: List[Tuple[str, float]]) -> Optional[dict]:
+    # wpis najbliższego klucza z polami "match" i "distance" – do podpowiedzi „≈” w UI, nie do alarmów
+    if not similar:
+        return None
+    key, d = similar[0]
+    best = get_backend().get(key)
+    return dict(best, match=key, distance=d) if best is not None else None
+
+
+def exact_tag(data: Dict[str, Any]) -> Optional[str]:
+    # tag do reguł alarmów i dziennika widzeń – tylko z dokładnego trafienia (db_info);
+    # wpis sąsiada (db_fuzzy/db_similar) to cudza tablica, tolerancję pomyłek OCR dają reguły plate z max_dist
+    info = data.get("db_info")
+    if not info or "match" in info:
+        return None
+    return info.get("tag") or None
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.db import PlateBackend, _entry
+
+# Baza tablic w SQLite: klucz główny = tablica (WITHOUT ROWID -> indeks to sama tabela),
+# WAL: odczyty z wątku OCR nie czekają na zapis z GUI. Zapytania to stałe stringi,
+# więc sqlite3 trzyma je w cache skompilowanych instrukcji (prepared statements).
+# Zapisy idą przez jedno połączenie pod blokadą: PRAGMA data_version na nim zmienia się tylko
+# po zapisach z innych połączeń (db_cli import/delete-many, migracja) -> generation dla indeksu przybliżonego.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plates (
+    plate TEXT PRIMARY KEY,
+    opis  TEXT NOT NULL DEFAULT '',
+    tag   TEXT NOT NULL DEFAULT ''
+) WITHOUT ROWID
+"""
+
+SQL_GET = "SELECT opis, tag FROM plates WHERE plate = ?"
+SQL_UPSERT = (
+    "INSERT INTO plates (plate, opis, tag) VALUES (?, ?, ?) "
+    "ON CONFLICT(plate) DO UPDATE SET opis = excluded.opis, tag = excluded.tag"
+)
+SQL_DELETE = "DELETE FROM plates WHERE plate = ?"
+SQL_COUNT = "SELECT COUNT(*) FROM plates"
+SQL_ITEMS = "SELECT plate, opis, tag FROM plates WHERE plate >= ? ORDER BY plate"
+SQL_ITEMS_RANGE = "SELECT plate, opis, tag FROM plates WHERE plate >= ? AND plate < ? ORDER BY plate"
+SQL_TAG_INDEX = "CREATE INDEX IF NOT EXISTS plates_tag ON plates (tag)"
+
+ITER_CHUNK = 5000
+
+
+class SqliteBackend(PlateBackend):
+    # odczyty: jedno połączenie na wątek (sqlite3 nie pozwala współdzielić połączenia między wątkami);
+    # zapisy: wspólne połączenie pod blokadą (check_same_thread=False)
+    def __init__(self, path: Path, revalidate_s: float = 2.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.revalidate_s = revalidate_s
+        self._tls = threading.local()
+        self._conns: List[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        self._wconn = self._connect(check_same_thread=False)
+        self._wlock = threading.Lock()
+        with self._wlock, self._wconn:
+            self._wconn.execute(SCHEMA)
+            self._wconn.execute(SQL_TAG_INDEX)
+        self._generation = 0
+        self._data_version = self._read_data_version()
+        self._checked = time.monotonic()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=5.0, cached_statements=64,
+                               check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # w WAL: trwałe po checkpoincie, bez fsync per zapis
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._tls.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    def _read_data_version(self) -> int:
+        with self._wlock:
+            return int(self._wconn.execute("PRAGMA data_version").fetchone()[0])
+
+    @property
+    def generation(self) -> int:
+        # czytane przy każdym zapytaniu o indeks przybliżony – sprawdzenie pliku najwyżej co revalidate_s
+        now = time.monotonic()
+        if self.revalidate_s > 0 and now - self._checked >= self.revalidate_s:
+            self._checked = now
+            try:
+                version = self._read_data_version()
+            except sqlite3.Error:
+                return self._generation  # chwilowo zablokowana / niedostępna – sprawdzi się następnym razem
+            if version != self._data_version:
+                self._data_version = version
+                self._generation += 1
+        return self._generation
+
+    def get(self, plate: str) -> Optional[Dict[str, str]]:
+        row = self._conn().execute(SQL_GET, (plate,)).fetchone()
+        return _entry(row[0], row[1]) if row else None
+
+    def upsert(self, plate: str, opis: str, tag: str) -> None:
+        conn = self._wconn
+        with self._wlock, conn:
+            conn.execute(SQL_UPSERT, (plate, opis or "", tag or ""))
+
+    def upsert_many(self, rows: Iterable[Tuple[str, str, str]]) -> int:
+        # jedna transakcja; executemany konsumuje generator, więc import nie trzyma pliku w pamięci
+        conn = self._wconn
+        with self._wlock:
+            before = conn.total_changes
+            with conn:
+                conn.executemany(SQL_UPSERT, ((p, o or "", t or "") for p, o, t in rows))
+            return conn.total_changes - before
+
+    def delete_many(self, plates: Iterable[str]) -> int:
+        conn = self._wconn
+        with self._wlock:
+            before = conn.total_changes
+            with conn:
+                conn.executemany(SQL_DELETE, ((p,) for p in plates))
+            return conn.total_changes - before
+
+    def delete(self, plate: str) -> bool:
+        conn = self._wconn
+        with self._wlock, conn:
+            return conn.execute(SQL_DELETE, (plate,)).rowcount > 0
+
+    def count(self) -> int:
+        return int(self._conn().execute(SQL_COUNT).fetchone()[0])
+
+    def items(self, prefix: str = "", tag: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, str]]]:
+        # prefiks jako zakres klucza głównego, tag warunkiem (indeks plates_tag)
+        sql, args = SQL_ITEMS, (prefix,)
+        if prefix:
+            sql, args = SQL_ITEMS_RANGE, (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        if tag is not None:
+            sql = sql.replace(" ORDER BY", " AND tag = ? ORDER BY")
+            args = args + (tag,)
+        cur = self._conn().execute(sql, args)
+        while True:
+            rows = cur.fetchmany(ITER_CHUNK)
+            if not rows:
+                return
+            for plate, opis, tag_ in rows:
+                yield plate, _entry(opis, tag_)
+
+    def close(self) -> None:
+        with self._wlock:
+            self._wconn.close()
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass  # połączenie z innego wątku – zamknie się z wątkiem
+        self._tls = threading.local()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class FrameChangeDetector:
+    """
+    Tani test „czy obraz się zmienił” przed OCR: miniatura w skali szarości
+    i średnia różnica bezwzględna (MAD) względem poprzedniej klatki.
+    threshold jest w poziomach jasności 0–255 (średnio na piksel).
+    """
+
+    def __init__(self, threshold: float = 2.0, size: Tuple[int, int] = (64, 32)):
+        self.threshold = float(threshold)
+        self.size = size
+        self._prev: Optional[np.ndarray] = None
+        self._prev_shape: Optional[Tuple[int, ...]] = None
+
+    def reset(self) -> None:
+        self._prev = None
+        self._prev_shape = None
+
+    def _thumb(self, img_bgr: np.ndarray) -> np.ndarray:
+        # najpierw zmniejsz (INTER_AREA uśrednia szum), potem szarość – mniej pracy
+        small = cv2.resize(img_bgr, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            code = cv2.COLOR_BGRA2GRAY if small.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            small = cv2.cvtColor(small, code)
+        return small
+
+    def changed(self, img_bgr: np.ndarray) -> bool:
+        # zapamiętuje klatkę tylko gdy uznana za zmienioną,
+        # żeby powolny dryf (fade) nie przeszedł niezauważony
+        if self.threshold <= 0:
+            return True
+
+        thumb = self._thumb(img_bgr)
+        if self._prev is not None and self._prev_shape == img_bgr.shape:
+            mad = float(cv2.mean(cv2.absdiff(thumb, self._prev))[0])
+            if mad < self.threshold:
+                return False
+
+        self._prev = thumb
+        self._prev_shape = img_bgr.shape
+        return True
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Przybliżone wyszukiwanie tablic w bazie (symmetric deletion):
+# każdy klucz zapisany jako hashe wariantów z usuniętymi <= max_deletes znakami,
+# zapytanie generuje te same warianty -> kandydaci -> ważona odległość edycyjna.
+# Przed hashowaniem pomyłki OCR są sklejane (O=0, I=1, Z=2, S=5), więc taka zamiana
+# nie zużywa budżetu usunięć, a w odległości kosztuje tylko CONFUSION_COST.
+
+# pary mylone przez OCR na tablicach (litera, cyfra) – podstawa tablic podmian w plate_grammar
+OCR_CONFUSIONS = (("O", "0"), ("I", "1"), ("Z", "2"), ("S", "5"))
+CONFUSION_COST = 0.4
+
+_FOLD = str.maketrans({a: b for a, b in OCR_CONFUSIONS})
+_CONFUSED: Set[Tuple[str, str]] = {p for a, b in OCR_CONFUSIONS for p in ((a, b), (b, a))}
+
+_HASH_MUL_INT = 0x100000001B3
+_HASH_MUL = np.uint64(_HASH_MUL_INT)
+_HASH_MASK = (1 << 64) - 1
+MIN_WIDTH = 8
+COMPACT_MIN = 20_000  # nowe hashe poza główną tablicą, po których przebudowa
+
+
+def fold(s: str) -> str:
+    return s.translate(_FOLD)
+
+
+def _sub_cost(ca: str, cb: str) -> float:
+    if ca == cb:
+        return 0.0
+    return CONFUSION_COST if (ca, cb) in _CONFUSED else 1.0
+
+
+def weighted_distance(a: str, b: str, max_dist: float = float("inf")) -> float:
+    """Levenshtein z tańszą podmianą par z OCR_CONFUSIONS; > max_dist -> przerwane wcześniej."""
+    if a == b:
+        return 0.0
+    if abs(len(a) - len(b)) > max_dist:
+        return float("inf")
+    if max_dist < 2.0:
+        # para wstawienie+usunięcie kosztuje 2 -> przy tej samej długości zostają same podmiany
+        if len(a) == len(b):
+            d = 0.0
+            for ca, cb in zip(a, b):
+                if ca != cb:
+                    d += _sub_cost(ca, cb)
+                    if d > max_dist:
+                        return float("inf")
+            return d
+        if CONFUSION_COST + 1.0 > max_dist:
+            # długości różne o 1 i nie mieści się nic poza jednym wstawieniem
+            longer, shorter = (a, b) if len(a) > len(b) else (b, a)
+            i = next((k for k, (x, y) in enumerate(zip(shorter, longer)) if x != y), len(shorter))
+            return 1.0 if longer[i + 1:] == shorter[i:] else float("inf")
+    prev = [float(j) for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        cur = [float(i)]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1.0, cur[j - 1] + 1.0, prev[j - 1] + _sub_cost(ca, cb)))
+        if min(cur) > max_dist:
+            return float("inf")
+        prev = cur
+    return prev[-1]
+
+
+def _encode(keys: List[str], width: int) -> np.ndarray:
+    # (N, width) uint8, dopełnione zerami (zero nie występuje w kluczach)
+    buf = np.zeros((len(keys), width), dtype=np.uint8)
+    if keys:
+        raw = np.frombuffer("".join(k.ljust(width, "\0") for k in keys).encode("latin-1", "replace"),
+                            dtype=np.uint8)
+        buf[:] = raw.reshape(len(keys), width)
+    return buf
+
+
+def _hash_rows(rows: np.ndarray) -> np.ndarray:
+    # hash wielomianowy mod 2^64; zera na końcu nie zmieniają wyniku -> długość wynika z treści
+    h = np.zeros(rows.shape[0], dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(rows.shape[1] - 1, -1, -1):
+            h = h * _HASH_MUL + rows[:, j].astype(np.uint64)
+    return h
+
+
+def _hash_str(s: str) -> int:
+    # to samo co _hash_rows dla jednego wiersza, bez narzutu numpy (zapytania, pojedyncze add)
+    h = 0
+    for c in reversed(s.encode("latin-1", "replace")):
+        h = (h * _HASH_MUL_INT + c) & _HASH_MASK
+    return h
+
+
+def _deletion_variants(s: str, max_deletes: int) -> Set[str]:
+    out = {s}
+    frontier = {s}
+    for _ in range(max_deletes):
+        frontier = {v[:i] + v[i + 1:] for v in frontier for i in range(len(v))}
+        out |= frontier
+    return out
+
+
+def _delete_positions(width: int, max_deletes: int) -> List[Tuple[int, ...]]:
+    out: List[Tuple[int, ...]] = [()]
+    for i in range(width):
+        out.append((i,))
+    if max_deletes >= 2:
+        out += [(i, j) for i in range(width) for j in range(i + 1, width)]
+    return out
+
+
+def _variant_hashes(codes: np.ndarray, lengths: np.ndarray, max_deletes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(hashe, indeks wiersza) dla wszystkich wariantów z usuniętymi znakami (tylko w obrębie długości klucza)."""
+    n, width = codes.shape
+    hashes, rows = [], []
+    idx = np.arange(n, dtype=np.int64)
+    for pos in _delete_positions(width, max_deletes):
+        mask = lengths > (pos[-1] if pos else -1)
+        if not mask.any():
+            continue
+        if pos:
+            keep = [j for j in range(width) if j not in pos]
+            v = codes[mask][:, keep]
+        else:
+            v = codes[mask]
+        hashes.append(_hash_rows(v))
+        rows.append(idx[mask])
+    if not hashes:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(hashes), np.concatenate(rows)
+
+
+class FuzzyPlateIndex:
+    """
+    Indeks przybliżony nad kluczami bazy. search() – top-k kluczy w ważonej odległości <= max_dist
+    (max_dist <= max_deletes). add()/remove() bez przebudowy: nowe klucze trafiają do małego
+    słownika obok posortowanej tablicy hashy, usunięte są maskowane; przebudowa, gdy delta urośnie.
+    """
+
+    def __init__(self, keys: Iterable[str] = (), max_deletes: int = 1):
+        if max_deletes not in (1, 2):
+            raise ValueError("max_deletes: 1 albo 2")
+        self.max_deletes = max_deletes
+        self._lock = threading.RLock()
+        self.build(keys)
+
+    def __len__(self) -> int:
+        return self._live
+
+    def build(self, keys: Iterable[str]) -> None:
+        keys = list(dict.fromkeys(k for k in keys if k))
+        with self._lock:
+            self._keys: List[str] = keys
+            self._removed: Set[int] = set()
+            self._extra: Dict[int, List[int]] = {}
+            self._extra_count = 0
+            self._live = len(keys)
+
+            folded = [fold(k) for k in keys]
+            codes = _encode(folded, max([MIN_WIDTH] + [len(k) for k in folded]))
+            lengths = np.fromiter((len(k) for k in folded), dtype=np.int64, count=len(folded))
+            hashes, rows = _variant_hashes(codes, lengths, self.max_deletes)
+            order = np.argsort(hashes, kind="stable")
+            self._hashes = hashes[order]
+            self._ids = rows[order]
+
+    def _query_hashes(self, s: str) -> np.ndarray:
+        hashes = sorted({_hash_str(v) for v in _deletion_variants(fold(s), self.max_deletes)})
+        return np.array(hashes, dtype=np.uint64)
+
+    def _candidate_ids(self, s: str) -> Set[int]:
+        qh = self._query_hashes(s)
+        ids: Set[int] = set()
+        if qh.size:
+            lo = np.searchsorted(self._hashes, qh, side="left")
+            hi = np.searchsorted(self._hashes, qh, side="right")
+            for a, b in zip(lo.tolist(), hi.tolist()):
+                if a != b:
+                    ids.update(self._ids[a:b].tolist())
+            if self._extra:
+                for h in qh.tolist():
+                    ids.update(self._extra.get(h, ()))
+        return ids - self._removed
+
+    def _find_id(self, key: str) -> Optional[int]:
+        return next((i for i in self._candidate_ids(key) if self._keys[i] == key), None)
+
+    def search(self, query: str, max_dist: float = 1.0, k: int = 5) -> List[Tuple[str, float]]:
+        if not query:
+            return []
+        max_dist = min(float(max_dist), float(self.max_deletes))
+        with self._lock:
+            cand = [self._keys[i] for i in self._candidate_ids(query)]
+        scored = []
+        for key in cand:
+            d = weighted_distance(query, key, max_dist)
+            if d <= max_dist:
+                scored.append((key, round(d, 3)))
+        scored.sort(key=lambda x: (x[1], x[0]))
+        return scored[:k]
+
+    def add(self, key: str) -> None:
+        if not key:
+            return
+        with self._lock:
+            if self._find_id(key) is not None:
+                return
+            i = len(self._keys)
+            self._keys.append(key)
+            hashes = self._query_hashes(key)
+            for h in hashes.tolist():
+                self._extra.setdefault(h, []).append(i)
+            self._extra_count += hashes.size
+            self._live += 1
+            if self._extra_count > max(COMPACT_MIN, self._hashes.size // 20):
+                self._compact()
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            i = self._find_id(key)
+            if i is None:
+                return False
+            self._removed.add(i)
+            self._live -= 1
+            if len(self._removed) > max(COMPACT_MIN, len(self._keys) // 10):
+                self._compact()
+            return True
+
+    def _compact(self) -> None:
+        self.build([k for i, k in enumerate(self._keys) if i not in self._removed])
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
-import re
+import os
+import sqlite3
+import threading
 import time
-from dataclasses import dataclass
-from typing import Optional, Tuple, Any
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, Dict, List
 
 import numpy as np
 import cv2
-from mss import mss
 
-from PyQt6.QtCore import Qt, QTimer, QThread, QRect, pyqtSignal
+from PyQt6 import sip
+from PyQt6.QtCore import Qt, QObject, QTimer, QThread, QRect, QSize, pyqtSignal
 from PyQt6.QtGui import QImage, QPixmap
 from PyQt6.QtWidgets import (
     QApplication,
@@ -22,253 +24,634 @@ from PyQt6.QtWidgets import (
     QTextEdit,
     QMessageBox,
     QCheckBox,
+    QProgressBar,
+    QSpinBox,
+    QComboBox,
+    QFileDialog,
 )
 
 from app.region_select import RegionSelectOverlay
-from app.ocr import PlateOcr
+from app.ocr import PlateOcr, PreprocessBuffers, to_gray
+from app.frame_change import FrameChangeDetector
+from app.recognizer import PlateRecognizer, Recognition, normalize_plate_text
+from app.pipeline import Frame, LatestQueue, LatestSlot, QueueClosed, StageStats, Timer, bgra_view
+from app.tracker import PlateTracker
+from app.multi_region import MultiRegionRecognizer, plan_grabs, slice_regions
 from app.pl_prefix import region_for_plate
-from app.db import get_plate_info, upsert_plate, delete_plate
+from app.db import exact_tag, fuzzy_match, lookup_plate, upsert_plate, delete_plate
+from app.telemetry import TRACE_ENV, FrameTrace, Telemetry
+from app.sources import VIDEO_EXTS, FrameSource, ScreenSource, open_source
+from app.sightings import open_sighting_log
+from app.alerts import Alert, open_alert_engine
 
 
-# Regex dla PL (1-3 litery + 4-5 znaków alnum) => np. ERA75TM, KR1234A
-PL_PLATE_RX = re.compile(r"^[A-Z]{1,3}[A-Z0-9]{4,5}$")
+_QIMAGE_FORMATS = {
+    2: QImage.Format.Format_Grayscale8,
+    3: QImage.Format.Format_BGR888,
+    4: QImage.Format.Format_RGB32,  # BGRA z mss = 0xAARRGGBB w pamięci (little-endian)
+}
 
 
-def normalize_plate_text(s: str) -> str:
-    s = (s or "").upper()
-    s = re.sub(r"[^A-Z0-9]", "", s)  # usuń spacje i znaki specjalne
-    return s
-
-
-def best_plate_from_candidates(candidates: Any) -> Optional[str]:
+def frame_to_pixmap(img: np.ndarray, size: Optional[QSize] = None) -> QPixmap:
     """
-    Próbuje wyciągnąć sensowną tablicę z listy kandydatów (zależnie od tego jak PlateOcr to zwraca).
-    candidates może być np: [("ERA75TM", 0.9), ("ERA75TN", 0.7)] albo ["ERA75TM", ...]
+    Podgląd wprost z bufora klatki (BGRA / BGR / szary) – bez cvtColor do RGB.
+    QImage tylko opakowuje pamięć numpy (także widok z krokiem wiersza większym niż szerokość);
+    z size skalowanie idzie od razu do miniatury, więc kopiowana jest tylko ona.
     """
-    if not candidates:
-        return None
-
-    parsed = []
-    for c in candidates:
-        if isinstance(c, (list, tuple)) and len(c) >= 1:
-            txt = str(c[0])
-            conf = 0.0
-            if len(c) >= 2:
-                try:
-                    conf = float(c[1])
-                except Exception:
-                    conf = 0.0
-        else:
-            txt = str(c)
-            conf = 0.0
-        parsed.append((txt, conf))
-
-    parsed.sort(key=lambda x: x[1], reverse=True)
+    h, w = img.shape[:2]
+    fmt = _QIMAGE_FORMATS[img.shape[2] if img.ndim == 3 else 2]
+    qimg = QImage(sip.voidptr(img.ctypes.data), w, h, img.strides[0], fmt)
+    if size is not None:
+        qimg = qimg.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    # fromImage kopiuje – img może zostać zwolniony zaraz po powrocie
+    return QPixmap.fromImage(qimg)
 
-    # 1) twarde dopasowanie regex
-    for txt, _ in parsed:
-        norm = normalize_plate_text(txt)
-        if PL_PLATE_RX.match(norm):
-            return norm
 
-    # 2) proste zamiany typowych pomyłek OCR
-    swaps_a = str.maketrans({"O": "0", "I": "1", "Z": "2", "S": "5"})
-    swaps_b = str.maketrans({"0": "O", "1": "I", "2": "Z", "5": "S"})
+def bgr_to_pixmap(img_bgr: np.ndarray) -> QPixmap:
+    return frame_to_pixmap(img_bgr)
 
-    for txt, _ in parsed:
-        norm = normalize_plate_text(txt)
-        if 5 <= len(norm) <= 8:
-            v1 = norm.translate(swaps_a)
-            if PL_PLATE_RX.match(v1):
-                return v1
-            v2 = norm.translate(swaps_b)
-            if PL_PLATE_RX.match(v2):
-                return v2
 
-    return None
+def make_thumbnail(img: np.ndarray, max_w: int, max_h: int) -> np.ndarray:
+    # pomniejszenie do rozmiaru podglądu w wątku roboczym (INTER_AREA); mniejszy obraz – bez zmian
+    h, w = img.shape[:2]
+    scale = min(max_w / float(w), max_h / float(h))
+    if scale >= 1.0:
+        return img
+    size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
 
 
-def bgr_to_pixmap(img_bgr: np.ndarray) -> QPixmap:
-    img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-    h, w, ch = img_rgb.shape
-    bytes_per_line = ch * w
-    qimg = QImage(img_rgb.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-    return QPixmap.fromImage(qimg)
+DEFAULT_PREVIEW_FPS = 10.0
 
 
-def crop_non_black(img_bgr: np.ndarray) -> np.ndarray:
+class PreviewFeed:
     """
-    Obcina czarne marginesy (typowe gdy zaznaczasz obszar z okna „Zdjęcia” z czarnym tłem).
+    Podgląd z wątku roboczego do GUI: miniatura w rozmiarze widżetu, własny limit FPS
+    (niezależny od tempa OCR) i LatestSlot – GUI zawsze bierze najnowszą klatkę.
     """
-    try:
-        gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-        mask = (gray > 12).astype(np.uint8) * 255
-        if cv2.countNonZero(mask) < 0.10 * mask.size:
-            return img_bgr  # za mało treści, nie tnij
 
-        x, y, w, h = cv2.boundingRect(mask)
-        # nie tnij jeśli wyjdzie mikro wycinek
-        if w * h < 0.30 * (img_bgr.shape[0] * img_bgr.shape[1]):
-            return img_bgr
-        return img_bgr[y:y + h, x:x + w]
-    except Exception:
-        return img_bgr
+    def __init__(self, fps: float = DEFAULT_PREVIEW_FPS, size: Tuple[int, int] = (640, 260)):
+        self.fps = float(fps)
+        self.size = size  # (szer., wys.) widżetu podglądu – ustawiane z GUI przy zmianie rozmiaru
+        self.slot = LatestSlot()
+        self._last = 0.0
+
+    def reset(self) -> None:
+        self._last = 0.0
+        self.slot.take()
+
+    def offer(self, img: np.ndarray, now: Optional[float] = None) -> bool:
+        # True -> trzeba wysłać sygnał (GUI nie ma jeszcze nic do odebrania)
+        if self.fps <= 0:
+            return False
+        now = time.perf_counter() if now is None else now
+        if now - self._last < 1.0 / self.fps:
+            return False
+        self._last = now
+        w, h = self.size
+        return self.slot.put(make_thumbnail(img, w, h))
+
+    def take(self) -> Optional[np.ndarray]:
+        return self.slot.take()
 
 
 @dataclass
 class AppState:
     region: Optional[QRect] = None
+    # tryb wielu obszarów: nazwa (R1, R2, ...) -> QRect; pusty = tryb jednego obszaru
+    regions: Dict[str, QRect] = field(default_factory=dict)
+    # plik wideo / katalog obrazów zamiast ekranu (app.sources.open_source)
+    source_spec: Optional[str] = None
+    source_epoch_ms: float = 0.0  # ms epoki dla t=0 nagrania (chwila Start) – czas w dzienniku widzeń
     running: bool = False
 
 
+class WarmupWorker(QObject):
+    """
+    Rozgrzewka OCR w tle (import easyocr/torch, wagi readera, próbna inferencja),
+    żeby okno pokazało się od razu, a pierwsza klatka nie czekała na model.
+    Wątek daemon, nie QThread – zamknięcie okna w trakcie ładowania modelu nie czeka na nie.
+    """
+    progress = pyqtSignal(int, str)
+    done = pyqtSignal(float)  # czas rozgrzewki w ms
+    error = pyqtSignal(str)
+
+    def __init__(self, ocr: PlateOcr):
+        super().__init__()
+        self._ocr = ocr
+
+    def start(self):
+        threading.Thread(target=self._run, name="ocr-warmup", daemon=True).start()
+
+    def _run(self):
+        try:
+            self.done.emit(self._ocr.warm_up(progress=self.progress.emit))
+        except Exception as e:
+            self.error.emit(f"Warm-up exception: {e!r}")
+
+
 class OcrWorker(QThread):
     # object zamiast dict – bezpieczniejsze między wątkami (numpy w środku)
     resultReady = pyqtSignal(object)
+    previewReady = pyqtSignal()  # miniatura czeka w self.preview (LatestSlot)
     error = pyqtSignal(str)
 
     def __init__(self):
         super().__init__()
         self._stop = False
+        self.preview = PreviewFeed()
         self._region: Optional[QRect] = None
         self._interval_ms = 1000
 
-        # dwa OCR-y: preprocessing i bez (fallback)
-        self._ocr_pre = PlateOcr(use_preprocessing=True, gpu=False)
-        self._ocr_raw = PlateOcr(use_preprocessing=False, gpu=False)
-        self._prefer_pre = True
-
-        # pamięć ostatniego sensownego wyniku (żeby nie znikało przez 1-2 klatki)
-        self._last_plate: Optional[str] = None
-        self._last_conf: float = 0.0
-        self._last_time: float = 0.0
-        self._hold_ms = 1200  # ile ms trzymać ostatni wynik gdy OCR zgubi tablicę
-
-    def configure(self, region: QRect, interval_ms: int, use_preprocessing: bool):
+        # kaskada OCR (kolejność prób uczona z ostatnich klatek + budżet czasu na klatkę)
+        self.ocr = PlateOcr(gpu=False)  # reader z puli get_reader – rozgrzewany przez WarmupWorker
+        self._recognizer = PlateRecognizer(self.ocr)
+        # ślady tablic z głosowaniem wieloklatkowym (zastępuje HOLD ostatniej tablicy)
+        self._tracker = PlateTracker(ttl_ms=1500)
+        self._track_stable = False  # czytane przez wątki OCR -> tryb „lekki” (1 próba)
+
+        # pomijanie OCR gdy obraz się nie zmienił (pauza filmu, zdjęcie)
+        self._change = FrameChangeDetector(threshold=2.0)
+        self._cached: Optional[dict] = None
+        self._frames_processed = 0
+        self._frames_skipped = 0
+
+        # potok: zrzut ekranu -> kolejka (drop-oldest) -> OCR -> wzbogacenie
+        self._queue_size = 1
+        self._ocr_workers = 1
+        self._frames_q: Optional[LatestQueue] = None
+        self._results_q: Optional[LatestQueue] = None
+        self._seq = 0
+        self._last_emitted_seq = 0
+        # kolejność przy kilku wątkach OCR: seq klatek pobranych z kolejki, jeszcze nie wysłanych
+        # (albo wyrzuconych z kolejki wyników) + wyniki czekające na starsze klatki
+        self._pending: set = set()
+        self._pending_lock = threading.Lock()
+        self._take_lock = threading.Lock()
+        self._held: Dict[int, Tuple[Frame, Optional[Recognition]]] = {}
+        self._st_capture = StageStats()
+        self._st_ocr = StageStats()
+        self._st_enrich = StageStats()
+
+        # czasy etapów per klatka (p50/p95/p99) + liczniki; nowa instancja przy każdym starcie
+        self.telemetry = Telemetry()
+        self._trace_path: Optional[str] = None
+
+        # źródło klatek: None = zrzut zaznaczonego obszaru; plik wideo / katalog obrazów (app.sources)
+        self._source: Optional[FrameSource] = None
+        self._speed = 0.0
+        self._offline = False
+        self.source_finished = False  # źródło plikowe doczytane do końca (nie Stop)
+
+    def configure(self, region: Optional[QRect], interval_ms: int, use_preprocessing: bool,
+                  change_threshold: float = 2.0, frame_budget_ms: float = 1200.0,
+                  queue_size: int = 1, ocr_workers: int = 1,
+                  preview_fps: float = DEFAULT_PREVIEW_FPS, trace_path: Optional[str] = None,
+                  source: Optional[FrameSource] = None, speed: float = 0.0):
+        # source (plik/katalog) zamiast region; speed: 0 = najszybciej jak się da, 1.0 = tempo nagrania
         self._region = region
+        self._source = source
+        self._speed = max(0.0, float(speed))
         self._interval_ms = interval_ms
-        self._prefer_pre = bool(use_preprocessing)
+        self._trace_path = trace_path  # ślad JSONL (benchmarks/bench_trace_replay.py)
+        self.preview.fps = float(preview_fps)
+        self._queue_size = max(1, int(queue_size))
+        self._ocr_workers = max(1, int(ocr_workers))
+        self._recognizer.configure(prefer_pre=use_preprocessing, frame_budget_ms=frame_budget_ms)
+        # 0 = wyłącz detekcję zmian (OCR na każdej klatce)
+        self._change.threshold = float(change_threshold)
 
     def stop(self):
         self._stop = True
 
-    def _try_one(self, ocr: PlateOcr, img_bgr: np.ndarray) -> Tuple[Optional[str], float, Any]:
-        res = ocr.read_plate(img_bgr)
-        plate = normalize_plate_text(res.plate) if getattr(res, "plate", None) else None
-        conf = float(getattr(res, "confidence", 0.0) or 0.0)
-        candidates = getattr(res, "raw_candidates", []) or []
+    def _run_ocr(self, img_bgr: np.ndarray) -> Recognition:
+        # stabilny ślad: głosowanie dopełni odczyt, wystarczy jedna (najlepsza) próba
+        return self._recognizer.run(img_bgr, max_attempts=1 if self._track_stable else None)
 
-        if not plate:
-            plate = best_plate_from_candidates(candidates)
-
-        # jeśli plate jest, ale ma śmieci – wywal
-        if plate and not PL_PLATE_RX.match(plate):
-            plate = None
-
-        return plate, conf, candidates
-
-    def _run_ocr(self, img_bgr: np.ndarray) -> Tuple[Optional[str], float, Any]:
-        primary = self._ocr_pre if self._prefer_pre else self._ocr_raw
-        secondary = self._ocr_raw if self._prefer_pre else self._ocr_pre
-
-        # przygotuj warianty obrazu (screen z okna zdjęcia bywa mały / z marginesami)
-        variants = []
-        v0 = img_bgr
-        variants.append(v0)
-
-        v1 = crop_non_black(v0)
-        if v1 is not v0:
-            variants.append(v1)
-
-        v2 = cv2.resize(v1, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
-        variants.append(v2)
-
-        # próbuj: primary -> secondary na każdym wariancie
-        best_plate = None
-        best_conf = -1.0
-        best_cand = []
-
-        for v in variants:
-            p, c, cand = self._try_one(primary, v)
-            if p and c >= best_conf:
-                best_plate, best_conf, best_cand = p, c, cand
-                if best_conf >= 0.70:
-                    break  # wystarczająco dobrze
-
-            p2, c2, cand2 = self._try_one(secondary, v)
-            if p2 and c2 >= best_conf:
-                best_plate, best_conf, best_cand = p2, c2, cand2
-                if best_conf >= 0.70:
+    # --- etapy potoku: capture -> OCR (1..N wątków) -> wzbogacenie + emit ---
+
+    def _capture_loop(self):
+        r = self._region
+        source = self._source or ScreenSource((r.x(), r.y(), r.width(), r.height()))
+        offline = not source.realtime
+        t_start: Optional[float] = None
+        try:
+            with source:
+                while not self._stop:
+                    t0 = time.perf_counter()
+                    ft = FrameTrace(self._seq + 1)
+                    with Timer(self._st_capture):
+                        # ekran: widok na bufor mss (bez kopii); szarość dla OCR liczy wątek OCR
+                        sf = source.read()
+                        if sf is None:
+                            self.source_finished = True
+                            break
+                        t1 = time.perf_counter()
+                        changed = self._change.changed(sf.img)
+                        ft.add("grab", (t1 - t0) * 1000.0)
+                        ft.add("change", (time.perf_counter() - t1) * 1000.0)
+
+                    self._seq += 1
+                    frame = Frame(seq=self._seq, t_capture=t0, img=sf.img, changed=changed, trace=ft,
+                                  source_index=sf.index, source_t_ms=sf.t_ms, source_name=sf.name)
+                    if offline:
+                        # plik: każda próbkowana klatka przechodzi przez potok (kolejka czeka, nie gubi)
+                        self._frames_q.put(frame, block=True)
+                        if self._speed > 0:
+                            # tempo nagrania x speed, liczone od pierwszej klatki
+                            if t_start is None:
+                                t_start = t0 - sf.t_ms / 1000.0 / self._speed
+                            sleep_ms = (t_start + sf.t_ms / 1000.0 / self._speed - time.perf_counter()) * 1000.0
+                            if sleep_ms > 0:
+                                self.msleep(int(sleep_ms))
+                        continue
+
+                    # wyrzucona zmieniona klatka -> nowsza też musi przejść przez OCR
+                    self._frames_q.put(frame, on_drop=_carry_changed)
+
+                    # interval_ms to minimalny odstęp między zrzutami, nie sen po OCR
+                    sleep_ms = self._interval_ms - (time.perf_counter() - t0) * 1000.0
+                    if sleep_ms > 0:
+                        self.msleep(int(sleep_ms))
+        except QueueClosed:
+            pass
+        except Exception as e:
+            self.error.emit(f"OcrWorker capture exception: {e!r}")
+        finally:
+            self._frames_q.close()
+
+    def _ocr_loop(self):
+        # bufor szarości per wątek OCR (nadpisywany co klatkę, nie wychodzi poza _run_ocr)
+        bufs = PreprocessBuffers()
+        try:
+            while True:
+                # pobranie + rejestracja razem: nowsza klatka z innego wątku nie wyprzedzi tej w _pending
+                with self._take_lock:
+                    frame = self._frames_q.get(timeout=0.2)
+                    if frame is None:
+                        continue
+                    with self._pending_lock:
+                        self._pending.add(frame.seq)
+
+                if not frame.changed and self._cached is not None:
+                    # obraz bez zmian -> etap wzbogacenia wyśle poprzedni wynik bez wołania EasyOCR
+                    self._results_q.put((frame, None), on_drop=self._drop_result, block=self._offline)
+                    continue
+
+                with Timer(self._st_ocr):
+                    t0 = time.perf_counter()
+                    img = frame.img
+                    gray = to_gray(img, out=bufs.get("frame_gray", img.shape[:2]))
+                    t1 = time.perf_counter()
+                    rec = self._run_ocr(gray)
+                    ft = frame.trace
+                    ft.add("convert", (t1 - t0) * 1000.0)
+                    # "ocr" = cała kaskada; próby osobno jako ocr:<wariant>/<silnik>
+                    ft.add("ocr", (time.perf_counter() - t1) * 1000.0 - rec.postprocess_ms)
+                    ft.add("postprocess", rec.postprocess_ms)
+                    ft.attempts = list(rec.attempts)
+                    ft.early_exit = rec.early_exit
+                self._results_q.put((frame, rec), on_drop=self._drop_result, block=self._offline)
+        except QueueClosed:
+            pass
+        except Exception as e:
+            self.error.emit(f"OcrWorker OCR exception: {e!r}")
+            self._stop = True
+
+    def _drop_result(self, dropped, newer) -> None:
+        # wynik wyrzucony z pełnej kolejki wyników – nowsze klatki nie czekają już na niego
+        with self._pending_lock:
+            self._pending.discard(dropped[0].seq)
+
+    def _release(self, item: Optional[Tuple[Frame, Optional[Recognition]]] = None, flush: bool = False):
+        """
+        Bufor kolejności: wynik klatki N wychodzi dopiero, gdy żadna starsza klatka nie jest już w OCR.
+        Inaczej niezmieniona klatka N+1 (bez OCR) wysłałaby stary wynik przed świeżym wynikiem N.
+        flush – koniec potoku: wszystko, co czeka, w kolejności seq.
+        """
+        if item is not None:
+            self._held[item[0].seq] = item
+        while self._held:
+            seq = min(self._held)
+            with self._pending_lock:
+                if not flush and self._pending and min(self._pending) < seq:
+                    return
+                self._pending.discard(seq)
+            self._emit(*self._held.pop(seq))
+
+    def _emit(self, frame: Frame, ocr: Optional[Recognition]):
+        # _release podaje klatki w kolejności seq; starsze mogą tu trafić tylko po flush
+        if frame.seq <= self._last_emitted_seq:
+            return
+        self._last_emitted_seq = frame.seq
+        ft: FrameTrace = frame.trace
+
+        if ocr is None:
+            self._frames_skipped += 1
+            payload = dict(self._cached)
+            payload["skipped"] = True
+            ft.skipped = True
+            ft.plate, ft.conf = payload.get("plate"), payload.get("confidence", 0.0)
+        else:
+            self._frames_processed += 1
+
+            with Timer(self._st_enrich):
+                t0 = time.perf_counter()
+                now = time.time() * 1000.0
+
+                plate, conf = self._tracker.update_from(ocr, now)
+                self._track_stable = self._tracker.is_stable()
+                t1 = time.perf_counter()
+
+                reg = region_for_plate(plate) if plate else None
+                t2 = time.perf_counter()
+                info, similar = lookup_plate(plate) if plate else (None, [])
+                ft.add("track", (t1 - t0) * 1000.0)
+                ft.add("region", (t2 - t1) * 1000.0)
+                ft.add("db", (time.perf_counter() - t2) * 1000.0)
+                # ślad trzyma tablicę, której ta klatka sama nie odczytała (dawny HOLD)
+                ft.hold = bool(plate) and not ocr.plate
+                ft.plate, ft.frame_plate, ft.conf = plate, ocr.plate, conf
+
+            strategy_stats = self._recognizer.stats()
+
+            payload = {
+                "plate": plate,
+                "confidence": conf,
+                "frame_plate": ocr.plate,  # odczyt z tej klatki, przed głosowaniem
+                "region": reg,
+                "db_info": info,  # tylko dokładne trafienie
+                "db_fuzzy": fuzzy_match(similar) if info is None else None,
+                "db_similar": similar,
+                "candidates": ocr.candidates,
+                "tracks": self._tracker.active_tracks(),
+                "skipped": False,
+                "strategy": ocr.strategy,
+                "strategy_stats": strategy_stats,
+            }
+            self._cached = payload
+
+        t_emit = time.perf_counter()
+        if self.preview.offer(frame.img):
+            self.previewReady.emit()
+
+        payload.update({
+            "source_index": frame.source_index,
+            "source_t_ms": frame.source_t_ms,  # znacznik czasu klatki w nagraniu
+            "source_name": frame.source_name,
+            "elapsed_ms": (t_emit - frame.t_capture) * 1000.0,
+            "frames_processed": self._frames_processed,
+            "frames_skipped": self._frames_skipped,
+            "pipeline": self.pipeline_stats(),
+        })
+        self.resultReady.emit(payload)
+
+        t_end = time.perf_counter()
+        ft.add("emit", (t_end - t_emit) * 1000.0)
+        ft.add("total", (t_end - frame.t_capture) * 1000.0)
+        self.telemetry.record(ft)
+
+    def pipeline_stats(self) -> dict:
+        return {
+            "queue_depth": self._frames_q.qsize() if self._frames_q else 0,
+            "queue_max": self._queue_size,
+            "frames_dropped": self._frames_q.dropped if self._frames_q else 0,
+            "previews_coalesced": self.preview.slot.replaced,
+            "ocr_workers": self._ocr_workers,
+            "capture": self._st_capture.as_dict(),
+            "ocr": self._st_ocr.as_dict(),
+            "enrich": self._st_enrich.as_dict(),
+        }
+
+    def run(self):
+        threads = []
+        try:
+            if self._region is None and self._source is None:
+                return
+            self._offline = self._source is not None and not self._source.realtime
+            self.source_finished = False
+
+            self._change.reset()
+            self._tracker.reset()
+            self.preview.reset()
+            self._track_stable = False
+            self._cached = None
+            self._frames_processed = 0
+            self._frames_skipped = 0
+            self._seq = 0
+            self._last_emitted_seq = 0
+            self._pending = set()
+            self._held = {}
+            self._st_capture, self._st_ocr, self._st_enrich = StageStats(), StageStats(), StageStats()
+            self.telemetry = Telemetry(trace_path=self._trace_path)
+
+            self._frames_q = LatestQueue(self._queue_size)
+            self._results_q = LatestQueue(max(2, self._ocr_workers * 2))
+            # plik: jeden wątek OCR; ekran: kilka wątków, kolejność przywraca _release
+            n_ocr = 1 if self._offline else self._ocr_workers
+
+            threads.append(threading.Thread(target=self._capture_loop, name="anpr-capture", daemon=True))
+            for i in range(n_ocr):
+                threads.append(threading.Thread(target=self._ocr_loop, name=f"anpr-ocr-{i}", daemon=True))
+            for t in threads:
+                t.start()
+
+            # etap wzbogacenia (region, baza, HOLD) + emit działa w samym QThread
+            while not self._stop:
+                item = self._results_q.get(timeout=0.2)
+                if item is not None:
+                    self._release(item)
+                elif not any(t.is_alive() for t in threads[1:]):
+                    # koniec źródła: wynik wstawiony tuż przed końcem wątku OCR też ma wyjść
+                    while not self._stop:
+                        item = self._results_q.get(timeout=0)
+                        if item is None:
+                            break
+                        self._release(item)
+                    self._release(flush=True)
                     break
 
-        # jeśli nie znaleziono nic, ale mamy kandydatów – spróbuj jeszcze wydłubać „best” bez patrzenia na conf
-        if not best_plate:
-            # weź kandydatów z ostatniej próby (jeśli były)
-            maybe = best_plate_from_candidates(best_cand)
-            if maybe and PL_PLATE_RX.match(maybe):
-                best_plate = maybe
-                best_conf = max(best_conf, 0.50)
+        except Exception as e:
+            self.error.emit(f"OcrWorker exception: {e!r}")
+        finally:
+            self._stop = True
+            if self._frames_q is not None:
+                self._frames_q.close()
+            if self._results_q is not None:
+                self._results_q.close()  # odblokuj put(block=True) w wątkach OCR
+            for t in threads:
+                t.join(timeout=2.0)
+            self.telemetry.close()
+
+
+def _carry_changed(dropped: Frame, newer: Frame) -> None:
+    if dropped.changed:
+        newer.changed = True
+
+
+class MultiRegionWorker(QThread):
+    """
+    Wiele obszarów naraz: jeden zrzut na monitor, OCR w puli procesów.
+    Każdy obszar ma własny HOLD, detektor zmian i strumień wyników (payload["region_name"]).
+    """
+    resultReady = pyqtSignal(object)
+    previewReady = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self._stop = False
+        self.preview = PreviewFeed()  # wspólny podgląd: ostatni obszar z wynikiem
+        self._regions: Dict[str, QRect] = {}
+        self._interval_ms = 200
+        self._prefer_pre = True
+        self._workers: Optional[int] = None
+        self._change_threshold = 2.0
+        self._frame_budget_ms = 1200.0
+        self.telemetry = Telemetry()  # wszystkie obszary razem; "ocr" = czas w procesie roboczym
+        self._trace_path: Optional[str] = None
+
+    def configure(self, regions: Dict[str, QRect], interval_ms: int, use_preprocessing: bool,
+                  workers: Optional[int] = None, change_threshold: float = 2.0,
+                  frame_budget_ms: float = 1200.0, preview_fps: float = DEFAULT_PREVIEW_FPS,
+                  trace_path: Optional[str] = None):
+        self._regions = dict(regions)
+        self._trace_path = trace_path
+        self.preview.fps = float(preview_fps)
+        self._interval_ms = interval_ms
+        self._prefer_pre = bool(use_preprocessing)
+        self._workers = workers
+        self._change_threshold = float(change_threshold)
+        self._frame_budget_ms = float(frame_budget_ms)
+
+    def stop(self):
+        self._stop = True
 
-        return best_plate, float(best_conf if best_conf >= 0 else 0.0), best_cand
+    def _emit_result(self, name: str, rec: Recognition, ocr_ms: float, img_bgra: np.ndarray, t0: float,
+                     capture: Dict[str, float], tracker: PlateTracker, counters: dict):
+        # t0 – początek zrzutu grupy; capture – grab/convert/change tej klatki obszaru (ms)
+        ft = FrameTrace(counters["processed"] + 1)
+        for stage, ms in capture.items():
+            ft.add(stage, ms)
+        ft.add("ocr", ocr_ms - rec.postprocess_ms)
+        ft.add("postprocess", rec.postprocess_ms)
+        ft.attempts, ft.early_exit = list(rec.attempts), rec.early_exit
+
+        t1 = time.perf_counter()
+        plate, conf = tracker.update_from(rec, time.time() * 1000.0)
+        t2 = time.perf_counter()
+        reg = region_for_plate(plate) if plate else None
+        t3 = time.perf_counter()
+        info, similar = lookup_plate(plate) if plate else (None, [])
+        t_emit = time.perf_counter()
+        ft.add("track", (t2 - t1) * 1000.0)
+        ft.add("region", (t3 - t2) * 1000.0)
+        ft.add("db", (t_emit - t3) * 1000.0)
+        ft.hold = bool(plate) and not rec.plate
+        ft.plate, ft.frame_plate, ft.conf = plate, rec.plate, conf
+        counters["processed"] += 1
+
+        if self.preview.offer(img_bgra):
+            self.previewReady.emit()
+
+        self.resultReady.emit({
+            "region_name": name,
+            "plate": plate,
+            "confidence": conf,
+            "region": reg,
+            "db_info": info,
+            "db_fuzzy": fuzzy_match(similar) if info is None else None,
+            "db_similar": similar,
+            "elapsed_ms": (time.perf_counter() - t0) * 1000.0,
+            "ocr_ms": ocr_ms,
+            "frame_plate": rec.plate,
+            "candidates": rec.candidates,
+            "tracks": tracker.active_tracks(),
+            "skipped": False,
+            "strategy": rec.strategy,
+            "frames_processed": counters["processed"],
+            "frames_skipped": counters["skipped"],
+        })
+
+        t_end = time.perf_counter()
+        ft.add("emit", (t_end - t_emit) * 1000.0)
+        ft.add("total", (t_end - t0) * 1000.0)
+        self.telemetry.record(ft)
 
     def run(self):
+        pool = None
         try:
-            if self._region is None:
+            if not self._regions:
                 return
 
+            self.preview.reset()
+            self.telemetry = Telemetry(trace_path=self._trace_path)
+            rects = {n: (r.x(), r.y(), r.width(), r.height()) for n, r in self._regions.items()}
+            trackers = {n: PlateTracker(ttl_ms=1500) for n in rects}
+            changes = {n: FrameChangeDetector(threshold=self._change_threshold) for n in rects}
+            counters = {n: {"processed": 0, "skipped": 0} for n in rects}
+            # najwyżej jedno zadanie w locie na obszar: wolny obszar nie zapycha puli
+            inflight: Dict[str, tuple] = {}
+
+            pool = MultiRegionRecognizer(
+                workers=self._workers,
+                prefer_pre=self._prefer_pre,
+                frame_budget_ms=self._frame_budget_ms,
+            )
+            pool.start()
+
+            from mss import mss
             with mss() as sct:
+                groups = plan_grabs(rects, sct.monitors[1:])
+
                 while not self._stop:
-                    t0 = time.time()
-
-                    r = self._region
-                    monitor = {
-                        "left": r.x(),
-                        "top": r.y(),
-                        "width": r.width(),
-                        "height": r.height(),
-                    }
-                    shot = np.array(sct.grab(monitor))  # BGRA
-                    img_bgr = cv2.cvtColor(shot, cv2.COLOR_BGRA2BGR)
-
-                    plate, conf, candidates = self._run_ocr(img_bgr)
-
-                    now = time.time() * 1000.0
-
-                    # HOLD: jeśli OCR zgubił, trzymaj ostatni wynik chwilę
-                    if not plate and self._last_plate and (now - self._last_time) <= self._hold_ms:
-                        plate = self._last_plate
-                        conf = self._last_conf
-                    elif plate:
-                        self._last_plate = plate
-                        self._last_conf = conf
-                        self._last_time = now
-
-                    reg = region_for_plate(plate) if plate else None
-                    info = get_plate_info(plate) if plate else None
-
-                    elapsed_ms = (time.time() - t0) * 1000.0
-
-                    self.resultReady.emit({
-                        "img_bgr": img_bgr,
-                        "plate": plate,
-                        "confidence": conf,
-                        "region": reg,
-                        "db_info": info,
-                        "elapsed_ms": elapsed_ms,
-                        "candidates": candidates,
-                    })
-
-                    sleep_ms = max(10, self._interval_ms - int(elapsed_ms))
-                    self.msleep(sleep_ms)
+                    t_loop = time.perf_counter()
+
+                    for g in groups:
+                        t0 = time.perf_counter()
+                        shot = bgra_view(sct.grab(g.monitor))  # jeden zrzut na grupę, bez kopii
+                        t1 = time.perf_counter()
+                        views = slice_regions(shot, g)
+                        # jeden zrzut i jedno cięcie na grupę – każdy obszar dostaje czas zrzutu i swój udział w cięciu
+                        grab_ms = (t1 - t0) * 1000.0
+                        slice_ms = (time.perf_counter() - t1) * 1000.0 / max(1, len(views))
+                        for name, view in views:
+                            if name in inflight:
+                                continue
+                            t2 = time.perf_counter()
+                            changed = changes[name].changed(view)
+                            capture = {"grab": grab_ms, "convert": slice_ms,
+                                       "change": (time.perf_counter() - t2) * 1000.0}
+                            if not changed:
+                                counters[name]["skipped"] += 1
+                                continue
+                            light = 1 if trackers[name].is_stable() else None
+                            inflight[name] = (pool.submit(name, view, max_attempts=light), view, t0, capture)
+
+                    for name, (fut, view, t0, capture) in list(inflight.items()):
+                        if not fut.done():
+                            continue
+                        del inflight[name]
+                        _name, rec, ocr_ms = fut.result()
+                        self._emit_result(name, rec, ocr_ms, view, t0, capture, trackers[name], counters[name])
+
+                    sleep_ms = self._interval_ms - (time.perf_counter() - t_loop) * 1000.0
+                    if sleep_ms > 0:
+                        self.msleep(int(sleep_ms))
 
         except Exception as e:
-            self.error.emit(f"OcrWorker exception: {e!r}")
+            self.error.emit(f"MultiRegionWorker exception: {e!r}")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            self.telemetry.close()
 
 
 class InfoWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("ANPR – Informacje")
-        self.resize(520, 420)
+        self.resize(520, 640)
 
         self.lblPlate = QLabel("Tablica: —")
         self.lblRegion = QLabel("Region: —")
@@ -278,29 +661,96 @@ class InfoWindow(QWidget):
         self.txtDb = QTextEdit()
         self.txtDb.setReadOnly(True)
 
+        # ostatni alarm z listy obserwowanych (app/alerts.py)
+        self.lblAlert = QLabel("")
+        self.lblAlert.setStyleSheet("color: white; background: #c62828; font-weight: bold; padding: 4px;")
+        self.lblAlert.hide()
+
         layout = QVBoxLayout()
+        layout.addWidget(self.lblAlert)
         layout.addWidget(self.lblPlate)
         layout.addWidget(self.lblRegion)
         layout.addWidget(self.lblConf)
         layout.addWidget(self.lblLast)
         layout.addWidget(QLabel("Wpis z lokalnej bazy:"))
         layout.addWidget(self.txtDb)
+
+        # tryb wielu obszarów: ostatni wynik każdego obszaru
+        self._per_region: Dict[str, str] = {}
+        self.lblRegions = QLabel("Obszary:")
+        self.txtRegions = QTextEdit()
+        self.txtRegions.setReadOnly(True)
+        self.lblRegions.hide()
+        self.txtRegions.hide()
+        layout.addWidget(self.lblRegions)
+        layout.addWidget(self.txtRegions)
+
+        # panel wydajności: percentyle etapów z Telemetry (odświeżany timerem MainWindow)
+        self.lblPerf = QLabel("Wydajność (ms: p50 / p95 / p99):")
+        self.txtPerf = QTextEdit()
+        self.txtPerf.setReadOnly(True)
+        self.txtPerf.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        self.txtPerf.setStyleSheet("font-family: monospace;")
+        layout.addWidget(self.lblPerf)
+        layout.addWidget(self.txtPerf)
         self.setLayout(layout)
 
+    def update_region(self, name: str, plate: Optional[str], region: Optional[str], conf: float):
+        self._per_region[name] = f"{name}: {plate or '—'}  ({conf:.2f})  {region or ''}"
+        self.txtRegions.setPlainText("\n".join(self._per_region[k] for k in sorted(self._per_region)))
+        self.lblRegions.show()
+        self.txtRegions.show()
+
+    def clear_regions(self):
+        self._per_region.clear()
+        self.txtRegions.clear()
+        self.lblRegions.hide()
+        self.txtRegions.hide()
+
+    def update_perf(self, snapshot: dict):
+        lines = []
+        for name, st in snapshot.get("stages", {}).items():
+            if not st.get("count"):
+                continue
+            lines.append(f"{name:<16} {st['p50_ms']:>7.1f} {st['p95_ms']:>7.1f} {st['p99_ms']:>7.1f}"
+                         f"   n={st['count']}")
+        c = snapshot.get("counters", {})
+        if c:
+            lines.append("")
+            lines.append(f"klatki: {c.get('frames', 0)} (bez zmian: {c.get('frames_skipped', 0)})  "
+                         f"próby OCR: {c.get('variants_tried', 0)}")
+            lines.append(f"wyjścia ≥0.70: {c.get('early_exits', 0)}  "
+                         f"podtrzymania (hold): {c.get('hold_activations', 0)}")
+        self.txtPerf.setPlainText("\n".join(lines))
+
     def update_info(self, plate: Optional[str], region: Optional[str], conf: float,
-                    db_info: Optional[dict], elapsed_ms: float):
+                    db_info: Optional[dict], elapsed_ms: float, similar: Optional[list] = None,
+                    fuzzy: Optional[dict] = None):
         self.lblPlate.setText(f"Tablica: {plate or '—'}")
         self.lblRegion.setText(f"Region: {region or '—'}")
         self.lblConf.setText(f"Pewność OCR: {conf:.2f}")
         self.lblLast.setText(f"Ostatnia aktualizacja: {elapsed_ms:.0f} ms")
 
+        lines = []
         if db_info:
-            self.txtDb.setPlainText(
-                f"tag: {db_info.get('tag', '')}\n"
-                f"opis: {db_info.get('opis', '')}"
-            )
+            lines.append(f"tag: {db_info.get('tag', '')}")
+            lines.append(f"opis: {db_info.get('opis', '')}")
+        elif fuzzy:
+            # brak dokładnego trafienia – tylko podpowiedź: wpis najbliższej tablicy z bazy
+            lines.append("Brak wpisu w bazie.")
+            lines.append(f"≈ {fuzzy['match']} (odległość {fuzzy.get('distance', 0):.1f}): "
+                         f"tag: {fuzzy.get('tag', '')}, opis: {fuzzy.get('opis', '')}")
         else:
-            self.txtDb.setPlainText("Brak wpisu w bazie.")
+            lines.append("Brak wpisu w bazie.")
+        if similar:
+            lines.append("podobne w bazie: " + ", ".join(f"{k} ({d:.1f})" for k, d in similar))
+        self.txtDb.setPlainText("\n".join(lines))
+
+    def show_alerts(self, alerts: List[Alert]):
+        a = alerts[0]
+        more = f" (+{len(alerts) - 1})" if len(alerts) > 1 else ""
+        self.lblAlert.setText(f"⚠ {a.plate}: {a.rule} [{a.matched}] {time.strftime('%H:%M:%S')}{more}")
+        self.lblAlert.show()
 
 
 class MainWindow(QWidget):
@@ -314,8 +764,28 @@ class MainWindow(QWidget):
 
         self.worker = OcrWorker()
         self.worker.resultReady.connect(self.on_worker_result)
+        self.worker.previewReady.connect(lambda: self.on_preview(self.worker.preview))
         self.worker.error.connect(self.on_worker_error)
 
+        self.multiWorker = MultiRegionWorker()
+        self.multiWorker.resultReady.connect(self.on_worker_result)
+        self.multiWorker.previewReady.connect(lambda: self.on_preview(self.multiWorker.preview))
+        self.multiWorker.error.connect(self.on_worker_error)
+
+        # dziennik przejazdów (data/sightings.sqlite): zapis w tle, odczyty zwijane w widzenia
+        try:
+            self.sightings = open_sighting_log()
+        except (OSError, sqlite3.Error) as e:
+            print(f"[SIGHTINGS] dziennik wyłączony: {e!r}")
+            self.sightings = None
+
+        # lista obserwowanych (data/alert_rules.json); brak pliku -> bez alarmów
+        try:
+            self.alerts = open_alert_engine()
+        except (OSError, ValueError) as e:
+            print(f"[ALERT] reguły nie wczytane: {e!r}")
+            self.alerts = None
+
         self.infoWin = InfoWindow()
         self.infoWin.show()
         self.infoWin.raise_()
@@ -323,6 +793,13 @@ class MainWindow(QWidget):
 
         # przyciski sterujące
         self.btnSelect = QPushButton("Wybierz obszar ekranu")
+        self.btnSelectMulti = QPushButton("Wybierz kilka obszarów")
+        self.btnVideo = QPushButton("Wideo…")
+        self.btnImages = QPushButton("Folder obrazów…")
+        # tempo odtwarzania plików: 0 = najszybciej jak pozwala OCR
+        self.cmbSpeed = QComboBox()
+        for label, speed in (("tempo: maks.", 0.0), ("tempo: 1x", 1.0), ("tempo: 2x", 2.0), ("tempo: 4x", 4.0)):
+            self.cmbSpeed.addItem(label, speed)
         self.btnStart = QPushButton("Start")
         self.btnStop = QPushButton("Stop")
         self.btnStop.setEnabled(False)
@@ -330,6 +807,20 @@ class MainWindow(QWidget):
         self.chkPre = QCheckBox("Preprocessing (polecane)")
         self.chkPre.setChecked(True)
 
+        # odświeżanie podglądu niezależne od tempa OCR (0 = bez podglądu)
+        self.spinPreviewFps = QSpinBox()
+        self.spinPreviewFps.setRange(0, 30)
+        self.spinPreviewFps.setValue(int(DEFAULT_PREVIEW_FPS))
+        self.spinPreviewFps.setPrefix("Podgląd FPS: ")
+        self.spinPreviewFps.valueChanged.connect(self._set_preview_fps)
+
+        # postęp rozgrzewki OCR – Start działa od razu, pierwsza klatka najwyżej poczeka na model
+        # (wywołania wspólnego readera serializuje blokada w PlateOcr)
+        self.warmProgress = QProgressBar()
+        self.warmProgress.setRange(0, 100)
+        self.warmProgress.setFormat("OCR: %p%")
+        self.warmProgress.setMaximumWidth(220)
+
         self.preview = QLabel("Podgląd obszaru pojawi się po starcie…")
         self.preview.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.preview.setMinimumHeight(260)
@@ -348,9 +839,15 @@ class MainWindow(QWidget):
         # layout
         top = QHBoxLayout()
         top.addWidget(self.btnSelect)
+        top.addWidget(self.btnSelectMulti)
+        top.addWidget(self.btnVideo)
+        top.addWidget(self.btnImages)
+        top.addWidget(self.cmbSpeed)
         top.addWidget(self.btnStart)
         top.addWidget(self.btnStop)
         top.addWidget(self.chkPre)
+        top.addWidget(self.spinPreviewFps)
+        top.addWidget(self.warmProgress)
 
         form = QHBoxLayout()
         form.addWidget(self.edPlate)
@@ -369,14 +866,67 @@ class MainWindow(QWidget):
 
         # akcje
         self.btnSelect.clicked.connect(self.select_region)
+        self.btnSelectMulti.clicked.connect(lambda: self.select_region(multi=True))
+        self.btnVideo.clicked.connect(self.select_video)
+        self.btnImages.clicked.connect(self.select_images)
+        self.worker.finished.connect(self.on_worker_finished)
         self.btnStart.clicked.connect(self.start)
         self.btnStop.clicked.connect(self.stop)
         self.btnAdd.clicked.connect(self.add_entry)
         self.btnDel.clicked.connect(self.del_entry)
 
+        self.warmup = WarmupWorker(self.worker.ocr)
+        self.warmup.progress.connect(self.on_warmup_progress)
+        self.warmup.done.connect(self.on_warmup_done)
+        self.warmup.error.connect(self.on_warmup_error)
+        # po pierwszym narysowaniu okna
+        QTimer.singleShot(0, self.warmup.start)
+
+        # panel wydajności – 2x na sekundę, niezależnie od liczby klatek
+        self._perfTimer = QTimer(self)
+        self._perfTimer.setInterval(500)
+        self._perfTimer.timeout.connect(self._refresh_perf)
+        self._perfTimer.start()
+
         # automatycznie poproś o wybór obszaru na start
         QTimer.singleShot(200, self.select_region)
 
+    def _refresh_perf(self):
+        if not self.state.running:
+            return
+        worker = self.multiWorker if self.state.regions else self.worker
+        self.infoWin.update_perf(worker.telemetry.snapshot())
+
+    def _set_preview_fps(self, fps: int):
+        # w trakcie pracy też – PreviewFeed czyta fps przy każdej klatce
+        self.worker.preview.fps = float(fps)
+        self.multiWorker.preview.fps = float(fps)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        size = (self.preview.width(), self.preview.height())
+        self.worker.preview.size = size
+        self.multiWorker.preview.size = size
+
+    def on_preview(self, feed: PreviewFeed):
+        # miniatura ma już rozmiar widżetu – w wątku GUI tylko opakowanie w QPixmap
+        thumb = feed.take()
+        if thumb is not None:
+            self.preview.setPixmap(frame_to_pixmap(thumb))
+
+    def on_warmup_progress(self, pct: int, msg: str):
+        self.warmProgress.setValue(pct)
+        self.warmProgress.setFormat(f"OCR: {msg} (%p%)")
+
+    def on_warmup_done(self, ms: float):
+        print(f"[WARMUP] OCR gotowy po {ms:.0f} ms")
+        self.warmProgress.hide()
+
+    def on_warmup_error(self, msg: str):
+        # błąd OCR (np. brak wag) wyjdzie też z OcrWorker po Start
+        print("[WARMUP ERROR]", msg)
+        self.warmProgress.setFormat("OCR: błąd rozgrzewki")
+
     def _close_overlay(self):
         if self._overlay is not None:
             try:
@@ -387,10 +937,10 @@ class MainWindow(QWidget):
                 pass
             self._overlay = None
 
-    def select_region(self):
+    def select_region(self, multi: bool = False):
         self._close_overlay()
 
-        self._overlay = RegionSelectOverlay()
+        self._overlay = RegionSelectOverlay(multi=multi)
 
         # overlay ma być zawsze na wierzchu, bo inaczej bywa „pod spodem”
         try:
@@ -400,6 +950,7 @@ class MainWindow(QWidget):
             pass
 
         self._overlay.regionSelected.connect(self.on_region_selected)
+        self._overlay.regionsSelected.connect(self.on_regions_selected)
         self._overlay.cancelled.connect(self.on_region_cancelled)
         self._overlay.show()
         self._overlay.raise_()
@@ -408,8 +959,33 @@ class MainWindow(QWidget):
     def on_region_cancelled(self):
         self._close_overlay()
 
+    def _set_source(self, spec: str):
+        self.state.source_spec = spec
+        self.state.region = None
+        self.state.regions = {}
+        self.preview.setText(f"Źródło: {spec}")
+
+    def select_video(self):
+        exts = " ".join("*" + e for e in VIDEO_EXTS)
+        path, _ = QFileDialog.getOpenFileName(self, "Plik wideo", "", f"Wideo ({exts});;Wszystkie (*)")
+        if path:
+            self._set_source(path)
+
+    def select_images(self):
+        path = QFileDialog.getExistingDirectory(self, "Folder z obrazami")
+        if path:
+            self._set_source(path)
+
+    def on_worker_finished(self):
+        # plik doczytany do końca – ten sam stan co po Stop
+        if self.state.running and self.worker.source_finished:
+            self.stop()
+            print("[SOURCE] koniec źródła")
+
     def on_region_selected(self, rect: QRect):
         self.state.region = rect
+        self.state.regions = {}
+        self.state.source_spec = None
 
         # najpierw zamknij overlay (bo potrafi blokować kliknięcia)
         self._close_overlay()
@@ -421,22 +997,59 @@ class MainWindow(QWidget):
             f"Zapisano obszar: x={rect.x()}, y={rect.y()}, w={rect.width()}, h={rect.height()}",
         ))
 
+    def on_regions_selected(self, rects: list):
+        self.state.regions = {f"R{i}": r for i, r in enumerate(rects, start=1)}
+        self.state.region = None
+        self.state.source_spec = None
+        self._close_overlay()
+
+        names = ", ".join(self.state.regions)
+        QTimer.singleShot(0, lambda: QMessageBox.information(
+            self, "OK", f"Zapisano {len(rects)} obszary: {names}",
+        ))
+
     def start(self):
-        if not self.state.region:
+        if not self.state.region and not self.state.regions and not self.state.source_spec:
             QMessageBox.warning(self, "Brak obszaru", "Najpierw wybierz obszar ekranu.")
             return
         if self.state.running:
             return
 
+        source = None
+        if self.state.source_spec:
+            try:
+                source = open_source(self.state.source_spec)
+            except OSError as e:
+                QMessageBox.warning(self, "Błąd źródła", str(e))
+                return
+            self.state.source_epoch_ms = time.time() * 1000.0
+
         self.state.running = True
         self.btnStart.setEnabled(False)
         self.btnStop.setEnabled(True)
 
+        if self.state.regions:
+            self.infoWin.clear_regions()
+            self.multiWorker._stop = False
+            self.multiWorker.configure(
+                regions=self.state.regions,
+                interval_ms=200,
+                use_preprocessing=self.chkPre.isChecked(),
+                preview_fps=self.spinPreviewFps.value(),
+                trace_path=os.environ.get(TRACE_ENV) or None,
+            )
+            self.multiWorker.start()
+            return
+
         self.worker._stop = False
         self.worker.configure(
             region=self.state.region,
-            interval_ms=400,
+            interval_ms=100,
             use_preprocessing=self.chkPre.isChecked(),
+            preview_fps=self.spinPreviewFps.value(),
+            trace_path=os.environ.get(TRACE_ENV) or None,
+            source=source,
+            speed=self.cmbSpeed.currentData(),
         )
         self.worker.start()
 
@@ -449,12 +1062,18 @@ class MainWindow(QWidget):
         self.btnStop.setEnabled(False)
 
         self.worker.stop()
+        self.multiWorker.stop()
         self.worker.wait(1500)
+        self.multiWorker.wait(3000)
 
     def closeEvent(self, event):
         try:
             self.stop()
         finally:
+            if self.sightings is not None:
+                self.sightings.close()  # dopisze zdarzenia z kolejki
+            if self.alerts is not None:
+                self.alerts.close()
             self.infoWin.close()
             event.accept()
 
@@ -479,6 +1098,18 @@ class MainWindow(QWidget):
         ok = delete_plate(plate)
         QMessageBox.information(self, "OK", f"Usunięto {plate}." if ok else f"Brak {plate} w bazie.")
 
+    def _log_sighting(self, data: dict):
+        # tylko kolejka – scalanie powtórzeń i zapis robi wątek pisarza
+        if self.sightings is None or not data.get("plate"):
+            return
+        if self.state.source_spec:
+            t_ms = self.state.source_epoch_ms + float(data.get("source_t_ms") or 0.0)
+            source = os.path.basename(self.state.source_spec.rstrip("/\\"))
+        else:
+            t_ms, source = None, data.get("region_name") or "screen"
+        self.sightings.observe(data["plate"], float(data.get("confidence", 0.0)), t_ms,
+                               region=data.get("region"), tag=exact_tag(data), source=source)
+
     def on_worker_error(self, msg: str):
         print("[WORKER ERROR]", msg)
 
@@ -489,7 +1120,6 @@ class MainWindow(QWidget):
             print("[DEBUG] payload nie jest dict:", type(payload))
             return
 
-        img_bgr = data["img_bgr"]
         plate = data.get("plate")
         conf = float(data.get("confidence", 0.0))
         region = data.get("region")
@@ -497,27 +1127,38 @@ class MainWindow(QWidget):
         elapsed_ms = float(data.get("elapsed_ms", 0.0))
         candidates = data.get("candidates", [])
 
-        print(f"[RESULT] plate={plate} region={region} conf={conf:.2f} ms={elapsed_ms:.0f}")
+        skipped = bool(data.get("skipped", False))
 
-        pix = bgr_to_pixmap(img_bgr)
-        self.preview.setPixmap(
-            pix.scaled(
-                self.preview.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation,
-            )
-        )
+        tag = f" [{data['region_name']}]" if data.get("region_name") else ""
+        if self.state.source_spec:
+            tag += f" [t={data.get('source_t_ms', 0.0) / 1000.0:.2f}s #{data.get('source_index', 0)}]"
+
+        print(f"[RESULT]{tag} plate={plate} region={region} conf={conf:.2f} ms={elapsed_ms:.0f}"
+              f"{' (bez zmian)' if skipped else ''}")
 
         if not self.infoWin.isVisible():
             self.infoWin.show()
         self.infoWin.raise_()
 
-        self.infoWin.update_info(plate, region, conf, db_info, elapsed_ms)
+        self.infoWin.update_info(plate, region, conf, db_info, elapsed_ms, data.get("db_similar"),
+                                 data.get("db_fuzzy"))
+        self._log_sighting(data)
+        if self.alerts is not None and plate:
+            fired = self.alerts.evaluate(plate, tag=exact_tag(data), region=region, confidence=conf)
+            if fired:
+                self.infoWin.show_alerts(fired)
+
+        region_name = data.get("region_name")
+        if region_name:
+            self.infoWin.update_region(region_name, plate, region, conf)
 
         if plate:
             self.edPlate.setText(plate)
 
-        self.preview.setToolTip(f"czas: {elapsed_ms:.0f} ms\nkandydaci: {candidates}")
+        self.preview.setToolTip(
+            f"czas: {elapsed_ms:.0f} ms\nkandydaci: {candidates}\n"
+            f"klatki OCR: {data.get('frames_processed', 0)}, pominięte: {data.get('frames_skipped', 0)}"
+        )
 
 
 def main():
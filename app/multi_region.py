@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.ocr import PlateOcr, PreprocessBuffers, to_gray
+from app.recognizer import PlateRecognizer, Recognition
+
+# Wiele nazwanych obszarów ekranu naraz (np. kamery na ścianie wideo):
+# jeden zrzut mss na monitor, obszary wycinane widokami numpy,
+# OCR w osobnych procesach (każdy z własnym readerem EasyOCR) – poza GIL.
+
+Rect = Tuple[int, int, int, int]  # x, y, w, h we współrzędnych globalnych ekranu
+
+
+@dataclass
+class GrabGroup:
+    monitor: Dict[str, int]  # {"left","top","width","height"} – jeden sct.grab
+    regions: List[Tuple[str, Rect]] = field(default_factory=list)  # (nazwa, rect względem monitor)
+
+
+def _contains(mon: dict, x: int, y: int) -> bool:
+    return (mon["left"] <= x < mon["left"] + mon["width"]
+            and mon["top"] <= y < mon["top"] + mon["height"])
+
+
+def plan_grabs(regions: Dict[str, Rect], monitors: Sequence[dict]) -> List[GrabGroup]:
+    """
+    Grupuje obszary po monitorze (wg środka prostokąta) i dla każdej grupy
+    wyznacza jeden prostokąt zrzutu: sumę obszarów, nie cały monitor.
+    """
+    by_mon: Dict[int, List[Tuple[str, Rect]]] = {}
+    for name, (x, y, w, h) in regions.items():
+        cx, cy = x + w // 2, y + h // 2
+        idx = next((i for i, m in enumerate(monitors) if _contains(m, cx, cy)), -1)
+        by_mon.setdefault(idx, []).append((name, (x, y, w, h)))
+
+    groups = []
+    for _idx, items in by_mon.items():
+        left = min(r[0] for _, r in items)
+        top = min(r[1] for _, r in items)
+        right = max(r[0] + r[2] for _, r in items)
+        bottom = max(r[1] + r[3] for _, r in items)
+        g = GrabGroup(monitor={"left": left, "top": top, "width": right - left, "height": bottom - top})
+        for name, (x, y, w, h) in items:
+            g.regions.append((name, (x - left, y - top, w, h)))
+        groups.append(g)
+    return groups
+
+
+def slice_regions(shot_bgra: np.ndarray, group: GrabGroup) -> List[Tuple[str, np.ndarray]]:
+    # widoki (bez kopii) na wspólny bufor zrzutu
+    return [(name, shot_bgra[y:y + h, x:x + w]) for name, (x, y, w, h) in group.regions]
+
+
+# --- strona procesu roboczego ---
+
+_recognizers: Dict[str, PlateRecognizer] = {}
+_gray_bufs = PreprocessBuffers()  # bufory szarości per obszar (klucz: nazwa)
+_settings: dict = {}
+
+
+def _init_worker(prefer_pre: bool, frame_budget_ms: float, gpu: bool, torch_threads: int) -> None:
+    _settings.update(prefer_pre=prefer_pre, frame_budget_ms=frame_budget_ms, gpu=gpu)
+    # bez tego każdy proces bierze wszystkie rdzenie na wątki torcha i się dławią
+    try:
+        import torch
+        torch.set_num_threads(max(1, torch_threads))
+    except ImportError:
+        pass
+    # rozgrzej reader (wagi + próbna inferencja) od razu, a nie przy pierwszej klatce
+    PlateOcr(gpu=gpu).warm_up()
+
+
+def _recognize_region(name: str, img_bgra: np.ndarray,
+                      max_attempts: Optional[int] = None) -> Tuple[str, Recognition, float]:
+    t0 = time.perf_counter()
+    rec = _recognizers.get(name)
+    if rec is None:
+        # osobny scheduler na obszar, reader wspólny w procesie (get_reader)
+        rec = PlateRecognizer(
+            PlateOcr(gpu=_settings.get("gpu", False)),
+            prefer_pre=_settings.get("prefer_pre", True),
+            frame_budget_ms=_settings.get("frame_budget_ms", 1200.0),
+        )
+        _recognizers[name] = rec
+
+    # szarość prosto z BGRA do bufora obszaru (ten sam rozmiar co klatkę)
+    gray = to_gray(img_bgra, out=_gray_bufs.get(name, img_bgra.shape[:2]))
+    result = rec.run(gray, max_attempts=max_attempts)
+    return name, result, (time.perf_counter() - t0) * 1000.0
+
+
+class MultiRegionRecognizer:
+    """Pula procesów OCR dla wielu obszarów."""
+
+    def __init__(self, workers: Optional[int] = None, prefer_pre: bool = True,
+                 frame_budget_ms: float = 1200.0, gpu: bool = False):
+        cpus = os.cpu_count() or 2
+        self.workers = max(1, workers or min(4, cpus))
+        self._initargs = (bool(prefer_pre), float(frame_budget_ms), bool(gpu), max(1, cpus // self.workers))
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._pool is None:
+            # spawn także na Linuksie: fork + torch/Qt w rodzicu potrafi się zawiesić
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=self._initargs,
+            )
+
+    def submit(self, name: str, img_bgra: np.ndarray, max_attempts: Optional[int] = None) -> Future:
+        if self._pool is None:
+            self.start()
+        return self._pool.submit(_recognize_region, name, img_bgra, max_attempts)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+import importlib
+import math
 import re
-from dataclasses import dataclass
-from typing import Optional, List, Tuple
+import string
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Optional, List, Tuple, Dict, Sequence
 
 import cv2
 import numpy as np
-import easyocr
+
+from app.plate_grammar import REGEX_ONLY, score_candidates
+
+if TYPE_CHECKING:
+    # easyocr ciągnie torch (sekundy przy imporcie) – ładowany dopiero w get_reader
+    import easyocr
 
 # Prosta walidacja „PL-like”: 1–3 litery + 4–5 znaków alnum
 PLATE_RE = re.compile(r"^[A-Z]{1,3}[A-Z0-9]{4,5}$")
@@ -17,56 +27,424 @@ def normalize_text(s: str) -> str:
     return "".join(ch for ch in s if ch.isalnum())
 
 
-def preprocess(img_bgr: np.ndarray) -> np.ndarray:
-    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-    gray = cv2.resize(gray, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
-    gray = cv2.bilateralFilter(gray, 9, 75, 75)
+class PreprocessBuffers:
+    """
+    Bufory pośrednie preprocess() wg nazwy i kształtu – przy seriach obrazów
+    tych samych rozmiarów nic nie jest alokowane ponownie. Nie dzielić między wątkami.
+    """
+
+    def __init__(self):
+        self._bufs: Dict[Tuple[str, Tuple[int, ...]], np.ndarray] = {}
+
+    def get(self, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        key = (name, shape)
+        buf = self._bufs.get(key)
+        if buf is None:
+            buf = np.empty(shape, dtype=np.uint8)
+            self._bufs[key] = buf
+        return buf
+
+
+def to_gray(img: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    # BGRA (zrzut mss) / BGR / już szary -> szary; out = bufor docelowy (h, w) uint8
+    if img.ndim == 2:
+        return img
+    code = cv2.COLOR_BGRA2GRAY if img.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+    return cv2.cvtColor(img, code, dst=out)
+
+
+def preprocess(img_bgr: np.ndarray, buffers: Optional[PreprocessBuffers] = None,
+               out: Optional[np.ndarray] = None) -> np.ndarray:
+    # buffers/out opcjonalne: bez nich każde wywołanie alokuje świeże tablice (jak dawniej)
+    # wejście: BGR, BGRA albo szary (zrzut przekonwertowany już w wątku OCR)
+    h, w = img_bgr.shape[:2]
+
+    def buf(name, shape):
+        return buffers.get(name, shape) if buffers is not None else None
+
+    gray = to_gray(img_bgr, out=buf("gray", (h, w)))
+    up = cv2.resize(gray, (w * 2, h * 2), dst=buf("up", (h * 2, w * 2)), interpolation=cv2.INTER_CUBIC)
+    filt = cv2.bilateralFilter(up, 9, 75, 75, dst=buf("filt", (h * 2, w * 2)))
+    if out is None:
+        out = buf("thr", (h * 2, w * 2))
     thr = cv2.adaptiveThreshold(
-        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 5
+        filt, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 5, dst=out
     )
     return thr
 
 
+# lokalizacja tablicy: proporcje PL 520x114 mm (~4.6); sam blok znaków bywa węższy w pionie,
+# stąd zapas w górę (plus perspektywa i obcięcie)
+PLATE_ASPECT_MIN = 2.0
+PLATE_ASPECT_MAX = 8.0
+LOCATE_MAX_WIDTH = 640         # szukanie ROI na pomniejszonej kopii
+LOCATE_MIN_PIXELS = 320 * 240  # mniejsze obszary (ciasne zaznaczenie) idą do OCR w całości
+
+
+def find_plate_rois(img_bgr: np.ndarray, max_rois: int = 3,
+                    min_area_frac: float = 0.002) -> List[Tuple[int, int, int, int]]:
+    """
+    Klasyczna lokalizacja tablic: blackhat (ciemne znaki na jasnym tle) + gradient X,
+    domknięcie szerokim jądrem, kontury o proporcjach tablicy.
+    Zwraca (x, y, w, h) we współrzędnych img_bgr, największe pierwsze.
+    """
+    h0, w0 = img_bgr.shape[:2]
+    scale = min(1.0, LOCATE_MAX_WIDTH / float(w0))
+    gray = to_gray(img_bgr)
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    rect_k = cv2.getStructuringElement(cv2.MORPH_RECT, (13, 5))
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, rect_k)
+
+    grad = cv2.Sobel(blackhat, cv2.CV_32F, 1, 0, ksize=-1)
+    grad = cv2.convertScaleAbs(grad)
+    grad = cv2.GaussianBlur(grad, (5, 5), 0)
+    grad = cv2.morphologyEx(grad, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (17, 5)))
+    _, mask = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    mask = cv2.erode(mask, None, iterations=2)
+    mask = cv2.dilate(mask, None, iterations=2)
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = min_area_frac * gray.shape[0] * gray.shape[1]
+
+    boxes = []
+    for cnt in contours:
+        x, y, w, h = cv2.boundingRect(cnt)
+        if h < 6 or w * h < min_area:
+            continue
+        if not (PLATE_ASPECT_MIN <= w / float(h) <= PLATE_ASPECT_MAX):
+            continue
+        boxes.append((x, y, w, h))
+
+    boxes.sort(key=lambda b: b[2] * b[3], reverse=True)
+
+    rois = []
+    for x, y, w, h in boxes[:max_rois]:
+        # margines, żeby nie uciąć skrajnych znaków
+        px, py = int(w * 0.08) + 2, int(h * 0.25) + 2
+        x, y = max(0, x - px), max(0, y - py)
+        w, h = w + 2 * px, h + 2 * py
+        x0, y0 = int(x / scale), int(y / scale)
+        x1, y1 = min(w0, int((x + w) / scale)), min(h0, int((y + h) / scale))
+        rois.append((x0, y0, x1 - x0, y1 - y0))
+    return rois
+
+
+# pozycja kandydata: (środek x, środek y, szerokość, wysokość) jako ułamki wymiarów obrazu wejściowego
+Box = Tuple[float, float, float, float]
+
+
 @dataclass
 class OcrResult:
     plate: Optional[str]
     confidence: float
     raw_candidates: List[Tuple[str, float]]
+    # równoległe do raw_candidates (None gdy pozycja nieznana) – dla trackera
+    candidate_boxes: List[Optional[Box]] = field(default_factory=list)
+
+
+# jeden surowy odczyt EasyOCR: (pozycja, tekst, pewność)
+RawItem = Tuple[Optional[Box], str, float]
+
+
+def _norm_box(bbox, ox: float, oy: float, scale: float, w: int, h: int) -> Optional[Box]:
+    # bbox EasyOCR (4 punkty) z obrazu po crop/preprocess -> ułamki obrazu wejściowego
+    try:
+        xs = [float(pt[0]) for pt in bbox]
+        ys = [float(pt[1]) for pt in bbox]
+    except (TypeError, ValueError, IndexError):
+        return None
+    x0, x1 = ox + min(xs) / scale, ox + max(xs) / scale
+    y0, y1 = oy + min(ys) / scale, oy + max(ys) / scale
+    return ((x0 + x1) / 2.0 / w, (y0 + y1) / 2.0 / h, (x1 - x0) / w, (y1 - y0) / h)
+
+
+# znaki, które może zwrócić rekognizer – tablice to A-Z i cyfry; małe litery i interpunkcję
+# (i tak wycinane przez normalize_text) zamyka dekoder, zamiast tracić na nie pewność
+PLATE_ALLOWLIST = string.ascii_uppercase + string.digits
+
+
+@dataclass(frozen=True)
+class OcrProfile:
+    """
+    Parametry readtext/recognize dopasowane do tablic. None w polu = domyślna wartość EasyOCR.
+    Detektor (canvas_size, mag_ratio, min_size) liczony z wymiarów obrazu, który do niego trafia:
+    ciasne zaznaczenie powiększa do ~text_height_px wysokości znaków, duży kadr przycina do max_canvas.
+    """
+    allowlist: Optional[str] = PLATE_ALLOWLIST
+    decoder: str = "greedy"          # "beamsearch" / "wordbeamsearch": wolniej, czasem dokładniej
+    beam_width: int = 5
+    text_threshold: Optional[float] = 0.6   # EasyOCR: 0.7; tablice po progowaniu mają wysoki kontrast
+    text_height_px: Optional[int] = 48      # docelowa wysokość znaków w detektorze
+    text_height_frac: float = 0.5           # znaki ~ połowa wysokości ciasnego zaznaczenia
+    max_mag: float = 2.0
+    max_canvas: Optional[int] = 1280        # EasyOCR: 2560 – dla całego ekranu 4x więcej pikseli
+    min_size_frac: Optional[float] = 0.02   # pole tekstu krótsze niż ułamek dłuższego boku – odrzucone
+
+    def recognize_kwargs(self) -> Dict:
+        kw: Dict = {"decoder": self.decoder, "beamWidth": self.beam_width}
+        if self.allowlist is not None:
+            kw["allowlist"] = self.allowlist
+        return kw
+
+    def readtext_kwargs(self, h: int, w: int) -> Dict:
+        # h, w – obraz podawany do readtext (po preprocess, czyli już 2x)
+        kw = self.recognize_kwargs()
+        if self.text_threshold is not None:
+            kw["text_threshold"] = self.text_threshold
+        mag = 1.0
+        if self.text_height_px is not None:
+            mag = min(self.max_mag, max(1.0, self.text_height_px / max(1.0, h * self.text_height_frac)))
+            kw["mag_ratio"] = round(mag, 2)
+        if self.max_canvas is not None:
+            # canvas_size to tylko górny limit max(h, w) * mag_ratio; wielokrotność 32 jak w CRAFT
+            kw["canvas_size"] = min(self.max_canvas, 32 * math.ceil(max(h, w) * mag / 32.0))
+        if self.min_size_frac is not None:
+            kw["min_size"] = max(10, int(self.min_size_frac * max(h, w)))
+        return kw
+
+
+PLATE_PROFILE = OcrProfile()
+
+
+# wspólna pula readerów: (języki, gpu) -> easyocr.Reader
+# wagi detektora i rozpoznawania ładują się raz na proces, nie raz na PlateOcr
+_readers: Dict[Tuple[Tuple[str, ...], bool], "easyocr.Reader"] = {}
+_readers_lock = threading.Lock()
+# jedno wywołanie naraz na reader: EasyOCR nie gwarantuje bezpieczeństwa wątków, a reader dzielą
+# rozgrzewka, wątki OCR w GUI i wątki RecognitionService; przygotowanie obrazów zostaje równoległe
+_reader_call_locks: Dict[Tuple[Tuple[str, ...], bool], threading.Lock] = {}
+
+
+def get_reader(langs: Sequence[str] = ("en",), gpu: bool = False) -> "easyocr.Reader":
+    key = (tuple(langs), bool(gpu))
+    with _readers_lock:
+        reader = _readers.get(key)
+        if reader is None:
+            import easyocr
+            reader = easyocr.Reader(list(key[0]), gpu=key[1])
+            _readers[key] = reader
+        return reader
+
+
+def reader_lock(langs: Sequence[str] = ("en",), gpu: bool = False) -> threading.Lock:
+    key = (tuple(langs), bool(gpu))
+    with _readers_lock:
+        return _reader_call_locks.setdefault(key, threading.Lock())
 
 
 class PlateOcr:
-    def __init__(self, use_preprocessing: bool = True, gpu: bool = False):
+    def __init__(self, use_preprocessing: bool = True, gpu: bool = False,
+                 langs: Sequence[str] = ("en",), use_locator: bool = True,
+                 profile: Optional[OcrProfile] = PLATE_PROFILE):
         # „en” wystarczy, bo tablice to A-Z i cyfry
-        self.reader = easyocr.Reader(["en"], gpu=gpu)
+        self.langs = tuple(langs)
+        # None -> readtext/recognize z domyślnymi parametrami EasyOCR (jak przed profilem)
+        self.profile = profile
+        self.gpu = gpu
         self.use_preprocessing = use_preprocessing
+        # duże obszary: najpierw find_plate_rois, EasyOCR tylko na wycinkach
+        self.use_locator = use_locator
+        self._tls = threading.local()  # bufory read_plates per wątek
+        self._call_lock = reader_lock(self.langs, self.gpu)  # wokół każdego wywołania readera
 
-    def read_plate(self, img_bgr: np.ndarray) -> OcrResult:
-        img = preprocess(img_bgr) if self.use_preprocessing else img_bgr
-        results = self.reader.readtext(img)
+    @property
+    def reader(self) -> "easyocr.Reader":
+        # tworzony leniwie przy pierwszym użyciu, współdzielony między instancjami
+        return get_reader(self.langs, self.gpu)
 
-        candidates: List[Tuple[str, float]] = []
+    def warm_up(self, progress: Optional[Callable[[int, str], None]] = None) -> float:
+        """
+        Import easyocr, wagi readera i próbna inferencja: readtext (detektor + rozpoznawanie)
+        na obrazie po preprocess i recognize (samo rozpoznawanie, ścieżka ROI) na szarości.
+        Zwraca czas w ms. progress(procent, opis) – wołane z wątku, w którym działa warm_up.
+        Wywołania readera pod tą samą blokadą co odczyty – OCR wystartowany w trakcie rozgrzewki
+        czeka na swoją kolej.
+        """
+        def step(pct: int, msg: str) -> None:
+            if progress is not None:
+                progress(pct, msg)
 
-        for (_bbox, text, conf) in results:
-            t = normalize_text(text)
+        t0 = time.perf_counter()
+        step(0, "import easyocr")
+        importlib.import_module("easyocr")
+        step(30, "wczytywanie modelu OCR")
+        reader = self.reader
+        step(70, "próbna inferencja")
+        dummy = np.full((64, 256, 3), 255, dtype=np.uint8)
+        cv2.putText(dummy, "WA 12345", (8, 44), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+        pre = preprocess(dummy)
+        with self._call_lock:
+            reader.readtext(pre, **self._detect_kwargs(pre))
+            reader.recognize(cv2.cvtColor(dummy, cv2.COLOR_BGR2GRAY), **self._recognize_kwargs())
+        step(100, "gotowe")
+        return (time.perf_counter() - t0) * 1000.0
+
+    def read_plate(self, img_bgr: np.ndarray, use_preprocessing: Optional[bool] = None) -> OcrResult:
+        return self.result_from_raw(self.read_raw(img_bgr, use_preprocessing=use_preprocessing))
+
+    def read_raw(self, img_bgr: np.ndarray, use_preprocessing: Optional[bool] = None) -> List[RawItem]:
+        # surowe wyjście EasyOCR (pozycja, tekst, pewność) – przed filtrowaniem kandydatów
+        if use_preprocessing is None:
+            use_preprocessing = self.use_preprocessing
+
+        h, w = img_bgr.shape[:2]
+        rois = find_plate_rois(img_bgr) if self.use_locator and h * w >= LOCATE_MIN_PIXELS else []
+
+        # preprocess powiększa 2x – skala potrzebna do przeliczenia pozycji kandydatów
+        scale = 2.0 if use_preprocessing else 1.0
+        # bufory wątku: wynik preprocess żyje tylko do końca wywołania readera
+        bufs, _ = self._buffers()
+
+        results = []
+        for (x, y, rw, rh) in rois:
+            # detektor EasyOCR pominięty: każdy wycinek to jedna linia tekstu dla recognize()
+            crop = img_bgr[y:y + rh, x:x + rw]
+            img = preprocess(crop, buffers=bufs) if use_preprocessing else to_gray(crop)
+            with self._call_lock:
+                raw = self.reader.recognize(img, **self._recognize_kwargs())
+            results.extend((_norm_box(bbox, x, y, scale, w, h), text, conf) for (bbox, text, conf) in raw)
+
+        # brak ROI albo same fałszywe (napisy, kratki wlotu) bez tablicy -> cały obraz przez readtext
+        if not rois or self.result_from_raw(results).plate is None:
+            img = preprocess(img_bgr, buffers=bufs) if use_preprocessing else img_bgr
+            with self._call_lock:
+                raw = self.reader.readtext(img, **self._detect_kwargs(img))
+            results = [(_norm_box(bbox, 0, 0, scale, w, h), text, conf) for (bbox, text, conf) in raw]
+
+        return [(box, str(text), float(conf)) for (box, text, conf) in results]
+
+    def read_plates(self, images: Sequence[np.ndarray], batch_size: int = 8,
+                    use_preprocessing: Optional[bool] = None) -> List[OcrResult]:
+        """
+        Wsadowy odczyt wielu obrazów (ewaluacja offline). Wyniki w kolejności wejścia.
+        Małe obrazy idą przez readtext_batched w paczkach podobnych rozmiarów
+        (dopełnione do wspólnego kształtu we współdzielonym buforze),
+        duże – jak w read_plate – przez lokalizator ROI pojedynczo.
+        """
+        raws = self.read_plates_raw(images, batch_size=batch_size, use_preprocessing=use_preprocessing)
+        return [self.result_from_raw(raw) for raw in raws]
 
+    def read_plates_raw(self, images: Sequence[np.ndarray], batch_size: int = 8,
+                        use_preprocessing: Optional[bool] = None) -> List[List[RawItem]]:
+        if use_preprocessing is None:
+            use_preprocessing = self.use_preprocessing
+        batch_size = max(1, int(batch_size))
+
+        results: List[Optional[List[RawItem]]] = [None] * len(images)
+        batchable = []
+        for i, img in enumerate(images):
+            h, w = img.shape[:2]
+            if self.use_locator and h * w >= LOCATE_MIN_PIXELS:
+                results[i] = self.read_raw(img, use_preprocessing=use_preprocessing)
+            else:
+                batchable.append(i)
+
+        # podobne rozmiary razem -> mniej dopełnienia w paczce
+        batchable.sort(key=lambda i: images[i].shape[:2])
+        scale = 2.0 if use_preprocessing else 1.0
+
+        for start in range(0, len(batchable), batch_size):
+            idxs = batchable[start:start + batch_size]
+            batch = self._prepare_batch([images[i] for i in idxs], use_preprocessing)
+            # sloty paczki mają wspólny kształt -> jeden zestaw parametrów detektora
+            with self._call_lock:
+                outs = self.reader.readtext_batched(batch, batch_size=len(batch), **self._detect_kwargs(batch[0]))
+            for i, raw in zip(idxs, outs):
+                h, w = images[i].shape[:2]
+                results[i] = [
+                    (_norm_box(bbox, 0, 0, scale, w, h), str(text), float(conf)) for (bbox, text, conf) in raw
+                ]
+
+        return results  # type: ignore[return-value]
+
+    def _recognize_kwargs(self) -> Dict:
+        return self.profile.recognize_kwargs() if self.profile is not None else {}
+
+    def _detect_kwargs(self, img: np.ndarray) -> Dict:
+        return self.profile.readtext_kwargs(*img.shape[:2]) if self.profile is not None else {}
+
+    def _buffers(self) -> Tuple[PreprocessBuffers, Dict[str, np.ndarray]]:
+        # per wątek: PlateOcr bywa współdzielony przez kilka wątków OCR
+        tls = self._tls
+        if not hasattr(tls, "pre"):
+            tls.pre = PreprocessBuffers()
+            tls.batch = {}
+        return tls.pre, tls.batch
+
+    def _prepare_batch(self, images: Sequence[np.ndarray], use_preprocessing: bool) -> List[np.ndarray]:
+        pre_bufs, batch_bufs = self._buffers()
+        scale = 2 if use_preprocessing else 1
+        n = len(images)
+        H = max(img.shape[0] for img in images) * scale
+        W = max(img.shape[1] for img in images) * scale
+
+        # bufor paczki rośnie tylko gdy trzeba; sloty to widoki na niego
+        key = "pre" if use_preprocessing else "raw"
+        cap = batch_bufs.get(key)
+        if cap is None or cap.shape[0] < n or cap.shape[1] < H or cap.shape[2] < W:
+            shape = (max(n, cap.shape[0] if cap is not None else 0),
+                     max(H, cap.shape[1] if cap is not None else 0),
+                     max(W, cap.shape[2] if cap is not None else 0))
+            cap = np.empty(shape, dtype=np.uint8)
+            batch_bufs[key] = cap
+
+        batch = []
+        for k, img in enumerate(images):
+            slot = cap[k, :H, :W]
+            # tło dopełnienia: białe po progowaniu (znaki są czarne), czarne dla surowego obrazu
+            slot[...] = 255 if use_preprocessing else 0
+            h, w = img.shape[:2]
+            if use_preprocessing:
+                preprocess(img, buffers=pre_bufs, out=slot[:h * 2, :w * 2])
+            else:
+                # BGR / BGRA / szary -> szary wprost do slotu (EasyOCR i tak rozpoznaje na szarości)
+                if img.ndim == 3:
+                    to_gray(img, out=slot[:h, :w])
+                else:
+                    slot[:h, :w] = img
+            batch.append(slot)
+        return batch
+
+    @staticmethod
+    def result_from_raw(results: Sequence[RawItem]) -> OcrResult:
+        # filtrowanie i ocena kandydatów; osobno od OCR, żeby dało się odtwarzać z cache (evaluate_ocr)
+        texts: List[str] = []
+        kept: List[Tuple[float, Optional[Box]]] = []
+        for (box, text, conf) in results:
+            t = normalize_text(text)
             if len(t) < 6 or len(t) > 8:
                 continue
-            if not t[0].isalpha():
-                continue
             if sum(ch.isdigit() for ch in t) == 0:
                 continue
+            texts.append(t)
+            kept.append((float(conf), tuple(box) if box is not None else None))
 
-            score = float(conf)
-            if PLATE_RE.match(t):
-                candidates.append((t, score))
+        # wszystkie teksty naraz przez gramatykę tablic: naprawione podmiany + wiarygodność układu
+        candidates: List[Tuple[str, float, Optional[Box]]] = []
+        for t, (plate, like), (conf, box) in zip(texts, score_candidates(texts), kept):
+            if plate is not None:
+                # gramatyka może naprawić też pierwszy znak (8 -> B)
+                candidates.append((plate, conf * like, box))
+            elif not t[0].isalpha():
+                # bez naprawy: zegary, daty, telefony z ekranu – nie tablica
+                continue
+            elif PLATE_RE.match(t):
+                candidates.append((t, conf * REGEX_ONLY, box))
             else:
                 # dalej pokaż jako kandydata, ale „ukarany”
-                candidates.append((t, score * 0.7))
+                candidates.append((t, conf * REGEX_ONLY * 0.7, box))
 
         candidates.sort(key=lambda x: x[1], reverse=True)
+        candidates = candidates[:5]
 
-        best = candidates[0] if candidates else (None, 0.0)
-        plate = best[0] if best[0] else None
-        best_conf = best[1] if best[0] else 0.0
+        plate = candidates[0][0] if candidates else None
+        best_conf = candidates[0][1] if candidates else 0.0
 
-        return OcrResult(plate=plate, confidence=best_conf, raw_candidates=candidates[:5])
+        return OcrResult(
+            plate=plate,
+            confidence=best_conf,
+            raw_candidates=[(t, c) for t, c, _ in candidates],
+            candidate_boxes=[b for _, _, b in candidates],
+        )
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional
+
+import numpy as np
+
+
+def bgra_view(shot) -> np.ndarray:
+    """(h, w, 4) BGRA wprost na buforze zrzutu mss (shot.raw) – bez np.array(shot) i kopii."""
+    return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+
+@dataclass
+class Frame:
+    seq: int
+    t_capture: float      # time.perf_counter() w chwili zrzutu
+    img: np.ndarray       # BGRA – widok na bufor zrzutu (bgra_view), bez kopii; BGR z plików
+    changed: bool = True  # wynik FrameChangeDetector (False -> OCR można pominąć)
+    trace: Any = None     # app.telemetry.FrameTrace – czasy etapów dopisywane po drodze
+    source_index: int = 0       # numer klatki w źródle (app.sources)
+    source_t_ms: float = 0.0    # czas klatki w osi źródła (pozycja w wideo)
+    source_name: Optional[str] = None
+
+
+class QueueClosed(Exception):
+    pass
+
+
+class LatestQueue:
+    """
+    Ograniczona kolejka z polityką drop-oldest: producent nigdy nie czeka,
+    a konsument zawsze dostaje możliwie świeże elementy.
+    on_drop(stary, nowy) jest wołane pod blokadą – pozwala przenieść stan
+    (np. flagę „obraz się zmienił”) z wyrzuconej klatki na nowszą.
+    """
+
+    def __init__(self, maxsize: int = 1):
+        self.maxsize = max(1, int(maxsize))
+        self._items: Deque[Any] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item: Any, on_drop: Optional[Callable[[Any, Any], None]] = None,
+            block: bool = False) -> None:
+        # block=True: czekaj na miejsce zamiast wyrzucać (źródła plikowe – każda klatka się liczy)
+        with self._cond:
+            if self._closed:
+                raise QueueClosed()
+            while block and len(self._items) >= self.maxsize:
+                self._cond.wait()
+                if self._closed:
+                    raise QueueClosed()
+            while len(self._items) >= self.maxsize:
+                old = self._items.popleft()
+                self.dropped += 1
+                if on_drop is not None:
+                    on_drop(old, item)
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        # None po timeoucie; QueueClosed gdy kolejka zamknięta i pusta
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if self._items:
+                item = self._items.popleft()
+                self._cond.notify_all()  # zwolnione miejsce dla put(block=True)
+                return item
+            if self._closed:
+                raise QueueClosed()
+            return None
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+
+class LatestSlot:
+    """
+    Jeden element „najświeższy wygrywa” między wątkiem roboczym a wątkiem GUI.
+    put() zwraca True tylko gdy odbiorca nie ma jeszcze powiadomienia w drodze –
+    wtedy (i tylko wtedy) trzeba wysłać sygnał; kolejne put() przed take() tylko podmieniają element,
+    więc w pętli zdarzeń czeka najwyżej jeden sygnał, a nie seria starych klatek.
+    """
+
+    def __init__(self):
+        self._item: Any = None
+        self._pending = False
+        self._lock = threading.Lock()
+        self.replaced = 0  # elementy nadpisane zanim odbiorca je odebrał
+
+    def put(self, item: Any) -> bool:
+        with self._lock:
+            if self._pending:
+                self.replaced += 1
+            self._item = item
+            notify = not self._pending
+            self._pending = True
+            return notify
+
+    def take(self) -> Any:
+        with self._lock:
+            item, self._item = self._item, None
+            self._pending = False
+            return item
+
+
+class StageStats:
+    """Czas etapu: ostatni, średnia krocząca (EMA) i liczba wywołań."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.count = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, ms: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.last_ms = ms
+            self.avg_ms = ms if self.count == 1 else self.avg_ms + self.alpha * (ms - self.avg_ms)
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {"count": self.count, "last_ms": round(self.last_ms, 1), "avg_ms": round(self.avg_ms, 1)}
+
+
+class Timer:
+    # with Timer(stats): ...  -> dopisuje czas bloku do StageStats
+    def __init__(self, stats: StageStats):
+        self.stats = stats
+        self._t0 = 0.0
+
+    def __enter__(self) -> "Timer":
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stats.add((time.perf_counter() - self._t0) * 1000.0)
+
+
+class LatencyWindow:
+    """Ostatnie N pomiarów (ms) z czasem dodania: percentyle i przepustowość w oknie."""
+
+    def __init__(self, size: int = 1024):
+        self._items: Deque[tuple] = deque(maxlen=max(1, int(size)))
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, ms: float, now: Optional[float] = None) -> None:
+        with self._lock:
+            self.count += 1
+            self._items.append((time.monotonic() if now is None else now, ms))
+
+    def summary(self, rate_window_s: float = 60.0) -> Dict[str, float]:
+        now = time.monotonic()
+        with self._lock:
+            items = list(self._items)
+            count = self.count
+        values = sorted(ms for _, ms in items)
+        recent = sum(1 for t, _ in items if now - t <= rate_window_s)
+        span = min(rate_window_s, now - items[0][0]) if items else 0.0
+
+        def pct(q: float) -> float:
+            if not values:
+                return 0.0
+            return round(values[min(len(values) - 1, int(q / 100.0 * len(values)))], 1)
+
+        return {
+            "count": count,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": round(values[-1], 1) if values else 0.0,
+            "per_s": round(recent / span, 2) if span > 0 else 0.0,
+        }
@@ -1,41 +1,199 @@
 from __future__ import annotations
 
 import json
+import mmap
+import re
+import struct
+import sys
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
 
 
 DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "prefix_map_pl.json"
+# skompilowana mapa (scripts/build_prefix_table.py) – ładowana przez mmap, bez parsowania JSON
+TABLE_PATH = DATA_PATH.with_suffix(".bin")
+
+# Tablica bezpośrednio adresowana pierwszymi 3 znakami tablicy (spłaszczony trie):
+# symbol 0 = koniec/znak spoza alfabetu, 1..26 = A-Z, 27..36 = 0-9.
+# Każda komórka ma już rozstrzygnięte najdłuższe dopasowanie (3 znaki -> 2 -> litera województwa),
+# więc region_for_plate to jeden odczyt.
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+NSYM = len(ALPHABET) + 1
+NO_REGION = 0xFFFF
+_MEMO_MAX = 1 << 16
+
+MAGIC = b"PLPX"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHII")  # magic, wersja, NSYM, liczba nazw, długość tablicy
+
+_SYM = {ch: i + 1 for i, ch in enumerate(ALPHABET)}
+_SYM_LUT = np.zeros(256, dtype=np.int64)
+for _ch, _i in _SYM.items():
+    _SYM_LUT[ord(_ch)] = _i
+
+VOIVODESHIPS = (
+    "dolnośląskie", "kujawsko-pomorskie", "lubelskie", "lubuskie", "łódzkie", "małopolskie",
+    "mazowieckie", "opolskie", "podkarpackie", "podlaskie", "pomorskie", "śląskie",
+    "świętokrzyskie", "warmińsko-mazurskie", "wielkopolskie", "zachodniopomorskie",
+)
+
+# powiaty o nazwach dwuczłonowych – parser PDF zostawia z nich sam pierwszy człon („ropczycko-”)
+HYPHENATED_COUNTIES = (
+    "bieruńsko-lędziński", "czarnkowsko-trzcianecki", "golubsko-dobrzyński",
+    "kędzierzyńsko-kozielski", "ropczycko-sędziszowski", "strzelecko-drezdenecki",
+)
+
+# parser PDF ucina nazwy przeniesione do nowej linii i rozdziela pierwszą wielką literę („W arszawa”)
+_RX_SPLIT_CAPITAL = re.compile(r"\b([A-ZĄĆĘŁŃÓŚŹŻ]) (?=[a-ząćęłńóśźż])")
 
 
 def _clean_plate(s: str) -> str:
     return (s or "").upper().replace(" ", "").strip()
 
 
+def _complete(name: str, full_names: Sequence[str]) -> str:
+    # ucięta nazwa -> pełna, jeśli początek jest jednoznaczny
+    name = (name or "").strip()
+    if not name.endswith("-"):
+        return name
+    matches = [v for v in full_names if v.startswith(name.rstrip("-"))]
+    return matches[0] if len(matches) == 1 else name
+
+
+def fix_voivodeship(name: str) -> str:
+    # „kujawsko-” -> „kujawsko-pomorskie”, „zachodnio-” -> „zachodniopomorskie”
+    return _complete(name, VOIVODESHIPS)
+
+
+def fix_region(value: str) -> str:
+    # „W arszawa / kujawsko-” -> „Warszawa / kujawsko-pomorskie”
+    parts = [p.strip() for p in (value or "").split(" / ")]
+    parts[0] = _complete(_RX_SPLIT_CAPITAL.sub(r"\1", parts[0]), HYPHENATED_COUNTIES)
+    if len(parts) > 1:
+        parts[-1] = fix_voivodeship(parts[-1])
+    return " / ".join(parts)
+
+
+def _index(s0: int, s1: int, s2: int) -> int:
+    return (s0 * NSYM + s1) * NSYM + s2
+
+
+def compile_table(data: dict) -> bytes:
+    """Mapa z prefix_map_pl.json -> bajty pliku .bin (nazwy poprawiane przez fix_region/fix_voivodeship)."""
+    known = {k: fix_region(v) for k, v in (data.get("known_prefixes_optional", {}) or {}).items()}
+    voiv1 = {k: fix_voivodeship(v) for k, v in (data.get("voivodeship_by_first_letter", {}) or {}).items()}
+
+    names: List[str] = sorted(set(known.values()) | set(voiv1.values()))
+    name_id = {n: i for i, n in enumerate(names)}
+    table = np.full(NSYM ** 3, NO_REGION, dtype="<u2")
+
+    for c0 in ALPHABET:
+        base = voiv1.get(c0)
+        for c1 in [""] + list(ALPHABET):
+            two = known.get(c0 + c1) if c1 else None
+            for c2 in ([""] + list(ALPHABET)) if c1 else [""]:
+                three = known.get(c0 + c1 + c2) if c2 else None
+                region = three or two or base
+                if region is not None:
+                    table[_index(_SYM[c0], _SYM.get(c1, 0), _SYM.get(c2, 0))] = name_id[region]
+
+    blob = b""
+    offsets = [0]
+    for n in names:
+        blob += n.encode("utf-8")
+        offsets.append(len(blob))
+
+    return b"".join([
+        _HEADER.pack(MAGIC, VERSION, NSYM, len(names), table.size),
+        table.tobytes(),
+        np.asarray(offsets, dtype="<u4").tobytes(),
+        blob,
+    ])
+
+
+class PrefixTable:
+    def __init__(self, buf) -> None:
+        magic, version, nsym, n_names, n_table = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION or nsym != NSYM or n_table != NSYM ** 3:
+            raise ValueError("nieobsługiwany plik mapy prefiksów")
+        self._buf = buf  # trzyma mmap przy życiu
+        off = _HEADER.size
+        self.table = np.frombuffer(buf, dtype="<u2", count=n_table, offset=off)
+        off += 2 * n_table
+        offsets = np.frombuffer(buf, dtype="<u4", count=n_names + 1, offset=off).tolist()
+        off += 4 * (n_names + 1)
+        blob = bytes(buf[off:off + offsets[-1]])
+        self.names: List[Optional[str]] = [blob[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+        self._names_arr = np.array(self.names + [None], dtype=object)
+        # odczyt pojedynczej komórki bez narzutu numpy
+        self._cells = memoryview(buf)[_HEADER.size:_HEADER.size + 2 * n_table].cast("H") \
+            if sys.byteorder == "little" else self.table.tolist()
+        # wynik zależy tylko od 3 pierwszych znaków – pamięć podręczna po prefiksie
+        self._memo: Dict[str, Optional[str]] = {}
+
+    def lookup(self, plate: str) -> Optional[str]:
+        key = plate[:3]
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        if len(self._memo) >= _MEMO_MAX:
+            self._memo.clear()
+        region = self._memo[key] = self._lookup_cell(key)
+        return region
+
+    def _lookup_cell(self, plate: str) -> Optional[str]:
+        s0 = _SYM.get(plate[0], 0) if plate else 0
+        s1 = _SYM.get(plate[1], 0) if s0 and len(plate) > 1 else 0
+        s2 = _SYM.get(plate[2], 0) if s1 and len(plate) > 2 else 0
+        rid = self._cells[_index(s0, s1, s2)]
+        return None if rid == NO_REGION else self.names[rid]
+
+    def lookup_many(self, plates: Sequence[str]) -> List[Optional[str]]:
+        if not plates:
+            return []
+        raw = np.array([p[:3].encode("ascii", "replace") for p in plates], dtype="S3")
+        codes = raw.view(np.uint8).reshape(len(plates), 3)
+        sym = _SYM_LUT[codes]
+        # po pierwszym końcu/obcym znaku reszta też 0 – jak krótsza tablica
+        sym[:, 1] *= sym[:, 0] > 0
+        sym[:, 2] *= sym[:, 1] > 0
+        ids = self.table[(sym[:, 0] * NSYM + sym[:, 1]) * NSYM + sym[:, 2]].astype(np.int64)
+        ids[ids == NO_REGION] = len(self.names)
+        return self._names_arr[ids].tolist()
+
+
+def _map_file(path: Path):
+    with path.open("rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
 @lru_cache(maxsize=1)
-def _load() -> dict:
-    if not DATA_PATH.exists():
-        return {"voivodeship_by_first_letter": {}, "known_prefixes_optional": {}}
-    return json.loads(DATA_PATH.read_text(encoding="utf-8"))
+def _load() -> PrefixTable:
+    # .bin nowszy niż JSON -> mmap; inaczej (świeży checkout, mapa po aktualizacji) kompilacja w pamięci
+    try:
+        if TABLE_PATH.exists() and (not DATA_PATH.exists()
+                                    or TABLE_PATH.stat().st_mtime >= DATA_PATH.stat().st_mtime):
+            return PrefixTable(_map_file(TABLE_PATH))
+    except (OSError, ValueError, struct.error):
+        pass
+    data: Dict = {}
+    if DATA_PATH.exists():
+        data = json.loads(DATA_PATH.read_text(encoding="utf-8"))
+    return PrefixTable(compile_table(data))
 
 
 def region_for_plate(plate: Optional[str]) -> Optional[str]:
     p = _clean_plate(plate or "")
     if not p:
         return None
+    return _load().lookup(p)
 
-    data = _load()
-    known = data.get("known_prefixes_optional", {}) or {}
-    voiv1 = data.get("voivodeship_by_first_letter", {}) or {}
-
-    # 3 znaki (np. ERA)
-    if len(p) >= 3 and p[:3] in known:
-        return known[p[:3]]
 
-    # 2 znaki (np. KR, WA)
-    if len(p) >= 2 and p[:2] in known:
-        return known[p[:2]]
+def regions_for_plates(plates: Sequence[Optional[str]]) -> List[Optional[str]]:
+    """Wsadowo (ewaluacja offline, eksport): to samo co region_for_plate dla każdej tablicy."""
+    return _load().lookup_many([_clean_plate(p or "") for p in plates])
 
-    # fallback: 1 litera województwa (np. E -> łódzkie)
-    return voiv1.get(p[0])
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.fuzzy_index import CONFUSION_COST, OCR_CONFUSIONS
+from app.pl_prefix import ALPHABET, DATA_PATH, NSYM, _SYM, _SYM_LUT, _index
+
+# Gramatyka polskich tablic zależna od pozycji: wyróżnik (2–3 litery z mapy prefiksów),
+# potem wyróżnik pojazdu wg dozwolonych układów litera/cyfra. Każdy kandydat OCR jest
+# dopasowywany do wszystkich układów naraz (numpy): koszt to suma najtańszych podmian
+# znak -> klasa pozycji z tablic COST/REPAIR, więc mieszane pomyłki (ERAZ5TM -> ERA25TM)
+# są naprawiane bez ponawiania regexów. Wynik: pewność OCR x wiarygodność gramatyczna.
+
+# L = litera, D = cyfra; po wyróżniku 2-literowym 5 znaków, po 3-literowym 4 znaki
+PATTERNS_2 = ("DDDDD", "DDDDL", "DDDLL", "DLDDD", "DLLDD")
+PATTERNS_3 = ("LDDD", "DDLL", "DLDD", "DDDL", "DLLD", "LLDD", "LDDL")
+# litery w wyróżniku pojazdu: bez B, D, I, O, Q, Z (mylone z cyframi)
+SUFFIX_LETTERS = "ACEFGHJKLMNPRSTUVWXY"
+
+# dodatkowe pary litera/cyfra z tablic (poza OCR_CONFUSIONS z fuzzy_index) i ich koszt
+EXTRA_CONFUSIONS = (("B", "8", 0.5), ("D", "0", 0.6), ("Q", "0", 0.6), ("G", "6", 0.6),
+                    ("A", "4", 0.8), ("T", "7", 0.8), ("L", "1", 0.8), ("U", "0", 0.9))
+
+# litera spoza SUFFIX_LETTERS w wyróżniku pojazdu: możliwa (starsze / testowe wpisy), ale droższa
+# niż typowa pomyłka OCR – ERA75OM naprawia się do ERA750M, a WA9876B zostaje
+EXCLUDED_LETTER_COST = 0.45
+
+PREFIX_KNOWN = 1.0    # wyróżnik z mapy prefiksów
+PREFIX_LETTER = 0.8   # nieznany wyróżnik, ale pierwsza litera to województwo
+PREFIX_OTHER = 0.5
+REGEX_ONLY = 0.7      # pasuje tylko do PL_PLATE_RX (np. tablice indywidualne) – jak dawna kara
+
+_INF = np.float32(np.inf)
+_CLS_PREFIX, _CLS_SUFFIX_L, _CLS_DIGIT = 0, 1, 2
+_SYM2ASCII = np.frombuffer(b"?" + ALPHABET.encode("ascii"), dtype=np.uint8)
+
+
+def _char_tables() -> Tuple[np.ndarray, np.ndarray]:
+    # COST[klasa, symbol] – najtańsza zamiana znaku na znak danej klasy; REPAIR[klasa, symbol] – na jaki
+    pairs = [(a, b, CONFUSION_COST) for a, b in OCR_CONFUSIONS] + list(EXTRA_CONFUSIONS)
+    allowed = {
+        _CLS_PREFIX: set("ABCDEFGHIJKLMNOPQRSTUVWXYZ"),
+        _CLS_SUFFIX_L: set(SUFFIX_LETTERS),
+        _CLS_DIGIT: set("0123456789"),
+    }
+    cost = np.full((3, NSYM), _INF, dtype=np.float32)
+    repair = np.zeros((3, NSYM), dtype=np.uint8)
+    for cls, ok in allowed.items():
+        for ch in ALPHABET:
+            s = _SYM[ch]
+            if ch in ok:
+                cost[cls, s], repair[cls, s] = 0.0, s
+                continue
+            if cls == _CLS_SUFFIX_L and ch.isalpha():
+                cost[cls, s], repair[cls, s] = EXCLUDED_LETTER_COST, s
+            for a, b, c in pairs:
+                for src, dst in ((a, b), (b, a)):
+                    if src == ch and dst in ok and c < cost[cls, s]:
+                        cost[cls, s], repair[cls, s] = c, _SYM[dst]
+    return cost, repair
+
+
+COST, REPAIR = _char_tables()
+
+
+def _formats() -> dict:
+    """
+    długość -> tablice złożone dla wszystkich układów tej długości (F układów, n pozycji):
+      like[F*n*NSYM]   – exp(-koszt) podmiany znaku na pozycji (płasko, do np.take),
+      repair[F*n*NSYM] – znak po podmianie,
+      base[F, n]       – początek wiersza (układ, pozycja) w powyższych,
+      weights[F, 3]    – wagi 3 pierwszych symboli do indeksu wyróżnika (0 dla 3. znaku przy 2-literowym).
+    """
+    by_len: dict = {}
+    for plen, patterns in ((2, PATTERNS_2), (3, PATTERNS_3)):
+        for pat in patterns:
+            cls = [_CLS_PREFIX] * plen + [_CLS_DIGIT if c == "D" else _CLS_SUFFIX_L for c in pat]
+            by_len.setdefault(len(cls), []).append((cls, plen))
+    out = {}
+    for n, fmts in by_len.items():
+        cls = np.array([c for c, _ in fmts], dtype=np.int64)  # [F, n]
+        out[n] = {
+            "like": np.exp(-COST[cls]).astype(np.float32).ravel(),
+            "repair": REPAIR[cls].ravel(),
+            "base": (np.arange(len(fmts) * n, dtype=np.int64) * NSYM).reshape(len(fmts), n),
+            "weights": np.array([[NSYM * NSYM, NSYM, 1 if plen == 3 else 0] for _, plen in fmts], dtype=np.int64),
+        }
+    return out
+
+
+FORMATS = _formats()
+_MEMO_MAX = 1 << 14
+_memo: Dict[str, Tuple[Optional[str], float]] = {}
+
+
+@lru_cache(maxsize=1)
+def _prefix_factor() -> np.ndarray:
+    # [NSYM**3] -> PREFIX_KNOWN (wyróżnik 2/3-literowy z mapy) / PREFIX_LETTER (litera województwa) / PREFIX_OTHER
+    factor = np.full(NSYM ** 3, PREFIX_OTHER, dtype=np.float32)
+    data: dict = {}
+    if DATA_PATH.exists():
+        data = json.loads(DATA_PATH.read_text(encoding="utf-8"))
+    for k in (data.get("voivodeship_by_first_letter") or {}):
+        if k in _SYM:
+            s0 = _SYM[k]
+            factor[s0 * NSYM * NSYM:(s0 + 1) * NSYM * NSYM] = PREFIX_LETTER
+    for k in (data.get("known_prefixes_optional") or {}):
+        if k.isalpha() and 2 <= len(k) <= 3 and all(ch in _SYM for ch in k):
+            factor[_index(_SYM[k[0]], _SYM[k[1]], _SYM[k[2]] if len(k) == 3 else 0)] = PREFIX_KNOWN
+    return factor
+
+
+def _encode(texts: Sequence[str], n: int) -> np.ndarray:
+    raw = np.frombuffer("".join(texts).encode("ascii", "replace"), dtype=np.uint8)
+    return _SYM_LUT[raw.reshape(len(texts), n)]
+
+
+def score_candidates(texts: Sequence[str]) -> List[Tuple[Optional[str], float]]:
+    """
+    Dla każdego (znormalizowanego) tekstu: (naprawiona tablica, wiarygodność 0..1) albo (None, 0.0).
+    Wiarygodność = exp(-koszt podmian) x czynnik wyróżnika (z mapy / litera województwa / inny).
+    Nowe teksty tej samej długości liczone jedną operacją na tablicach [kandydat, układ, pozycja];
+    powtarzające się (ta sama tablica z kolejnych klatek) – z pamięci podręcznej.
+    """
+    out: List[Tuple[Optional[str], float]] = [_memo.get(t, (None, -1.0)) for t in texts]
+    pending: Dict[int, List[int]] = {}
+    for i, t in enumerate(texts):
+        if out[i][1] < 0:
+            if len(t) in FORMATS and t.isascii():
+                pending.setdefault(len(t), []).append(i)
+            else:
+                out[i] = (None, 0.0)
+    if not pending:
+        return out
+
+    factor = _prefix_factor()
+    if len(_memo) >= _MEMO_MAX:
+        _memo.clear()
+    for n, idx in pending.items():
+        f = FORMATS[n]
+        flat = f["base"][None, :, :] + _encode([texts[i] for i in idx], n)[:, None, :]  # [N, F, n]
+        like = np.take(f["like"], flat).prod(axis=2)                                     # [N, F]
+        fixed = np.take(f["repair"], flat)                                                # [N, F, n]
+        like *= factor[(fixed[:, :, :3] * f["weights"][None, :, :]).sum(axis=2)]
+        best = like.argmax(axis=1)
+        rows = np.arange(len(idx))
+        best_like = like[rows, best].tolist()
+        strings = _SYM2ASCII[fixed[rows, best]]
+        for k, i in enumerate(idx):
+            res = (strings[k].tobytes().decode("ascii"), best_like[k]) if best_like[k] > 0 else (None, 0.0)
+            out[i] = _memo[texts[i]] = res
+    return out
+
+
+def rank_plates(candidates: Sequence[Tuple[str, float]],
+                fallback_rx=None) -> List[Tuple[str, float, int]]:
+    """
+    (tekst, pewność OCR) -> [(tablica, pewność x wiarygodność, indeks kandydata)] malejąco.
+    fallback_rx: teksty spoza gramatyki, ale pasujące do regexu, dostają REGEX_ONLY.
+    Ta sama tablica z kilku kandydatów – zostaje najlepszy wynik.
+    """
+    texts = [t for t, _ in candidates]
+    best = {}
+    for i, ((plate, like), (text, conf)) in enumerate(zip(score_candidates(texts), candidates)):
+        if plate is None and fallback_rx is not None and fallback_rx.match(text):
+            plate, like = text, REGEX_ONLY
+        if plate is None:
+            continue
+        key = (float(conf) * like, like)  # przy równej pewności (np. same teksty bez conf) – gramatyka
+        if plate not in best or key > best[plate][0]:
+            best[plate] = (key, i)
+    ranked = sorted(best.items(), key=lambda kv: kv[1][0], reverse=True)
+    return [(p, key[0], i) for p, (key, i) in ranked]
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, Any, List
+
+import numpy as np
+import cv2
+
+from app.ocr import Box, PlateOcr, to_gray
+from app.plate_grammar import rank_plates
+from app.scheduler import VariantScheduler, Strategy, strategy_name
+
+# Kaskada OCR bez zależności od Qt: używana przez OcrWorker (wątek GUI)
+# i przez procesy robocze przy wielu obszarach (app/multi_region.py).
+
+
+# wariant 2x upscale tylko dla małych zaznaczeń (preprocess i tak robi 2x)
+UPSCALE_BELOW_PX = 200
+
+# warianty obrazu w kolejności domyślnej: oryginał, bez czarnych marginesów, 2x
+VARIANTS = ("orig", "crop", "up2x")
+
+# Regex dla PL (1-3 litery + 4-5 znaków alnum) => np. ERA75TM, KR1234A
+PL_PLATE_RX = re.compile(r"^[A-Z]{1,3}[A-Z0-9]{4,5}$")
+
+
+def normalize_plate_text(s: str) -> str:
+    s = (s or "").upper()
+    s = re.sub(r"[^A-Z0-9]", "", s)  # usuń spacje i znaki specjalne
+    return s
+
+
+def best_plate_from_candidates(candidates: Any) -> Optional[str]:
+    """
+    Próbuje wyciągnąć sensowną tablicę z listy kandydatów (zależnie od tego jak PlateOcr to zwraca).
+    candidates może być np: [("ERA75TM", 0.9), ("ERA75TN", 0.7)] albo ["ERA75TM", ...]
+    """
+    if not candidates:
+        return None
+
+    parsed = []
+    for c in candidates:
+        if isinstance(c, (list, tuple)) and len(c) >= 1:
+            txt = str(c[0])
+            conf = 0.0
+            if len(c) >= 2:
+                try:
+                    conf = float(c[1])
+                except Exception:
+                    conf = 0.0
+        else:
+            txt = str(c)
+            conf = 0.0
+        parsed.append((txt, conf))
+
+    # gramatyka tablic na wszystkich kandydatach naraz (podmiany litera/cyfra zależne od pozycji),
+    # ranking: pewność OCR x wiarygodność; teksty spoza gramatyki – tylko przez regex
+    ranked = rank_plates([(normalize_plate_text(t), c) for t, c in parsed], fallback_rx=PL_PLATE_RX)
+    return ranked[0][0] if ranked else None
+
+
+def crop_non_black(img_bgr: np.ndarray) -> np.ndarray:
+    """
+    Obcina czarne marginesy (typowe gdy zaznaczasz obszar z okna „Zdjęcia” z czarnym tłem).
+    """
+    try:
+        gray = to_gray(img_bgr)
+        mask = (gray > 12).astype(np.uint8) * 255
+        if cv2.countNonZero(mask) < 0.10 * mask.size:
+            return img_bgr  # za mało treści, nie tnij
+
+        x, y, w, h = cv2.boundingRect(mask)
+        # nie tnij jeśli wyjdzie mikro wycinek
+        if w * h < 0.30 * (img_bgr.shape[0] * img_bgr.shape[1]):
+            return img_bgr
+        return img_bgr[y:y + h, x:x + w]
+    except Exception:
+        return img_bgr
+
+
+@dataclass
+class Recognition:
+    plate: Optional[str]
+    confidence: float
+    candidates: List[Tuple[str, float]] = field(default_factory=list)
+    strategy: Optional[str] = None  # np. "crop/pre" – która próba dała wynik
+    boxes: List[Optional[Box]] = field(default_factory=list)  # równoległe do candidates
+    # telemetria: próby (strategia, ms) w kolejności, wyjście progiem 0.70, filtr kandydatów
+    attempts: List[Tuple[str, float]] = field(default_factory=list)
+    early_exit: bool = False
+    postprocess_ms: float = 0.0
+
+
+class PlateRecognizer:
+    """
+    Kaskada wariant obrazu x preprocessing, kolejność z VariantScheduler,
+    wczesne wyjście przy pewności >= 0.70 i budżet czasu na klatkę.
+    Bezpieczna przy wywołaniach z kilku wątków (scheduler pod blokadą).
+    """
+
+    def __init__(self, ocr: Optional[PlateOcr] = None, prefer_pre: bool = True,
+                 frame_budget_ms: float = 1200.0):
+        # jeden OCR (jeden zestaw wag), preprocessing wybierany per wywołanie
+        self._ocr = ocr or PlateOcr(gpu=False)
+        self._prefer_pre = bool(prefer_pre)
+        self.frame_budget_ms = float(frame_budget_ms)
+        self._lock = threading.Lock()
+        self._scheduler = VariantScheduler(self._default_order())
+
+    def configure(self, prefer_pre: bool, frame_budget_ms: float = 1200.0) -> None:
+        self._prefer_pre = bool(prefer_pre)
+        self.frame_budget_ms = float(frame_budget_ms)
+        with self._lock:
+            self._scheduler.reset(self._default_order())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return self._scheduler.stats()
+
+    def _default_order(self) -> list:
+        # stara kaskada: na każdym wariancie primary -> secondary
+        primary = "pre" if self._prefer_pre else "raw"
+        secondary = "raw" if self._prefer_pre else "pre"
+        return [(v, e) for v in VARIANTS for e in (primary, secondary)]
+
+    def _try_one(self, img_bgr: np.ndarray, use_pre: bool) -> Tuple[Optional[str], float, Any, list, float]:
+        raw = self._ocr.read_raw(img_bgr, use_preprocessing=use_pre)
+        t_post = time.perf_counter()
+        res = self._ocr.result_from_raw(raw)
+        plate = normalize_plate_text(res.plate) if getattr(res, "plate", None) else None
+        conf = float(getattr(res, "confidence", 0.0) or 0.0)
+        candidates = getattr(res, "raw_candidates", []) or []
+        boxes = getattr(res, "candidate_boxes", []) or []
+
+        if not plate:
+            plate = best_plate_from_candidates(candidates)
+
+        # jeśli plate jest, ale ma śmieci – wywal
+        if plate and not PL_PLATE_RX.match(plate):
+            plate = None
+
+        return plate, conf, candidates, boxes, (time.perf_counter() - t_post) * 1000.0
+
+    @staticmethod
+    def make_variants(img_bgr: np.ndarray) -> dict:
+        # przygotuj warianty obrazu (screen z okna zdjęcia bywa mały / z marginesami)
+        variants = {"orig": img_bgr}
+
+        v1 = crop_non_black(img_bgr)
+        if v1 is not img_bgr:
+            variants["crop"] = v1
+
+        if min(v1.shape[:2]) < UPSCALE_BELOW_PX:
+            variants["up2x"] = cv2.resize(v1, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
+        return variants
+
+    def run(self, img_bgr: np.ndarray, max_attempts: Optional[int] = None) -> Recognition:
+        # max_attempts: limit prób (np. 1 gdy tracker ma już stabilny ślad i tylko go podtrzymujemy)
+        variants = self.make_variants(img_bgr)
+        with self._lock:
+            order = self._scheduler.order(variants.keys())
+        if max_attempts is not None:
+            order = order[:max(1, max_attempts)]
+
+        best_plate = None
+        best_conf = -1.0
+        best_cand = []
+        best_boxes = []
+        winner: Optional[Strategy] = None
+        attempts = []
+        post_ms = 0.0
+        early_exit = False
+
+        t_frame = time.perf_counter()
+        for strategy in order:
+            # budżet czasu na klatkę: lepiej oddać wynik niż blokować kolejne klatki
+            if attempts and (time.perf_counter() - t_frame) * 1000.0 >= self.frame_budget_ms:
+                break
+
+            variant, engine = strategy
+            t0 = time.perf_counter()
+            p, c, cand, boxes, ms = self._try_one(variants[variant], engine == "pre")
+            attempts.append((strategy, (time.perf_counter() - t0) * 1000.0))
+            post_ms += ms
+            if not best_cand and cand:
+                # kandydaci z pierwszej niepustej próby trafią do trackera nawet bez tablicy
+                best_cand, best_boxes = cand, boxes
+
+            if p and c >= best_conf:
+                best_plate, best_conf, best_cand, best_boxes = p, c, cand, boxes
+                winner = strategy
+                if best_conf >= 0.70:
+                    early_exit = len(attempts) < len(order)
+                    break  # wystarczająco dobrze
+
+        # jeśli nie znaleziono nic, ale mamy kandydatów – spróbuj jeszcze wydłubać „best” bez patrzenia na conf
+        if not best_plate:
+            # weź kandydatów z pierwszej niepustej próby (jeśli były)
+            t_post = time.perf_counter()
+            maybe = best_plate_from_candidates(best_cand)
+            if maybe and PL_PLATE_RX.match(maybe):
+                best_plate = maybe
+                best_conf = max(best_conf, 0.50)
+            post_ms += (time.perf_counter() - t_post) * 1000.0
+
+        with self._lock:
+            self._scheduler.record_frame(attempts, winner)
+
+        return Recognition(
+            plate=best_plate,
+            confidence=float(best_conf if best_conf >= 0 else 0.0),
+            candidates=best_cand,
+            strategy=strategy_name(winner) if winner else None,
+            boxes=best_boxes,
+            attempts=[(strategy_name(st), ms) for st, ms in attempts],
+            early_exit=early_exit,
+            postprocess_ms=post_ms,
+        )
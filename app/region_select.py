@@ -7,10 +7,14 @@ from PyQt6.QtWidgets import QWidget
 
 class RegionSelectOverlay(QWidget):
     regionSelected = pyqtSignal(QRect)   # globalny QRect (współrzędne ekranu)
+    regionsSelected = pyqtSignal(list)   # tryb multi: lista globalnych QRect (R1, R2, ...)
     cancelled = pyqtSignal()
 
-    def __init__(self):
+    def __init__(self, multi: bool = False):
         super().__init__()
+        # multi: kolejne prostokąty dokładane do listy, Enter = zatwierdź
+        self._multi = multi
+        self._selections: list[QRect] = []
 
         # Zawsze na wierzchu + narzędziowe okno (żeby nie robić bałaganu w taskbar)
         self.setWindowFlags(
@@ -54,10 +58,23 @@ class RegionSelectOverlay(QWidget):
         self.close()
         self.deleteLater()
 
+    def _emit_many_and_close(self) -> None:
+        self.regionsSelected.emit(list(self._selections))
+        self.close()
+        self.deleteLater()
+
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Escape:
             self._cancel_and_close()
             return
+        if self._multi and event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+            if self._selections:
+                self._emit_many_and_close()
+            return
+        if self._multi and event.key() == Qt.Key.Key_Backspace and self._selections:
+            self._selections.pop()
+            self.update()
+            return
         super().keyPressEvent(event)
 
     def mousePressEvent(self, event):
@@ -100,6 +117,14 @@ class RegionSelectOverlay(QWidget):
             sel.height(),
         )
 
+        if self._multi:
+            self._selections.append(global_rect)
+            self._origin_local = None
+            self._current_local = None
+            self._selection_local = QRect()
+            self.update()
+            return
+
         self._emit_and_close(global_rect)
 
     def paintEvent(self, _):
@@ -111,7 +136,21 @@ class RegionSelectOverlay(QWidget):
 
         # instrukcja
         p.setPen(QColor(255, 255, 255, 220))
-        p.drawText(20, 30, "Zaznacz obszar LPM. Esc / PPM = anuluj.")
+        if self._multi:
+            p.drawText(20, 30, "Zaznaczaj obszary LPM. Enter = zatwierdź, Backspace = cofnij, Esc / PPM = anuluj.")
+        else:
+            p.drawText(20, 30, "Zaznacz obszar LPM. Esc / PPM = anuluj.")
+
+        # już zatwierdzone obszary (tryb multi), we współrzędnych lokalnych overlaya
+        ox, oy = self.geometry().x(), self.geometry().y()
+        for i, g in enumerate(self._selections, start=1):
+            r = QRect(g.x() - ox, g.y() - oy, g.width(), g.height())
+            p.fillRect(r, QColor(0, 0, 0, 40))
+            pen = QPen(QColor(0, 255, 120, 255))
+            pen.setWidth(2)
+            p.setPen(pen)
+            p.drawRect(r)
+            p.drawText(r.x() + 4, r.y() + 16, f"R{i}")
 
         if not self._selection_local.isNull() and self._selection_local.width() > 0:
             # wycięcie (jaśniejszy obszar)
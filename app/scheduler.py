@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# strategia = (wariant obrazu, silnik), np. ("crop", "pre")
+Strategy = Tuple[str, str]
+
+
+def strategy_name(s: Strategy) -> str:
+    return f"{s[0]}/{s[1]}"
+
+
+class _Track:
+    def __init__(self, window: int):
+        # (wygrała?, czas ms) dla ostatnich prób tej strategii
+        self.recent: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self.attempts = 0
+        self.wins = 0
+
+    def hit_rate(self) -> float:
+        if not self.recent:
+            return 0.0
+        return sum(1 for won, _ in self.recent if won) / len(self.recent)
+
+    def avg_ms(self) -> float:
+        if not self.recent:
+            return 0.0
+        return sum(ms for _, ms in self.recent) / len(self.recent)
+
+
+class VariantScheduler:
+    """
+    Kolejność prób wariant+silnik w kaskadzie OCR na podstawie ostatnich klatek:
+    najpierw strategie, które najczęściej dawały zaakceptowaną tablicę,
+    strategie bez żadnej wygranej (po min_trials próbach) są pomijane,
+    a co explore_every klatek wracają na koniec kolejki, żeby mogły się „odkuć”.
+    """
+
+    def __init__(self, default_order: Sequence[Strategy], window: int = 30,
+                 min_trials: int = 8, explore_every: int = 25):
+        self.window = window
+        self.min_trials = min_trials
+        self.explore_every = explore_every
+        self._frame = 0
+        self.reset(default_order)
+
+    def reset(self, default_order: Sequence[Strategy]) -> None:
+        self._default = list(default_order)
+        self._tracks: Dict[Strategy, _Track] = {s: _Track(self.window) for s in self._default}
+        self._frame = 0
+
+    def _dropped(self, s: Strategy) -> bool:
+        t = self._tracks[s]
+        return len(t.recent) >= self.min_trials and not any(won for won, _ in t.recent)
+
+    def order(self, available: Optional[Iterable[str]] = None) -> List[Strategy]:
+        self._frame += 1
+        allowed = set(available) if available is not None else None
+        cands = [s for s in self._default if allowed is None or s[0] in allowed]
+
+        rank = {s: i for i, s in enumerate(self._default)}
+        # najlepsza skuteczność najpierw, przy remisie szybsza, potem kolejność domyślna
+        active = sorted(
+            (s for s in cands if not self._dropped(s)),
+            key=lambda s: (-self._tracks[s].hit_rate(), self._tracks[s].avg_ms(), rank[s]),
+        )
+        if self._frame % self.explore_every == 0 or not active:
+            active += [s for s in cands if s not in active]
+        return active
+
+    def record_frame(self, attempts: Sequence[Tuple[Strategy, float]], winner: Optional[Strategy]) -> None:
+        # wygrana = strategia, której wynik został ostatecznie zaakceptowany w tej klatce
+        for s, elapsed_ms in attempts:
+            t = self._tracks[s]
+            won = s == winner
+            t.recent.append((won, elapsed_ms))
+            t.attempts += 1
+            if won:
+                t.wins += 1
+
+    def stats(self) -> Dict[str, dict]:
+        out = {}
+        for s in self._default:
+            t = self._tracks[s]
+            out[strategy_name(s)] = {
+                "attempts": t.attempts,
+                "wins": t.wins,
+                "hit_rate": round(t.hit_rate(), 3),
+                "avg_ms": round(t.avg_ms(), 1),
+                "active": not self._dropped(s),
+            }
+        return out
@@ -0,0 +1,408 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Mapping, Optional
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+from app.db import fuzzy_match, lookup_plate
+from app.ocr import OcrResult, PlateOcr
+from app.pipeline import LatencyWindow
+from app.pl_prefix import region_for_plate
+from app.recognizer import PL_PLATE_RX, best_plate_from_candidates, normalize_plate_text
+
+# Tryb bez GUI: POST /recognize -> JSON (tablica, region, wpis z bazy).
+#   python -m app.service --port 8765
+#   python -m app.service --unix /tmp/plates.sock
+# Obraz jako plik (PNG/JPEG, dowolny Content-Type) albo surowy bufor BGR/BGRA:
+#   Content-Type: application/x-raw-bgr + nagłówki X-Width, X-Height (opcjonalnie X-Channels).
+
+MAX_BODY_BYTES = 32 * 1024 * 1024
+RAW_CONTENT_TYPE = "application/x-raw-bgr"
+
+
+class BadRequest(Exception):
+    pass
+
+
+def decode_image(body: bytes, content_type: str, headers: Mapping[str, str]) -> np.ndarray:
+    # headers: najlepiej self.headers handlera (HTTPMessage) – nazwy nagłówków bez rozróżniania wielkości liter
+    if not body:
+        raise BadRequest("pusty obraz")
+
+    if content_type.split(";")[0].strip().lower() == RAW_CONTENT_TYPE:
+        try:
+            w = int(headers.get("X-Width", ""))
+            h = int(headers.get("X-Height", ""))
+            c = int(headers.get("X-Channels", "3") or 3)
+        except ValueError:
+            raise BadRequest("X-Width/X-Height/X-Channels muszą być liczbami")
+        if w <= 0 or h <= 0 or c not in (1, 3, 4) or len(body) != w * h * c:
+            raise BadRequest(f"rozmiar bufora {len(body)} != {w}x{h}x{c}")
+        img = np.frombuffer(body, dtype=np.uint8).reshape(h, w, c) if c > 1 else \
+            np.frombuffer(body, dtype=np.uint8).reshape(h, w)
+        if c == 4:
+            return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+        if c == 1:
+            return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        return img
+
+    img = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise BadRequest("nie udało się zdekodować obrazu")
+    return img
+
+
+@dataclass
+class Job:
+    img_bgr: np.ndarray
+    t_enqueue: float = field(default_factory=time.perf_counter)
+    future: Future = field(default_factory=Future)
+
+
+class Overloaded(Exception):
+    pass
+
+
+class RecognitionService:
+    """
+    Pula wątków OCR nad ograniczoną kolejką zadań.
+    Każdy wątek bierze pierwsze zadanie, dobiera do batch_size kolejnych
+    (czekając najwyżej batch_wait_ms) i puszcza je razem przez PlateOcr.read_plates.
+    Pełna kolejka -> Overloaded (HTTP 503), zamiast rosnącego opóźnienia.
+    """
+
+    def __init__(self, workers: int = 2, batch_size: int = 8, batch_wait_ms: float = 5.0,
+                 queue_size: int = 64, use_preprocessing: bool = True, gpu: bool = False):
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.batch_wait_s = max(0.0, batch_wait_ms) / 1000.0
+        self.ocr = PlateOcr(use_preprocessing=use_preprocessing, gpu=gpu)
+        self._jobs: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._threads: List[threading.Thread] = []
+        self.ready = threading.Event()
+        self.warmup_ms = 0.0
+        self.warmup_error: Optional[str] = None  # nieudane rozgrzewanie -> /health 503 na stałe
+        self._warmup_done = threading.Event()   # rozgrzewanie skończone (udane albo nie) – zwalnia wątki OCR
+
+        self.t_started = time.monotonic()
+        self.lat_total = LatencyWindow()
+        self.lat_queue = LatencyWindow()
+        self.lat_ocr = LatencyWindow()
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_images = 0
+
+    # --- cykl życia ---
+
+    def start(self, warmup: bool = True) -> None:
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker_loop, name=f"ocr-service-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        if warmup:
+            threading.Thread(target=self._warmup, name="ocr-warmup", daemon=True).start()
+        else:
+            self.ready.set()
+            self._warmup_done.set()
+
+    def _warmup(self) -> None:
+        # wagi EasyOCR + pierwsze wywołanie (alokacje torch) jeszcze przed ruchem
+        t0 = time.perf_counter()
+        dummy = np.full((64, 256, 3), 255, dtype=np.uint8)
+        cv2.putText(dummy, "WA 12345", (8, 44), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+        try:
+            self.ocr.read_plates([dummy, dummy], batch_size=2)
+        except Exception as e:  # brak wag, OOM, ... – serwis zostaje niegotowy
+            self.warmup_error = f"{type(e).__name__}: {e}"
+            print(f"[ERR] rozgrzewanie OCR nieudane: {self.warmup_error}", file=sys.stderr)
+            return
+        finally:
+            self.warmup_ms = (time.perf_counter() - t0) * 1000.0
+            self._warmup_done.set()
+        self.ready.set()
+
+    def shutdown(self) -> None:
+        # wątki po nieudanym rozgrzewaniu już wyszły – sygnał stopu tylko dla żywych
+        for t in self._threads:
+            if t.is_alive():
+                self._jobs.put(None)
+        for t in self._threads:
+            t.join(timeout=5.0)
+        self._threads.clear()
+
+    # --- zadania ---
+
+    def submit(self, img_bgr: np.ndarray) -> Future:
+        if self.warmup_error is not None:
+            # OCR niedostępny na stałe – nie zapełniaj kolejki
+            raise Overloaded()
+        job = Job(img_bgr=img_bgr)
+        try:
+            self._jobs.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise Overloaded()
+        if self.warmup_error is not None:
+            # rozgrzewanie padło między sprawdzeniem a put – wątki OCR mogły już wyjść
+            self._fail_queued()
+        return job.future
+
+    def _fail_queued(self) -> None:
+        # zadania przyjęte przed błędem rozgrzewania dostają błąd od razu, a nie timeout po stronie klienta
+        err = RuntimeError(f"OCR niedostępny: {self.warmup_error}")
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            if job is not None:
+                with self._lock:
+                    self.errors += 1
+                job.future.set_exception(err)
+
+    def _take_batch(self) -> Optional[List[Job]]:
+        first = self._jobs.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.batch_wait_s
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                job = self._jobs.get(timeout=timeout) if timeout > 0 else self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._jobs.put(None)  # sygnał stopu dla tego samego wątku w następnym obrocie
+                break
+            batch.append(job)
+        return batch
+
+    def _worker_loop(self) -> None:
+        self._warmup_done.wait()
+        if self.warmup_error is not None:
+            self._fail_queued()
+            return
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            t0 = time.perf_counter()
+            for job in batch:
+                self.lat_queue.add((t0 - job.t_enqueue) * 1000.0)
+            try:
+                results = self.ocr.read_plates([j.img_bgr for j in batch], batch_size=self.batch_size)
+            except Exception as e:
+                with self._lock:
+                    self.errors += len(batch)
+                for job in batch:
+                    job.future.set_exception(e)
+                continue
+            ocr_ms = (time.perf_counter() - t0) * 1000.0
+            with self._lock:
+                self.batches += 1
+                self.batched_images += len(batch)
+            for job, res in zip(batch, results):
+                self.lat_ocr.add(ocr_ms / len(batch))
+                job.future.set_result(self._enrich(res, ocr_ms, len(batch)))
+                self.lat_total.add((time.perf_counter() - job.t_enqueue) * 1000.0)
+
+    @staticmethod
+    def _enrich(res: OcrResult, batch_ms: float, batch_len: int) -> Dict[str, Any]:
+        plate = normalize_plate_text(res.plate) if res.plate else None
+        if not plate:
+            plate = best_plate_from_candidates(res.raw_candidates)
+        if plate and not PL_PLATE_RX.match(plate):
+            plate = None
+        info, similar = lookup_plate(plate) if plate else (None, [])
+        return {
+            "plate": plate,
+            "confidence": round(float(res.confidence or 0.0), 4),
+            "region": region_for_plate(plate) if plate else None,
+            "db_info": info,  # tylko dokładne trafienie
+            "db_fuzzy": fuzzy_match(similar) if info is None else None,
+            "db_similar": [[k, d] for k, d in similar],
+            "candidates": [[t, round(float(c), 4)] for t, c in res.raw_candidates],
+            "batch_size": batch_len,
+            "batch_ms": round(batch_ms, 1),
+        }
+
+    # --- stan ---
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {
+                "rejected": self.rejected,
+                "errors": self.errors,
+                "batches": self.batches,
+                "avg_batch": round(self.batched_images / self.batches, 2) if self.batches else 0.0,
+            }
+        return {
+            "ready": self.ready.is_set(),
+            "warmup_error": self.warmup_error,
+            "uptime_s": round(time.monotonic() - self.t_started, 1),
+            "warmup_ms": round(self.warmup_ms, 1),
+            "workers": self.workers,
+            "queue": {"size": self._jobs.qsize(), "max": self._jobs.maxsize},
+            **counters,
+            "latency": {
+                "total": self.lat_total.summary(),
+                "queue_wait": self.lat_queue.summary(),
+                "ocr_per_image": self.lat_ocr.summary(),
+            },
+        }
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "PlateService/1.0"
+    service: RecognitionService = None  # type: ignore[assignment]  # ustawiane w make_server
+    result_timeout_s = 30.0
+    quiet = False
+
+    def address_string(self) -> str:
+        # gniazdo unix nie ma (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) and self.client_address else "unix"
+
+    def log_message(self, fmt: str, *args) -> None:
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, code: int, payload: Any, extra_headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (extra_headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            ready = self.service.ready.is_set()
+            error = self.service.warmup_error
+            if error is not None:
+                self._send_json(503, {"status": "error", "error": error})
+            else:
+                self._send_json(200 if ready else 503, {"status": "ok" if ready else "warming_up"})
+        elif path == "/metrics":
+            self._send_json(200, self.service.metrics())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/recognize":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {"error": f"obraz > {MAX_BODY_BYTES} B"})
+            return
+        body = self.rfile.read(length)
+
+        try:
+            img = decode_image(body, self.headers.get("Content-Type", ""), self.headers)
+        except BadRequest as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        t0 = time.perf_counter()
+        try:
+            fut = self.service.submit(img)
+        except Overloaded:
+            if self.service.warmup_error is not None:
+                self._send_json(503, {"error": f"OCR niedostępny: {self.service.warmup_error}"})
+            else:
+                self._send_json(503, {"error": "kolejka pełna"}, {"Retry-After": "1"})
+            return
+
+        try:
+            result = fut.result(timeout=self.result_timeout_s)
+        except Exception as e:  # timeout lub błąd OCR
+            if self.service.warmup_error is not None:
+                self._send_json(503, {"error": f"OCR niedostępny: {self.service.warmup_error}"})
+            else:
+                self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        result["elapsed_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+        if "raw" not in parse_qs(url.query):
+            result.pop("candidates", None)
+        self._send_json(200, result)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def make_server(service: RecognitionService, host: str = "127.0.0.1", port: int = 8765,
+                unix_path: Optional[str] = None, quiet: bool = False) -> socketserver.BaseServer:
+    handler = type("BoundServiceHandler", (ServiceHandler,), {"service": service, "quiet": quiet})
+    if unix_path:
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("gniazda unix niedostępne na tej platformie")
+        if os.path.exists(unix_path):
+            os.unlink(unix_path)
+        return ThreadingUnixHTTPServer(unix_path, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Rozpoznawanie tablic bez GUI (HTTP)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--unix", help="ścieżka gniazda unix zamiast TCP")
+    ap.add_argument("--workers", type=int, default=2, help="wątki OCR (wspólny reader EasyOCR)")
+    ap.add_argument("--batch-size", type=int, default=8)
+    ap.add_argument("--batch-wait-ms", type=float, default=5.0, help="ile czekać na dobranie paczki")
+    ap.add_argument("--queue-size", type=int, default=64, help="powyżej -> 503")
+    ap.add_argument("--no-pre", action="store_true", help="bez preprocessingu")
+    ap.add_argument("--gpu", action="store_true")
+    ap.add_argument("--quiet", action="store_true", help="bez logu żądań")
+    args = ap.parse_args(argv)
+
+    service = RecognitionService(
+        workers=args.workers, batch_size=args.batch_size, batch_wait_ms=args.batch_wait_ms,
+        queue_size=args.queue_size, use_preprocessing=not args.no_pre, gpu=args.gpu,
+    )
+    service.start(warmup=True)
+    server = make_server(service, args.host, args.port, args.unix, quiet=args.quiet)
+    where = args.unix or f"http://{args.host}:{args.port}"
+    print(f"[OK] nasłuch: {where} (rozgrzewanie readera w tle, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.db import DATA_DIR
+
+# Dziennik przejazdów: powtarzające się odczyty tej samej tablicy (co klatkę, dopóki jest na ekranie)
+# zwijane w jedno „widzenie” (pierwszy/ostatni raz, najlepsza pewność, region, tag z bazy).
+# observe() tylko wrzuca zdarzenie do kolejki – scalanie i zapis (jedna transakcja na paczkę)
+# robi wątek pisarza, więc wątek OCR/GUI nigdy nie czeka na dysk.
+#   ANPR_SIGHTINGS=data/sightings.sqlite python run.py    # inna ścieżka; "0" wyłącza
+
+SIGHTINGS_PATH = DATA_DIR / "sightings.sqlite"
+SIGHTINGS_ENV = "ANPR_SIGHTINGS"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sightings (
+    id        INTEGER PRIMARY KEY,
+    plate     TEXT NOT NULL,
+    source    TEXT NOT NULL DEFAULT '',
+    first_ms  REAL NOT NULL,
+    last_ms   REAL NOT NULL,
+    best_conf REAL NOT NULL DEFAULT 0,
+    region    TEXT NOT NULL DEFAULT '',
+    tag       TEXT NOT NULL DEFAULT '',
+    hits      INTEGER NOT NULL DEFAULT 1
+)
+"""
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS sightings_plate ON sightings (plate, first_ms)",
+    "CREATE INDEX IF NOT EXISTS sightings_time ON sightings (first_ms)",
+    "CREATE INDEX IF NOT EXISTS sightings_tag ON sightings (tag, first_ms)",
+    # MAX(last_ms - first_ms) z indeksu zamiast skanu tabeli – czytane przy każdym zapytaniu po czasie
+    "CREATE INDEX IF NOT EXISTS sightings_span ON sightings (last_ms - first_ms)",
+)
+
+# id nadaje SQLite przy INSERT – kilku pisarzy na jednym pliku (GUI + recognize_source) się nie nadpisuje
+SQL_INSERT = (
+    "INSERT INTO sightings (plate, source, first_ms, last_ms, best_conf, region, tag, hits) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+SQL_UPDATE = "UPDATE sightings SET last_ms = ?, best_conf = ?, region = ?, tag = ?, hits = ? WHERE id = ?"
+SQL_MAX_SPAN = "SELECT COALESCE(MAX(last_ms - first_ms), 0) FROM sightings"
+SQL_COLUMNS = "id, plate, source, first_ms, last_ms, best_conf, region, tag, hits"
+
+
+@dataclass
+class Sighting:
+    id: Optional[int]  # None, dopóki pisarz nie wstawi wiersza
+    plate: str
+    source: str       # "screen", nazwa obszaru (R1) albo pliku
+    first_ms: float   # ms epoki (pliki: początek nagrania + czas klatki w nagraniu)
+    last_ms: float
+    best_conf: float
+    region: str
+    tag: str
+    hits: int = 1     # ile odczytów zwinięto w to widzenie
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+# zdarzenie z wątku OCR/GUI: (plate, conf, t_ms, region, tag, source)
+_Event = Tuple[str, float, float, str, str, str]
+
+
+class SightingLog:
+    """
+    Zapis tylko przez dopisywanie/aktualizację otwartych widzeń. Ta sama tablica z tego samego źródła
+    widziana ponownie w ciągu gap_ms przedłuża widzenie; po dłuższej przerwie powstaje nowe.
+    Zapytania (query) z dowolnego wątku – osobne połączenie na wątek, WAL.
+    """
+
+    def __init__(self, path: Path = SIGHTINGS_PATH, gap_ms: float = 5000.0,
+                 flush_interval_s: float = 0.5, batch_size: int = 256):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.gap_ms = float(gap_ms)
+        self.flush_interval_s = float(flush_interval_s)
+        self.batch_size = max(1, int(batch_size))
+
+        self._tls = threading.local()
+        self._conns: List[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        conn = self._conn()
+        with conn:
+            conn.execute(SCHEMA)
+            for sql in INDEXES:
+                conn.execute(sql)
+
+        self._q: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._open: Dict[Tuple[str, str], Sighting] = {}  # (source, plate) -> widzenie; tylko wątek pisarza
+        self._flushed = threading.Condition()
+        self._written_seq = 0
+        self._queued_seq = 0
+        self._seq_lock = threading.Lock()
+        self.events = 0
+        self.batches = 0
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="sightings-writer", daemon=True)
+        self._writer.start()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0, cached_statements=32)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._tls.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    # --- strona producenta (wątek OCR / GUI) ---
+
+    def observe(self, plate: Optional[str], conf: float, t_ms: Optional[float] = None,
+                region: Optional[str] = None, tag: Optional[str] = None, source: str = "") -> None:
+        if not plate or self._closed:
+            return
+        if t_ms is None:
+            t_ms = time.time() * 1000.0
+        with self._seq_lock:
+            self._queued_seq += 1
+        self._q.put((plate, float(conf), float(t_ms), region or "", tag or "", source or ""))
+
+    # --- wątek pisarza ---
+
+    def _apply(self, ev: _Event, dirty: Dict[int, Sighting]) -> None:
+        # dirty: id(obiektu) -> widzenie; nowe nie mają jeszcze id z bazy
+        plate, conf, t_ms, region, tag, source = ev
+        key = (source, plate)
+        s = self._open.get(key)
+        if s is not None and t_ms - s.last_ms <= self.gap_ms and t_ms >= s.first_ms:
+            s.last_ms = max(s.last_ms, t_ms)
+            s.hits += 1
+            if conf > s.best_conf:
+                s.best_conf = conf
+                s.region = region or s.region
+            s.tag = tag or s.tag
+        else:
+            s = Sighting(None, plate, source, t_ms, t_ms, conf, region, tag)
+            self._open[key] = s
+        dirty[id(s)] = s
+
+    def _expire(self, now_by_source: Dict[str, float]) -> None:
+        # zamknięte widzenia nie muszą wisieć w pamięci (są już zapisane)
+        for key in [k for k, s in self._open.items()
+                    if now_by_source.get(k[0], s.last_ms) - s.last_ms > self.gap_ms]:
+            del self._open[key]
+
+    def _write(self, dirty: Dict[int, Sighting]) -> None:
+        conn = self._conn()
+        new = [s for s in dirty.values() if s.id is None]
+        ids = []
+        with conn:
+            for s in new:
+                cur = conn.execute(SQL_INSERT, (s.plate, s.source, s.first_ms, s.last_ms,
+                                                s.best_conf, s.region, s.tag, s.hits))
+                ids.append(cur.lastrowid)
+            conn.executemany(SQL_UPDATE, [
+                (s.last_ms, s.best_conf, s.region, s.tag, s.hits, s.id)
+                for s in dirty.values() if s.id is not None
+            ])
+        # id dopiero po zatwierdzeniu transakcji – po wycofanej następna paczka wstawi wiersz ponownie
+        for s, rid in zip(new, ids):
+            s.id = rid
+        self.batches += 1
+
+    def _write_loop(self) -> None:
+        while True:
+            ev = self._q.get()
+            events: List[_Event] = [] if ev is None else [ev]
+            stop = ev is None
+            # paczka: zdarzenia z najbliższych flush_interval_s (do batch_size) – jedna transakcja
+            deadline = time.monotonic() + self.flush_interval_s
+            while not stop and len(events) < self.batch_size:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                try:
+                    ev = self._q.get(timeout=left)
+                except queue.Empty:
+                    break
+                if ev is None:
+                    stop = True
+                else:
+                    events.append(ev)
+
+            if events:
+                dirty: Dict[int, Sighting] = {}
+                latest: Dict[str, float] = {}
+                for ev in events:
+                    self._apply(ev, dirty)
+                    latest[ev[5]] = max(latest.get(ev[5], ev[2]), ev[2])
+                try:
+                    self._write(dirty)
+                except sqlite3.Error as e:
+                    print(f"[SIGHTINGS] zapis nieudany: {e!r}")
+                self._expire(latest)
+                self.events += len(events)
+                with self._flushed:
+                    self._written_seq += len(events)
+                    self._flushed.notify_all()
+            if stop:
+                return
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        # czekaj, aż wszystko przekazane do observe() trafi do bazy (np. przed zapytaniem w testach/CLI)
+        with self._seq_lock:
+            target = self._queued_seq
+        deadline = time.monotonic() + timeout
+        with self._flushed:
+            while self._written_seq < target:
+                left = deadline - time.monotonic()
+                if left <= 0 or not self._writer.is_alive():
+                    return False
+                self._flushed.wait(left)
+        return True
+
+    # --- zapytania ---
+
+    def query(self, plate: Optional[str] = None, since_ms: Optional[float] = None,
+              until_ms: Optional[float] = None, tag: Optional[str] = None,
+              source: Optional[str] = None, limit: int = 1000) -> List[Sighting]:
+        """
+        Widzenia nakładające się na [since_ms, until_ms], najnowsze pierwsze.
+        plate / tag trafiają w indeksy (plate, first_ms) / (tag, first_ms), sam czas – w (first_ms).
+        """
+        conn = self._conn()
+        where, args = [], []
+        if plate:
+            where.append("plate = ?")
+            args.append(plate)
+        if tag is not None:
+            where.append("tag = ?")
+            args.append(tag)
+        if source is not None:
+            where.append("source = ?")
+            args.append(source)
+        if until_ms is not None:
+            where.append("first_ms <= ?")
+            args.append(float(until_ms))
+        if since_ms is not None:
+            where.append("last_ms >= ?")
+            args.append(float(since_ms))
+            # widzenie nie trwa dłużej niż najdłuższe zapisane – ogranicza skan indeksu czasu od dołu;
+            # czytane z bazy przy każdym zapytaniu, bo piszą też inne procesy (GUI + recognize_source)
+            max_span_ms = float(conn.execute(SQL_MAX_SPAN).fetchone()[0])
+            where.append("first_ms >= ?")
+            args.append(float(since_ms) - max_span_ms)
+        sql = f"SELECT {SQL_COLUMNS} FROM sightings"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY first_ms DESC LIMIT ?"
+        args.append(int(limit))
+        return [Sighting(*row) for row in conn.execute(sql, args)]
+
+    def count(self) -> int:
+        return int(self._conn().execute("SELECT COUNT(*) FROM sightings").fetchone()[0])
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(None)  # obudź pisarza; dopisze resztę kolejki i skończy
+        self._writer.join(timeout=5.0)
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._tls = threading.local()
+
+
+def parse_time(s: str) -> float:
+    # liczba -> ms epoki; inaczej data ISO w czasie lokalnym
+    try:
+        return float(s)
+    except ValueError:
+        return datetime.fromisoformat(s).timestamp() * 1000.0
+
+
+def open_sighting_log(path: Optional[str] = None, **kw) -> Optional[SightingLog]:
+    # ścieżka z argumentu albo ANPR_SIGHTINGS; "0"/"off" -> bez dziennika
+    spec = path if path is not None else os.environ.get(SIGHTINGS_ENV, "")
+    if spec.strip().lower() in ("0", "off", "no", "false"):
+        return None
+    return SightingLog(Path(spec) if spec else SIGHTINGS_PATH, **kw)
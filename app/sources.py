@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.pipeline import bgra_view
+
+# Źródła klatek dla OcrWorker: zrzut ekranu (mss), plik wideo (cv2.VideoCapture)
+# i katalog obrazów. Pliki są czytane strumieniowo – jedna zdekodowana klatka naraz.
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".webp", ".tif", ".tiff")
+VIDEO_EXTS = (".mp4", ".avi", ".mkv", ".mov", ".m4v", ".webm", ".mpg", ".mpeg", ".wmv")
+
+Rect = Tuple[int, int, int, int]  # x, y, w, h
+
+
+@dataclass
+class SourceFrame:
+    img: np.ndarray       # BGRA (ekran) albo BGR (pliki)
+    index: int            # numer klatki w źródle (po seek/stride – numer oryginalny)
+    t_ms: float           # czas w osi źródła: pozycja w wideo / index / fps / czas od startu zrzutów
+    name: Optional[str] = None  # nazwa pliku (katalog obrazów)
+
+
+class FrameSource:
+    """
+    read() -> SourceFrame albo None na końcu źródła. Źródła plikowe: stride (co która klatka),
+    seek(index) / seek_ms(ms). realtime=True – klatki powstają na żywo, tempo wyznacza interval_ms;
+    realtime=False – tempo wyznacza konsument (speed w OcrWorker), a kolejka nie gubi klatek.
+    """
+
+    realtime = False
+    fps: float = 0.0
+    frame_count: Optional[int] = None
+    start_ms: float = 0.0  # źródła plikowe: pozycja startowa ustawiana przy open()
+
+    def open(self) -> "FrameSource":
+        return self
+
+    def close(self) -> None:
+        pass
+
+    def read(self) -> Optional[SourceFrame]:
+        raise NotImplementedError
+
+    def seek(self, index: int) -> None:
+        raise ValueError(f"{type(self).__name__}: źródło bez przewijania")
+
+    def seek_ms(self, ms: float) -> None:
+        if self.fps <= 0:
+            raise ValueError(f"{type(self).__name__}: nieznany fps – użyj seek(index)")
+        self.seek(int(round(ms * self.fps / 1000.0)))
+
+    def describe(self) -> str:
+        return type(self).__name__
+
+    def __enter__(self) -> "FrameSource":
+        return self.open()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ScreenSource(FrameSource):
+    """Zrzut obszaru ekranu: widok BGRA na bufor mss (bez kopii)."""
+
+    realtime = True
+
+    def __init__(self, rect: Rect):
+        self.rect = rect
+        self._sct = None
+        self._index = 0
+        self._t0 = 0.0
+
+    def open(self) -> "ScreenSource":
+        from mss import mss  # dopiero przy starcie – nie wydłuża uruchomienia okna
+        self._sct = mss()
+        self._index = 0
+        self._t0 = time.perf_counter()
+        return self
+
+    def close(self) -> None:
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+
+    def read(self) -> Optional[SourceFrame]:
+        x, y, w, h = self.rect
+        img = bgra_view(self._sct.grab({"left": x, "top": y, "width": w, "height": h}))
+        frame = SourceFrame(img, self._index, (time.perf_counter() - self._t0) * 1000.0)
+        self._index += 1
+        return frame
+
+    def describe(self) -> str:
+        return "screen {}x{}+{}+{}".format(self.rect[2], self.rect[3], self.rect[0], self.rect[1])
+
+
+class VideoFileSource(FrameSource):
+    """
+    Plik wideo przez cv2.VideoCapture. Przy stride > 1 pominięte klatki są tylko grab()
+    (demultipleksacja bez konwersji do BGR), dekodowana do obrazu jest co stride-ta.
+    """
+
+    def __init__(self, path: str, stride: int = 1, start_ms: float = 0.0):
+        self.path = str(path)
+        self.stride = max(1, int(stride))
+        self.start_ms = float(start_ms)
+        self._cap: Optional[cv2.VideoCapture] = None
+        self._next = 0  # indeks klatki, którą zwróci najbliższy read()
+
+    def open(self) -> "VideoFileSource":
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            raise OSError(f"nie można otworzyć wideo: {self.path}")
+        self._cap = cap
+        self.fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+        n = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self.frame_count = n if n > 0 else None
+        self._next = 0
+        if self.start_ms > 0:
+            self.seek_ms(self.start_ms)
+        return self
+
+    def close(self) -> None:
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def read(self) -> Optional[SourceFrame]:
+        ok, img = self._cap.read()
+        if not ok:
+            return None
+        index = self._next
+        pos_ms = self._cap.get(cv2.CAP_PROP_POS_MSEC)
+        t_ms = index * 1000.0 / self.fps if self.fps > 0 else float(pos_ms or 0.0)
+        for _ in range(self.stride - 1):
+            if not self._cap.grab():
+                break
+        self._next = index + self.stride
+        return SourceFrame(img, index, t_ms)
+
+    def seek(self, index: int) -> None:
+        index = max(0, int(index))
+        self._cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        self._next = index
+
+    def describe(self) -> str:
+        return f"video {Path(self.path).name} ({self.fps:.1f} fps, stride {self.stride})"
+
+
+class ImageDirSource(FrameSource):
+    """Katalog obrazów w kolejności nazw; czas klatki = index / fps (domyślnie 1 obraz = 1 s)."""
+
+    def __init__(self, path: str, stride: int = 1, fps: float = 1.0, start_ms: float = 0.0):
+        self.path = Path(path)
+        self.stride = max(1, int(stride))
+        self.fps = float(fps)
+        self.start_ms = float(start_ms)
+        self._files: List[Path] = []
+        self._next = 0
+
+    def open(self) -> "ImageDirSource":
+        self._files = sorted(p for p in self.path.iterdir() if p.suffix.lower() in IMAGE_EXTS)
+        self.frame_count = len(self._files)
+        self._next = 0
+        if self.start_ms > 0:
+            self.seek_ms(self.start_ms)
+        return self
+
+    def read(self) -> Optional[SourceFrame]:
+        while self._next < len(self._files):
+            index = self._next
+            self._next += self.stride
+            p = self._files[index]
+            img = cv2.imread(str(p), cv2.IMREAD_COLOR)
+            if img is None:
+                continue  # uszkodzony / nie-obraz – pomiń
+            return SourceFrame(img, index, index * 1000.0 / self.fps, name=p.name)
+        return None
+
+    def seek(self, index: int) -> None:
+        self._next = max(0, int(index))
+
+    def describe(self) -> str:
+        return f"images {self.path} ({self.frame_count} plików, stride {self.stride})"
+
+
+def open_source(spec: str, stride: int = 1, fps: float = 1.0, start_ms: float = 0.0) -> FrameSource:
+    """
+    "screen:x,y,w,h" -> ScreenSource, katalog -> ImageDirSource, plik -> VideoFileSource.
+    Zwraca nieotwarte źródło (otwiera je konsument: with source: ...).
+    """
+    if spec.startswith("screen:"):
+        x, y, w, h = (int(v) for v in spec[len("screen:"):].split(","))
+        return ScreenSource((x, y, w, h))
+    p = Path(spec)
+    if p.is_dir():
+        return ImageDirSource(str(p), stride=stride, fps=fps, start_ms=start_ms)
+    if not p.exists():
+        raise FileNotFoundError(spec)
+    return VideoFileSource(str(p), stride=stride, start_ms=start_ms)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.pipeline import LatencyWindow
+
+# Telemetria per klatka: czasy etapów (grab, convert, ocr:<wariant>/<silnik>, postprocess,
+# region, db, emit, ...) w oknach LatencyWindow + liczniki. Opcjonalnie ślad JSONL
+# (jedna klatka w linii) – do odtworzenia w benchmarks/bench_trace_replay.py.
+#   ANPR_TRACE=trace.jsonl python run.py
+
+TRACE_ENV = "ANPR_TRACE"
+
+# kolejność w panelu; etapy spoza listy (np. ocr:crop/raw) na końcu, alfabetycznie
+STAGE_ORDER = ("grab", "change", "convert", "ocr", "postprocess", "track", "region", "db", "emit", "total")
+
+
+class FrameTrace:
+    """Pomiary jednej klatki, zbierane po drodze przez kolejne wątki potoku."""
+
+    __slots__ = ("seq", "t_wall", "stages", "attempts", "early_exit", "skipped", "hold",
+                 "plate", "frame_plate", "conf")
+
+    def __init__(self, seq: int = 0):
+        self.seq = seq
+        self.t_wall = time.time()
+        self.stages: Dict[str, float] = {}
+        self.attempts: List[Tuple[str, float]] = []  # (wariant/silnik, ms) w kolejności prób
+        self.early_exit = False  # kaskada przerwana progiem pewności
+        self.skipped = False     # klatka bez zmian – bez OCR
+        self.hold = False        # tracker podtrzymał tablicę, której ta klatka nie odczytała
+        self.plate: Optional[str] = None
+        self.frame_plate: Optional[str] = None
+        self.conf = 0.0
+
+    def add(self, stage: str, ms: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + ms
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "seq": self.seq,
+            "t": round(self.t_wall, 3),
+            "stages": {k: round(v, 3) for k, v in self.stages.items()},
+            "attempts": [[s, round(ms, 3)] for s, ms in self.attempts],
+            "early_exit": self.early_exit,
+            "skipped": self.skipped,
+            "hold": self.hold,
+            "plate": self.plate,
+            "frame_plate": self.frame_plate,
+            "conf": round(self.conf, 4),
+        }
+
+
+class Telemetry:
+    """
+    Okna ostatnich `size` pomiarów na etap (p50/p95/p99) + liczniki od startu.
+    record() wołane z jednego wątku (emit), snapshot() z dowolnego (GUI).
+    """
+
+    def __init__(self, size: int = 1024, trace_path: Optional[str] = None):
+        self.size = size
+        self._stages: Dict[str, LatencyWindow] = {}
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        self._trace = None
+        self.trace_path = trace_path
+        if trace_path:
+            # buforowanie liniowe: ślad da się czytać w trakcie działania
+            self._trace = Path(trace_path).open("a", encoding="utf-8", buffering=1)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def _window(self, stage: str) -> LatencyWindow:
+        w = self._stages.get(stage)
+        if w is None:
+            w = self._stages[stage] = LatencyWindow(self.size)
+        return w
+
+    def record(self, ft: FrameTrace) -> None:
+        with self._lock:
+            for stage, ms in ft.stages.items():
+                self._window(stage).add(ms)
+            for strategy, ms in ft.attempts:
+                self._window("ocr:" + strategy).add(ms)
+            self._count("frames")
+            self._count("frames_skipped", int(ft.skipped))
+            self._count("variants_tried", len(ft.attempts))
+            self._count("early_exits", int(ft.early_exit))
+            self._count("hold_activations", int(ft.hold))
+        if self._trace is not None:
+            self._trace.write(json.dumps(ft.as_dict(), ensure_ascii=False) + "\n")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = dict(self._stages)
+            counters = dict(self.counters)
+        order = {name: i for i, name in enumerate(STAGE_ORDER)}
+        names = sorted(stages, key=lambda n: (order.get(n, len(order)), n))
+        return {
+            "stages": {n: stages[n].summary() for n in names},
+            "counters": counters,
+        }
+
+    def close(self) -> None:
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+
+def read_trace(path: str):
+    # generator słowników FrameTrace.as_dict() ze śladu JSONL
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def replay(path: str, size: int = 1 << 20) -> Telemetry:
+    # ślad -> Telemetry z tymi samymi oknami i licznikami co na żywo
+    tel = Telemetry(size=size)
+    for rec in read_trace(path):
+        ft = FrameTrace(rec.get("seq", 0))
+        ft.stages = dict(rec.get("stages", {}))
+        ft.attempts = [(s, ms) for s, ms in rec.get("attempts", [])]
+        ft.early_exit = bool(rec.get("early_exit"))
+        ft.skipped = bool(rec.get("skipped"))
+        ft.hold = bool(rec.get("hold"))
+        tel.record(ft)
+    return tel
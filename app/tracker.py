@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.ocr import Box
+from app.recognizer import PL_PLATE_RX, Recognition
+
+# Śledzenie tablic w czasie: kandydaci z kolejnych klatek (OcrResult.raw_candidates)
+# grupowani w ślady po odległości edycyjnej i pozycji, głosowanie per znak
+# ważone pewnością OCR. Zastępuje HOLD pojedynczej tablicy.
+
+
+def edit_distance(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+@dataclass
+class Track:
+    track_id: int
+    first_seen: float
+    last_seen: float
+    center: Optional[Tuple[float, float]] = None
+    hits: int = 0  # klatki, w których ślad dostał głos
+    # długość -> pozycja -> znak -> suma wag
+    votes: Dict[int, List[Dict[str, float]]] = field(default_factory=dict)
+    length_weight: Dict[int, float] = field(default_factory=lambda: defaultdict(float))
+    _last_frame: int = -1
+
+    def _dominant_length(self) -> Optional[int]:
+        if not self.length_weight:
+            return None
+        return max(self.length_weight.items(), key=lambda kv: kv[1])[0]
+
+    def consensus(self) -> Tuple[Optional[str], float]:
+        n = self._dominant_length()
+        if n is None:
+            return None, 0.0
+        chars = []
+        agreement = 0.0
+        for pos in self.votes[n]:
+            total = sum(pos.values())
+            ch, w = max(pos.items(), key=lambda kv: kv[1])
+            chars.append(ch)
+            agreement += w / total if total > 0 else 0.0
+        # pewność = zgodność głosów x średnia waga obserwacji tej długości
+        obs = max(1, self.hits)
+        mean_conf = min(1.0, self.length_weight[n] / obs)
+        return "".join(chars), round(agreement / n * mean_conf, 4)
+
+    def _align(self, text: str) -> Optional[Tuple[int, str]]:
+        # odczyt krótszy/dłuższy o 1 znak (ucięty brzeg, śmieć z ramki) -> dopasuj do dominującej długości
+        n = self._dominant_length()
+        if n is None or len(text) == n:
+            return len(text), text
+        if abs(len(text) - n) != 1:
+            return None
+        ref, _ = self.consensus()
+        if len(text) < n:
+            # wstaw „dziurę” tam, gdzie najmniej niezgodności
+            options = [text[:i] + "?" + text[i:] for i in range(n)]
+        else:
+            options = [text[:i] + text[i + 1:] for i in range(len(text))]
+        best = min(options, key=lambda o: sum(1 for a, b in zip(o, ref) if a != b and a != "?"))
+        return n, best
+
+    def add(self, text: str, weight: float, box: Optional[Box], now_ms: float, frame_no: int) -> None:
+        aligned = self._align(text)
+        if aligned is None:
+            n, text = len(text), text
+        else:
+            n, text = aligned
+
+        slots = self.votes.setdefault(n, [defaultdict(float) for _ in range(n)])
+        for pos, ch in enumerate(text):
+            if ch != "?":
+                slots[pos][ch] += weight
+        self.length_weight[n] += weight
+
+        if frame_no != self._last_frame:
+            self.hits += 1
+            self._last_frame = frame_no
+        self.last_seen = now_ms
+        if box is not None:
+            self.center = (box[0], box[1])
+
+
+class PlateTracker:
+    """
+    update() raz na klatkę OCR; zwraca konsensus najlepszego aktywnego śladu.
+    Ślad żyje ttl_ms od ostatniego głosu – to przejmuje rolę dawnego HOLD.
+    """
+
+    def __init__(self, ttl_ms: float = 1500, max_dist: int = 2, max_move: float = 0.35,
+                 stable_hits: int = 3):
+        self.ttl_ms = ttl_ms
+        self.max_dist = max_dist
+        self.max_move = max_move        # maks. przesunięcie środka (ułamek kadru) w obrębie śladu
+        self.stable_hits = stable_hits  # od ilu klatek ślad uznajemy za stabilny
+        self.reset()
+
+    def reset(self) -> None:
+        self._tracks: List[Track] = []
+        self._next_id = 1
+        self._frame_no = 0
+
+    def _match(self, text: str, box: Optional[Box]) -> Optional[Track]:
+        best, best_d = None, None
+        for t in self._tracks:
+            ref, _ = t.consensus()
+            if ref is None:
+                continue
+            d = edit_distance(text, ref)
+            if d > self.max_dist:
+                continue
+            if box is not None and t.center is not None:
+                if abs(box[0] - t.center[0]) > self.max_move or abs(box[1] - t.center[1]) > self.max_move:
+                    continue
+            if best_d is None or d < best_d:
+                best, best_d = t, d
+        return best
+
+    def _expire(self, now_ms: float) -> None:
+        self._tracks = [t for t in self._tracks if now_ms - t.last_seen <= self.ttl_ms]
+
+    def update(self, candidates: Sequence[Tuple[str, float]], boxes: Sequence[Optional[Box]],
+               now_ms: float) -> Tuple[Optional[str], float]:
+        self._frame_no += 1
+        self._expire(now_ms)
+
+        for i, (text, conf) in enumerate(candidates):
+            if not text or conf <= 0:
+                continue
+            box = boxes[i] if i < len(boxes) else None
+            track = self._match(text, box)
+            if track is None:
+                track = Track(track_id=self._next_id, first_seen=now_ms, last_seen=now_ms)
+                self._next_id += 1
+                self._tracks.append(track)
+            track.add(text, float(conf), box, now_ms, self._frame_no)
+
+        return self.best()
+
+    def update_from(self, rec: Recognition, now_ms: float) -> Tuple[Optional[str], float]:
+        cands = list(rec.candidates)
+        boxes = list(rec.boxes)
+        # tablica naprawiona w kaskadzie (zamiany O/0 itd.) też głosuje
+        if rec.plate and all(t != rec.plate for t, _ in cands):
+            cands.append((rec.plate, rec.confidence))
+            boxes.append(None)
+        return self.update(cands, boxes, now_ms)
+
+    def _best_track(self) -> Optional[Track]:
+        best, best_score = None, 0.0
+        for t in self._tracks:
+            plate, conf = t.consensus()
+            if not plate or not PL_PLATE_RX.match(plate):
+                continue
+            # świeże i długo potwierdzane ślady wygrywają z jednorazowym szumem
+            score = conf * t.hits
+            if score > best_score:
+                best, best_score = t, score
+        return best
+
+    def best(self) -> Tuple[Optional[str], float]:
+        t = self._best_track()
+        return t.consensus() if t else (None, 0.0)
+
+    def is_stable(self) -> bool:
+        t = self._best_track()
+        return t is not None and t.hits >= self.stable_hits
+
+    def active_tracks(self) -> List[dict]:
+        out = []
+        for t in self._tracks:
+            plate, conf = t.consensus()
+            out.append({"id": t.track_id, "plate": plate, "confidence": conf, "hits": t.hits})
+        return out
@@ -0,0 +1 @@
+# benchmarki wydajności (uruchamiane: python -m benchmarks.<nazwa>)
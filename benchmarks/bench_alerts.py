@@ -0,0 +1,110 @@
+"""
+Lista obserwowanych (app/alerts.py): czas oceny jednej tablicy przy 10 / 1k / 10k reguł
+– skompilowany RuleSet vs liniowy przegląd reguł (jak pętla po liście w GUI) – oraz czas kompilacji.
+
+    python -m benchmarks.bench_alerts
+    python -m benchmarks.bench_alerts --rules 100 5000 50000 -n 20000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.common import dump_json
+from benchmarks.synth import _prefixes, random_plate
+
+from app.alerts import Rule, RuleSet
+from app.fuzzy_index import weighted_distance
+from app.pl_prefix import region_for_plate
+
+TAGS = ["nieoznakowani", "VIP", "DEMO", "TEST", "flota"]
+VOIVS = ["mazowieckie", "małopolskie", "śląskie", "pomorskie", "łódzkie"]
+
+
+def make_rules(n: int, rng: random.Random, prefixes: List[str]) -> List[Rule]:
+    # głównie konkretne tablice (w tym z tolerancją), kilka tagów/prefiksów/województw
+    rules = []
+    for i in range(n):
+        k = rng.random()
+        if k < 0.80:
+            rules.append(Rule(f"r{i}", "plate", random_plate(rng, prefixes)))
+        elif k < 0.95:
+            rules.append(Rule(f"r{i}", "plate", random_plate(rng, prefixes), max_dist=1.0))
+        elif k < 0.97:
+            rules.append(Rule(f"r{i}", "tag", rng.choice(TAGS)))
+        elif k < 0.99:
+            rules.append(Rule(f"r{i}", "prefix", rng.choice(prefixes)))
+        else:
+            rules.append(Rule(f"r{i}", "voivodeship", rng.choice(VOIVS)))
+    return rules
+
+
+def naive_match(rules: List[Rule], plate: str, tag: Optional[str]) -> List[Rule]:
+    region = region_for_plate(plate) or ""
+    out = []
+    for r in rules:
+        if r.kind == "plate":
+            ok = plate == r.value or (r.max_dist > 0 and weighted_distance(plate, r.value, r.max_dist) <= r.max_dist)
+        elif r.kind == "tag":
+            ok = tag is not None and tag.casefold() == r.value.casefold()
+        elif r.kind == "prefix":
+            ok = plate.startswith(r.value)
+        else:
+            ok = region.endswith("/ " + r.value) or region == r.value
+        if ok:
+            out.append(r)
+    return out
+
+
+def _per_call_us(fn, queries) -> float:
+    t0 = time.perf_counter()
+    for plate, tag in queries:
+        fn(plate, tag)
+    return (time.perf_counter() - t0) / len(queries) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rules", type=int, nargs="+", default=[10, 1000, 10000])
+    ap.add_argument("-n", type=int, default=5000, help="ocenianych odczytów")
+    ap.add_argument("--naive-max", type=int, default=10000, help="powyżej – bez wariantu liniowego")
+    ap.add_argument("--seed", type=int, default=9)
+    args = ap.parse_args()
+
+    prefixes = _prefixes()
+    results: List[Dict] = []
+    for n_rules in args.rules:
+        rng = random.Random(args.seed)
+        rules = make_rules(n_rules, rng, prefixes)
+        # co dziesiąty odczyt to tablica z listy (część z pomyłką OCR)
+        listed = [r.value for r in rules if r.kind == "plate"] or ["KR12345"]
+        queries = []
+        for i in range(args.n):
+            plate = rng.choice(listed) if i % 10 == 0 else random_plate(rng, prefixes)
+            if i % 20 == 0:
+                plate = plate.replace("0", "O", 1)
+            queries.append((plate, rng.choice(TAGS + [None] * 5)))
+
+        t0 = time.perf_counter()
+        rs = RuleSet(rules)
+        compile_ms = (time.perf_counter() - t0) * 1000.0
+        rs.match(*queries[0])  # rozgrzanie indeksu / mapy prefiksów
+
+        row = {
+            "rules": n_rules,
+            "compile_ms": round(compile_ms, 2),
+            "compiled_us": round(_per_call_us(lambda p, t: rs.match(p, tag=t), queries), 2),
+            "matches_per_1k": round(1000.0 * sum(bool(rs.match(p, tag=t)) for p, t in queries) / len(queries), 1),
+        }
+        if n_rules <= args.naive_max:
+            sub = queries[: max(100, len(queries) // max(1, n_rules // 100))]
+            row["naive_us"] = round(_per_call_us(lambda p, t: naive_match(rules, p, t), sub), 2)
+        results.append(row)
+
+    dump_json({"benchmark": "alerts", "n": args.n, "results": results})
+
+
+if __name__ == "__main__":
+    main()
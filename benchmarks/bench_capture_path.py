@@ -0,0 +1,135 @@
+"""
+Ścieżka zrzut -> OCR -> podgląd bez EasyOCR: alokacje (tracemalloc) i czas na klatkę.
+
+  legacy: np.array(shot) + BGRA2BGR + preprocess bez buforów + podgląd przez cvtColor RGB i QPixmap.scaled
+  direct: bgra_view (np.frombuffer) + BGRA2GRAY do bufora + preprocess z buforami + podgląd z BGRA (RGB32)
+
+    python -m benchmarks.bench_capture_path
+    python -m benchmarks.bench_capture_path --size 1280 720 -n 100 --no-preview
+
+Zrzut symulowany przez mss.screenshot.ScreenShot na świeżym bytearray (jak sct.grab).
+tracemalloc widzi bufory numpy/cv2; pamięć po stronie Qt (QImage/QPixmap) nie jest liczona.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import cv2
+import numpy as np
+from mss.screenshot import ScreenShot
+
+from benchmarks.common import dump_json, latency_summary
+
+from app.ocr import PreprocessBuffers, preprocess, to_gray
+from app.pipeline import bgra_view
+
+
+def _grab(template: bytes, w: int, h: int) -> ScreenShot:
+    return ScreenShot.from_size(bytearray(template), w, h)
+
+
+_qt_app = None  # QPixmap wymaga żywej QApplication
+
+
+def make_paths(preview: bool) -> Dict[str, Callable]:
+    global _qt_app
+    if preview:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtCore import QSize, Qt
+        from PyQt6.QtGui import QImage, QPixmap
+        from PyQt6.QtWidgets import QApplication
+        from app.gui import frame_to_pixmap
+        _qt_app = QApplication.instance() or QApplication([])
+        size = QSize(640, 260)
+
+        def legacy_preview(img_bgr):
+            img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
+            h, w, ch = img_rgb.shape
+            qimg = QImage(img_rgb.data, w, h, ch * w, QImage.Format.Format_RGB888)
+            return QPixmap.fromImage(qimg).scaled(size, Qt.AspectRatioMode.KeepAspectRatio,
+                                                  Qt.TransformationMode.SmoothTransformation)
+
+        def direct_preview(img_bgra):
+            return frame_to_pixmap(img_bgra, size)
+    else:
+        legacy_preview = direct_preview = None
+
+    def legacy(shot):
+        img_bgr = cv2.cvtColor(np.array(shot), cv2.COLOR_BGRA2BGR)
+        thr = preprocess(img_bgr)
+        if legacy_preview:
+            legacy_preview(img_bgr)
+        return thr
+
+    bufs = PreprocessBuffers()
+
+    def direct(shot):
+        img = bgra_view(shot)
+        gray = to_gray(img, out=bufs.get("frame_gray", img.shape[:2]))
+        thr = preprocess(gray, buffers=bufs)
+        if direct_preview:
+            direct_preview(img)
+        return thr
+
+    return {"legacy": legacy, "direct": direct}
+
+
+def measure(fn: Callable, template: bytes, w: int, h: int, n: int, warmup: int = 3) -> Dict:
+    for _ in range(warmup):
+        fn(_grab(template, w, h))  # bufory direct alokowane tu, nie w pomiarze
+
+    tracemalloc.start()
+    peaks: List[int] = []
+    times: List[float] = []
+    for _ in range(n):
+        shot = _grab(template, w, h)  # bufor zrzutu – taki sam koszt w obu wariantach, poza pomiarem
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        fn(shot)
+        times.append((time.perf_counter() - t0) * 1000.0)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        del shot
+    tracemalloc.stop()
+
+    frame_bytes = w * h * 4
+    peak = float(np.median(peaks))
+    return {
+        "latency": latency_summary(times),
+        "alloc_peak_kb_per_frame": round(peak / 1024.0, 1),
+        # ile buforów wielkości zrzutu BGRA powstaje w klatce
+        "alloc_peak_in_frames": round(peak / frame_bytes, 2),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size", type=int, nargs=2, default=[800, 300], metavar=("W", "H"),
+                    help="rozmiar zaznaczonego obszaru")
+    ap.add_argument("-n", type=int, default=200)
+    ap.add_argument("--no-preview", action="store_true", help="bez budowania podglądu Qt")
+    args = ap.parse_args()
+
+    w, h = args.size
+    rng = np.random.default_rng(0)
+    template = rng.integers(0, 256, size=(h, w, 4), dtype=np.uint8).tobytes()
+
+    results = {}
+    for name, fn in make_paths(not args.no_preview).items():
+        results[name] = measure(fn, template, w, h, args.n)
+
+    dump_json({
+        "benchmark": "capture_path",
+        "size": [w, h],
+        "preview": not args.no_preview,
+        "frame_bgra_kb": round(w * h * 4 / 1024.0, 1),
+        "results": results,
+    })
+
+
+if __name__ == "__main__":
+    main()
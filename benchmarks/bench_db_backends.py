@@ -0,0 +1,117 @@
+"""
+Baza tablic: JSON (cały plik przepisywany przy zapisie) vs SQLite (WAL, klucz główny)
+przy 10k / 100k / 1M wpisów: zimne otwarcie, odczyt (trafienie i pudło), upsert, delete.
+
+    python -m benchmarks.bench_db_backends
+    python -m benchmarks.bench_db_backends --sizes 10000 100000 --writes 50
+
+Zapisy do JSON przy 1M trwają sekundy – liczba zapisów dla JSON jest przycinana (--json-max-write-s).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.common import dump_json, latency_summary, timed
+
+from app.db import JsonBackend, PlateBackend
+from app.db_sqlite import SqliteBackend
+
+LETTERS = "ACEFGHJKLMNPRSTUVWXY"
+DIGITS = "0123456789"
+
+
+def make_plates(n: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    out = set()
+    while len(out) < n:
+        out.add(rng.choice(["KR", "WA", "GD", "PO", "ERA", "KWA", "DW"])
+                + "".join(rng.choice(DIGITS) for _ in range(3))
+                + "".join(rng.choice(LETTERS + DIGITS) for _ in range(2)))
+    return sorted(out)
+
+
+def populate(kind: str, path: Path, plates: List[str]) -> None:
+    # stan początkowy wprost (bez mierzenia) – jak baza, która urosła z czasem
+    if kind == "json":
+        path.write_text(json.dumps({p: {"opis": f"wpis {i}", "tag": "T"} for i, p in enumerate(plates)},
+                                   ensure_ascii=False, indent=2), encoding="utf-8")
+    else:
+        db = SqliteBackend(path)
+        db.upsert_many((p, f"wpis {i}", "T") for i, p in enumerate(plates))
+        db.close()
+
+
+def open_db(kind: str, path: Path) -> PlateBackend:
+    return JsonBackend(path) if kind == "json" else SqliteBackend(path)
+
+
+def measure(kind: str, path: Path, plates: List[str], reads: int, writes: int,
+            max_write_s: float, seed: int) -> Dict:
+    rng = random.Random(seed)
+    t0 = time.perf_counter()
+    db = open_db(kind, path)
+    db.get(plates[0])  # JSON: wczytanie pliku przy pierwszym odczycie
+    open_ms = (time.perf_counter() - t0) * 1000.0
+
+    hits = [timed(db.get, rng.choice(plates))[1] for _ in range(reads)]
+    misses = [timed(db.get, f"XX{i:05d}")[1] for i in range(reads)]
+
+    upserts: List[float] = []
+    deletes: List[float] = []
+    t_writes = time.perf_counter()
+    for i in range(writes):
+        upserts.append(timed(db.upsert, f"ZZ{i:05d}", "nowy", "BENCH")[1])
+        if time.perf_counter() - t_writes > max_write_s:
+            break
+    t_writes = time.perf_counter()
+    for i in range(len(upserts)):
+        deletes.append(timed(db.delete, f"ZZ{i:05d}")[1])
+        if time.perf_counter() - t_writes > max_write_s:
+            break
+
+    n_after = db.count()
+    db.close()
+    return {
+        "open_ms": round(open_ms, 2),
+        "get_hit": latency_summary(hits),
+        "get_miss": latency_summary(misses),
+        "upsert": latency_summary(upserts),
+        "delete": latency_summary(deletes),
+        "count_after": n_after,
+        "file_mb": round(sum(f.stat().st_size for f in path.parent.glob(path.name + "*")) / (1024 * 1024), 2),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--backends", nargs="+", default=["json", "sqlite"], choices=["json", "sqlite"])
+    ap.add_argument("--reads", type=int, default=10_000)
+    ap.add_argument("--writes", type=int, default=100)
+    ap.add_argument("--json-max-write-s", type=float, default=20.0,
+                    help="limit czasu serii zapisów (głównie dla JSON przy dużych bazach)")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    results = []
+    for n in args.sizes:
+        plates = make_plates(n, args.seed)
+        for kind in args.backends:
+            with tempfile.TemporaryDirectory(prefix="anpr_db_bench_") as tmp:
+                path = Path(tmp) / ("plates.json" if kind == "json" else "plates.sqlite")
+                _, populate_ms = timed(populate, kind, path, plates)
+                row = {"backend": kind, "entries": n, "populate_ms": round(populate_ms, 1)}
+                row.update(measure(kind, path, plates, args.reads, args.writes, args.json_max_write_s, args.seed))
+                results.append(row)
+
+    dump_json({"benchmark": "db_backends", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Przybliżone wyszukiwanie w bazie tablic (app/fuzzy_index.py): budowa, zapytanie z jedną
+pomyłką OCR, add/remove – przy 10k / 100k / 1M kluczy.
+
+    python -m benchmarks.bench_fuzzy_index
+    python -m benchmarks.bench_fuzzy_index --sizes 1000000 --queries 5000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from typing import List
+
+from benchmarks.bench_db_backends import make_plates
+from benchmarks.common import dump_json, latency_summary, rss_mb, timed
+
+from app.fuzzy_index import FuzzyPlateIndex
+
+TYPO_CHARS = "ABCEHKMNPRTWXY0123456789OISZ"
+
+
+def make_queries(keys: List[str], n: int, rng: random.Random) -> List[str]:
+    # jedna podmiana / wstawienie / usunięcie znaku, jak w odczytach OCR
+    out = []
+    for _ in range(n):
+        k = list(rng.choice(keys))
+        op = rng.random()
+        i = rng.randrange(len(k))
+        if op < 0.7:
+            k[i] = rng.choice(TYPO_CHARS)
+        elif op < 0.85:
+            k.insert(i, rng.choice(TYPO_CHARS))
+        else:
+            del k[i]
+        out.append("".join(k))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--updates", type=int, default=1000)
+    ap.add_argument("--max-deletes", type=int, default=1, choices=[1, 2])
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    results = []
+    for n in args.sizes:
+        rng = random.Random(args.seed)
+        keys = make_plates(n, args.seed)
+        rss0 = rss_mb()
+        index, build_ms = timed(FuzzyPlateIndex, keys, args.max_deletes)
+        rss1 = rss_mb()
+
+        queries = make_queries(keys, args.queries, rng)
+        lat, found = [], 0
+        for q in queries:
+            res, ms = timed(index.search, q, 1.0, 5)
+            lat.append(ms)
+            found += bool(res)
+
+        adds = [timed(index.add, f"ZZ{i:05d}")[1] for i in range(args.updates)]
+        removes = [timed(index.remove, f"ZZ{i:05d}")[1] for i in range(args.updates)]
+
+        results.append({
+            "keys": n,
+            "build_ms": round(build_ms, 1),
+            "rss_delta_mb": round(rss1 - rss0, 1) if rss0 is not None and rss1 is not None else None,
+            "search": latency_summary(lat),
+            "found_ratio": round(found / len(queries), 4),
+            "add": latency_summary(adds),
+            "remove": latency_summary(removes),
+        })
+
+    dump_json({"benchmark": "fuzzy_index", "max_deletes": args.max_deletes, "results": results})
+
+
+if __name__ == "__main__":
+    main()
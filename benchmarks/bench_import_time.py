@@ -0,0 +1,112 @@
+"""
+Zimny start: profil importów (-X importtime) modułów aplikacji i ciężkich zależności
+oraz czas do pokazania głównego okna (QApplication + MainWindow, bez czekania na OCR).
+
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --modules app.gui easyocr --top 10
+
+Każdy pomiar w osobnym procesie – inaczej moduły z poprzedniego pomiaru są już w sys.modules.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.common import dump_json
+
+DEFAULT_MODULES = ["app.gui", "app.service", "app.ocr", "cv2", "PyQt6.QtWidgets", "mss", "easyocr"]
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    # "import time: self [us] | cumulative | imported package"
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # nagłówek
+        rows.append({
+            "module": parts[2].strip(),
+            "self_ms": int(parts[0]) / 1000.0,
+            "cumulative_ms": int(parts[1]) / 1000.0,
+        })
+    return rows
+
+
+def profile_module(module: str, top: int) -> Dict:
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - t0) * 1000.0
+    if proc.returncode != 0:
+        return {"module": module, "error": proc.stderr.strip().splitlines()[-1:]}
+
+    rows = parse_importtime(proc.stderr)
+    total = next((r["cumulative_ms"] for r in reversed(rows) if r["module"] == module), None)
+    heavy = sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:top]
+    loaded = {r["module"].split(".")[0] for r in rows}
+    return {
+        "module": module,
+        "import_ms": round(total, 1) if total is not None else None,
+        "process_wall_ms": round(wall_ms, 1),
+        "modules_loaded": len(rows),
+        # ciężkie zależności, które nie powinny ładować się przy starcie okna
+        "pulls_in": sorted(loaded & {"easyocr", "torch", "mss"}),
+        "top_self": [{"module": r["module"], "self_ms": round(r["self_ms"], 1)} for r in heavy],
+    }
+
+
+def _measure_window() -> Dict:
+    # (podproces) czas od startu do pierwszego narysowania okna
+    t0 = time.perf_counter()
+    from PyQt6.QtWidgets import QApplication
+    from app.gui import MainWindow
+    t_import = time.perf_counter() - t0
+
+    app = QApplication([])
+    w = MainWindow()
+    w.show()
+    app.processEvents()
+    t_shown = time.perf_counter() - t0
+    return {
+        "import_s": round(t_import, 3),
+        "window_shown_s": round(t_shown, 3),
+        # rozgrzewka OCR trwa w tle – okno nie powinno na nią czekać
+        "ocr_ready_at_show": w.warmProgress.isHidden(),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    ap.add_argument("--top", type=int, default=5, help="najdroższe moduły (czas własny) na wynik")
+    ap.add_argument("--no-window", action="store_true", help="bez pomiaru czasu do pokazania okna")
+    ap.add_argument("--window", action="store_true", help="(wewnętrzne) pojedynczy pomiar okna")
+    args = ap.parse_args()
+
+    if args.window:
+        print(json.dumps(_measure_window()))
+        return
+
+    out = {"benchmark": "import_time", "imports": [profile_module(m, args.top) for m in args.modules]}
+
+    if not args.no_window:
+        env = dict(os.environ)
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")  # bez ekranu (CI, ssh)
+        proc = subprocess.run([sys.executable, "-m", "benchmarks.bench_import_time", "--window"],
+                              capture_output=True, text=True, env=env)
+        lines = proc.stdout.strip().splitlines()
+        out["window"] = json.loads(lines[-1]) if proc.returncode == 0 and lines else {
+            "error": proc.stderr.strip().splitlines()[-1:]}
+
+    dump_json(out)
+
+
+if __name__ == "__main__":
+    main()
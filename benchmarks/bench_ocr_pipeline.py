@@ -0,0 +1,153 @@
+"""
+Gorąca ścieżka OCR na syntetycznych tablicach (benchmarks/synth.py):
+czas każdego etapu osobno + pełna kaskada PlateRecognizer.run (to, co woła OcrWorker._run_ocr),
+p50/p95 i dokładność (exact match) jako JSON.
+
+    python -m benchmarks.bench_ocr_pipeline -n 200 --out wyniki.json
+    python -m benchmarks.bench_ocr_pipeline -n 200 --baseline wyniki.json   # porównanie z poprzednim runem
+    python -m benchmarks.bench_ocr_pipeline --skip-ocr                      # tylko etapy CPU, bez EasyOCR
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.common import dump_json, latency_summary, timed
+from benchmarks.synth import make_dataset
+
+from app.ocr import PlateOcr, find_plate_rois, preprocess
+from app.recognizer import PlateRecognizer, best_plate_from_candidates, crop_non_black
+
+WARMUP = 3  # pierwsze obrazy (inicjalizacja readera, alokacje bufora) nie wchodzą do statystyk
+
+
+def _synthetic_raw(plate: str) -> list:
+    # bez EasyOCR: typowy kształt wyjścia (pasek "PL", tablica w dwóch kawałkach, śmieci)
+    p2 = 2 if plate[2].isdigit() else 3
+    return [
+        (None, "PL", 0.98),
+        (None, plate[:p2], 0.91),
+        (None, plate[p2:], 0.88),
+        (None, f"{plate[:p2]} {plate[p2:]}", 0.84),
+        (None, "0" + plate[1:], 0.40),
+    ]
+
+
+def _norm(s: Optional[str]) -> str:
+    return (s or "").upper().replace(" ", "")
+
+
+def run(n: int, seed: int, skip_ocr: bool, use_pre: bool) -> Dict:
+    t_gen = time.perf_counter()
+    samples = make_dataset(n + WARMUP, seed=seed)
+    gen_s = time.perf_counter() - t_gen
+
+    stages: Dict[str, List[float]] = {
+        "crop_non_black": [],
+        "preprocess": [],
+        "find_plate_rois": [],
+        "candidate_filter": [],
+        "best_plate_from_candidates": [],
+    }
+    hits = {"single_pass": 0, "cascade": 0}
+
+    ocr = recognizer = None
+    if not skip_ocr:
+        ocr = PlateOcr(use_preprocessing=use_pre, gpu=False)
+        recognizer = PlateRecognizer(ocr=ocr, prefer_pre=use_pre)
+        stages["readtext"] = []
+        stages["read_raw"] = []
+        stages["cascade"] = []
+
+    for i, s in enumerate(samples):
+        keep = i >= WARMUP
+
+        def rec(name: str, ms: float) -> None:
+            if keep:
+                stages[name].append(ms)
+
+        cropped, ms = timed(crop_non_black, s.img_bgr)
+        rec("crop_non_black", ms)
+        _, ms = timed(preprocess, cropped)
+        rec("preprocess", ms)
+        _, ms = timed(find_plate_rois, s.img_bgr)
+        rec("find_plate_rois", ms)
+
+        if ocr is not None:
+            # sam EasyOCR na gotowym obrazie (detektor + rozpoznawanie), bez naszej logiki
+            _, ms = timed(ocr.reader.readtext, cropped)
+            rec("readtext", ms)
+            # jedno przejście PlateOcr: lokalizator + (pre)processing + OCR
+            raw, ms = timed(ocr.read_raw, cropped)
+            rec("read_raw", ms)
+        else:
+            raw = _synthetic_raw(s.plate)
+
+        res, ms = timed(PlateOcr.result_from_raw, raw)
+        rec("candidate_filter", ms)
+        _, ms = timed(best_plate_from_candidates, res.raw_candidates)
+        rec("best_plate_from_candidates", ms)
+
+        if recognizer is not None:
+            out, ms = timed(recognizer.run, s.img_bgr)
+            rec("cascade", ms)
+            if keep:
+                hits["single_pass"] += int(_norm(res.plate) == s.plate)
+                hits["cascade"] += int(_norm(out.plate) == s.plate)
+
+    result = {
+        "benchmark": "ocr_pipeline",
+        "params": {"n": n, "seed": seed, "skip_ocr": skip_ocr, "use_preprocessing": use_pre},
+        "env": {"python": platform.python_version(), "machine": platform.machine()},
+        "dataset_gen_s": round(gen_s, 3),
+        "stages": {name: latency_summary(v) for name, v in stages.items()},
+    }
+    if recognizer is not None:
+        result["accuracy"] = {k: round(v / n, 4) for k, v in hits.items()}
+        result["strategy_stats"] = recognizer.stats()
+    return result
+
+
+def compare(current: Dict, baseline: Dict) -> Dict:
+    # względna zmiana p50/p95/p99 (ujemna = szybciej) i różnica dokładności
+    out = {}
+    for name, cur in current["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not base or not base.get("p50_ms") or not cur.get("n"):
+            continue
+        out[name] = {
+            k: round((cur[k] - base[k]) / base[k] * 100.0, 1)
+            for k in ("p50_ms", "p95_ms", "p99_ms") if base.get(k) and k in cur
+        }
+    delta = {"latency_change_pct": out}
+    if "accuracy" in current and "accuracy" in baseline:
+        delta["accuracy_change"] = {
+            k: round(v - baseline["accuracy"].get(k, 0.0), 4) for k, v in current["accuracy"].items()
+        }
+    return delta
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=100, help="liczba obrazów w statystykach")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--no-pre", action="store_true", help="PlateOcr bez preprocessingu")
+    ap.add_argument("--skip-ocr", action="store_true", help="tylko etapy CPU (bez EasyOCR)")
+    ap.add_argument("--out", help="zapisz JSON również do pliku")
+    ap.add_argument("--baseline", help="JSON z poprzedniego runu do porównania")
+    args = ap.parse_args()
+
+    result = run(max(1, args.n), args.seed, args.skip_ocr, not args.no_pre)
+    if args.baseline:
+        result["vs_baseline"] = compare(result, json.loads(Path(args.baseline).read_text(encoding="utf-8")))
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    dump_json(result)
+
+
+if __name__ == "__main__":
+    main()
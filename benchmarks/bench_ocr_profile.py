@@ -0,0 +1,93 @@
+"""
+Profil EasyOCR dla tablic (app/ocr.py: OcrProfile) vs domyślne parametry readtext/recognize:
+czas PlateOcr.read_plate (p50/p95) i dokładność (exact match) na tych samych syntetycznych obrazach,
+osobno dla ciasnych wycinków i pełnych kadrów.
+
+    python -m benchmarks.bench_ocr_profile -n 200
+    python -m benchmarks.bench_ocr_profile -n 200 --variants default plate --no-pre
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import replace
+from typing import Dict, List, Optional
+
+from benchmarks.common import dump_json, latency_summary, timed
+from benchmarks.synth import make_dataset
+
+from app.ocr import PLATE_PROFILE, OcrProfile, PlateOcr
+from app.recognizer import crop_non_black
+
+WARMUP = 3
+
+VARIANTS: Dict[str, Optional[OcrProfile]] = {
+    "default": None,
+    # sam alfabet tablic, detektor jak w EasyOCR
+    "allowlist_only": OcrProfile(text_threshold=None, text_height_px=None, max_canvas=None, min_size_frac=None),
+    "plate": PLATE_PROFILE,
+    "plate_beamsearch": replace(PLATE_PROFILE, decoder="beamsearch"),
+}
+
+
+def run_variant(profile: Optional[OcrProfile], samples, use_pre: bool) -> Dict:
+    ocr = PlateOcr(use_preprocessing=use_pre, gpu=False, profile=profile)
+    times: Dict[str, List[float]] = {"crop": [], "scene": []}
+    hits = {"crop": 0, "scene": 0}
+    for i, s in enumerate(samples):
+        kind = "scene" if s.params["scene"] else "crop"
+        img = s.img_bgr if kind == "scene" else crop_non_black(s.img_bgr)
+        res, ms = timed(ocr.read_plate, img)
+        if i < WARMUP:
+            continue
+        times[kind].append(ms)
+        hits[kind] += int((res.plate or "") == s.plate)
+
+    out: Dict = {}
+    for kind, ts in times.items():
+        if ts:
+            out[kind] = {"latency": latency_summary(ts), "exact": round(hits[kind] / len(ts), 4)}
+    n = sum(len(ts) for ts in times.values())
+    out["exact"] = round(sum(hits.values()) / max(1, n), 4)
+    # parametry detektora dla pierwszego obrazu statystyk – podgląd skalowania do rozmiaru
+    h, w = crop_non_black(samples[WARMUP].img_bgr).shape[:2]
+    scale = 2 if use_pre else 1
+    out["readtext_kwargs_example"] = profile.readtext_kwargs(h * scale, w * scale) if profile else {}
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=100, help="liczba obrazów w statystykach")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--no-pre", action="store_true", help="PlateOcr bez preprocessingu")
+    ap.add_argument("--variants", nargs="+", choices=sorted(VARIANTS), default=list(VARIANTS))
+    args = ap.parse_args()
+
+    samples = make_dataset(max(1, args.n) + WARMUP, seed=args.seed)
+    results = {name: run_variant(VARIANTS[name], samples, not args.no_pre) for name in args.variants}
+
+    base = results.get("default")
+    if base is not None:
+        for name, r in results.items():
+            if name == "default":
+                continue
+            r["vs_default"] = {
+                "exact_change": round(r["exact"] - base["exact"], 4),
+                **{
+                    f"{kind}_p50_change_pct": round(
+                        (r[kind]["latency"]["p50_ms"] - base[kind]["latency"]["p50_ms"])
+                        / base[kind]["latency"]["p50_ms"] * 100.0, 1)
+                    for kind in ("crop", "scene")
+                    if kind in r and kind in base and base[kind]["latency"]["p50_ms"]
+                },
+            }
+
+    dump_json({
+        "benchmark": "ocr_profile",
+        "params": {"n": args.n, "seed": args.seed, "use_preprocessing": not args.no_pre},
+        "results": results,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Post-processing kandydatów OCR: dawne best_plate_from_candidates (regex + dwie globalne tablice
+str.translate) vs gramatyka tablic zależna od pozycji (app/plate_grammar.py).
+Kandydaci syntetyczni: prawdziwa tablica z pomyłkami litera/cyfra w losowych pozycjach + śmieci.
+
+    python -m benchmarks.bench_plate_grammar
+    python -m benchmarks.bench_plate_grammar -n 20000 --errors 2 --candidates 5
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.common import dump_json
+from benchmarks.synth import _prefixes, random_plate
+
+from app.fuzzy_index import OCR_CONFUSIONS
+from app import plate_grammar
+from app.plate_grammar import EXTRA_CONFUSIONS, score_candidates
+from app.recognizer import best_plate_from_candidates, normalize_plate_text
+
+PL_PLATE_RX = re.compile(r"^[A-Z]{1,3}[A-Z0-9]{4,5}$")
+
+# pomyłki wstrzykiwane w kandydatów: w obie strony, jak w rzeczywistym OCR
+_PAIRS = [(a, b) for a, b in OCR_CONFUSIONS] + [(a, b) for a, b, _ in EXTRA_CONFUSIONS]
+_SWAP: Dict[str, List[str]] = {}
+for _a, _b in _PAIRS:
+    _SWAP.setdefault(_a, []).append(_b)
+    _SWAP.setdefault(_b, []).append(_a)
+
+_SWAPS_A = str.maketrans({a: b for a, b in OCR_CONFUSIONS})
+_SWAPS_B = str.maketrans({b: a for a, b in OCR_CONFUSIONS})
+
+
+def legacy_best(candidates) -> Optional[str]:
+    # best_plate_from_candidates sprzed gramatyki (dla porównania)
+    parsed = sorted(((str(t), float(c)) for t, c in candidates), key=lambda x: x[1], reverse=True)
+    for txt, _ in parsed:
+        norm = normalize_plate_text(txt)
+        if PL_PLATE_RX.match(norm):
+            return norm
+    for txt, _ in parsed:
+        norm = normalize_plate_text(txt)
+        if 5 <= len(norm) <= 8:
+            v1 = norm.translate(_SWAPS_A)
+            if PL_PLATE_RX.match(v1):
+                return v1
+            v2 = norm.translate(_SWAPS_B)
+            if PL_PLATE_RX.match(v2):
+                return v2
+    return None
+
+
+def corrupt(plate: str, rng: random.Random, errors: int) -> str:
+    chars = list(plate)
+    pos = [i for i, ch in enumerate(chars) if ch in _SWAP]
+    for i in rng.sample(pos, min(errors, len(pos))):
+        chars[i] = rng.choice(_SWAP[chars[i]])
+    return "".join(chars)
+
+
+def make_sets(n: int, k: int, errors: int, seed: int) -> List[Tuple[str, List[Tuple[str, float]]]]:
+    rng = random.Random(seed)
+    prefixes = _prefixes()
+    out = []
+    for _ in range(n):
+        plate = random_plate(rng, prefixes)
+        cands = [(corrupt(plate, rng, rng.randint(0, errors)), rng.uniform(0.4, 0.95)) for _ in range(k - 1)]
+        # śmieci z kadru: napisy, fragmenty, inne liczby
+        cands.append((rng.choice(["POLSKA", "PL", "AUTO-KOMIS", "TEL600123456", "EU"]), rng.uniform(0.3, 0.99)))
+        rng.shuffle(cands)
+        out.append((plate, cands))
+    return out
+
+
+def _run(fn: Callable, sets) -> Dict:
+    t0 = time.perf_counter()
+    picks = [fn(c) for _, c in sets]
+    us = (time.perf_counter() - t0) / len(sets) * 1e6
+    hits = sum(p == plate for p, (plate, _) in zip(picks, sets))
+    valid = sum(p is not None for p in picks)
+    return {
+        "us_per_set": round(us, 2),
+        "exact": round(hits / len(sets), 4),
+        "returned": round(valid / len(sets), 4),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=5000, help="zestawów kandydatów (jedna klatka = jeden zestaw)")
+    ap.add_argument("--candidates", type=int, default=4)
+    ap.add_argument("--errors", type=int, default=2, help="maks. pomyłek litera/cyfra na kandydata")
+    ap.add_argument("--seed", type=int, default=21)
+    args = ap.parse_args()
+
+    sets = make_sets(args.n, args.candidates, args.errors, args.seed)
+
+    # skalowanie wektoryzacji: wszystkie teksty ze wszystkich zestawów jednym wywołaniem
+    texts = [normalize_plate_text(t) for _, c in sets for t, _ in c]
+    plate_grammar._memo.clear()
+    t0 = time.perf_counter()
+    score_candidates(texts)
+    batch_us = (time.perf_counter() - t0) / len(texts) * 1e6
+    plate_grammar._memo.clear()
+    t0 = time.perf_counter()
+    for t in texts[:2000]:
+        score_candidates([t])
+    single_us = (time.perf_counter() - t0) / min(2000, len(texts)) * 1e6
+
+    plate_grammar._memo.clear()
+    grammar = _run(best_plate_from_candidates, sets)
+    # te same teksty ponownie – jak kolejne klatki z tą samą tablicą (pamięć podręczna gramatyki)
+    grammar_repeat = _run(best_plate_from_candidates, sets)
+
+    dump_json({
+        "benchmark": "plate_grammar",
+        "sets": args.n,
+        "candidates_per_set": args.candidates,
+        "max_errors": args.errors,
+        "legacy_regex_swaps": _run(legacy_best, sets),
+        "grammar": grammar,
+        "grammar_repeated_texts": grammar_repeat,
+        "score_candidates_us_per_text": {"one_call_all_texts": round(batch_us, 3),
+                                         "one_call_per_text": round(single_us, 3)},
+    })
+
+
+if __name__ == "__main__":
+    main()
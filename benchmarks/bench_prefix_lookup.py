@@ -0,0 +1,80 @@
+"""
+region_for_plate: dawne sondy dict na mapie z JSON vs skompilowana tablica (mmap),
+pojedynczo i wsadowo (regions_for_plates), plus czas ładowania obu postaci.
+
+    python -m benchmarks.bench_prefix_lookup -n 200000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+
+from benchmarks.common import dump_json
+from benchmarks.synth import _prefixes, random_plate
+
+from app import pl_prefix
+
+
+def _dict_lookup(data: dict):
+    known = data.get("known_prefixes_optional", {}) or {}
+    voiv1 = data.get("voivodeship_by_first_letter", {}) or {}
+
+    def lookup(p: str):
+        if len(p) >= 3 and p[:3] in known:
+            return known[p[:3]]
+        if len(p) >= 2 and p[:2] in known:
+            return known[p[:2]]
+        return voiv1.get(p[0])
+    return lookup
+
+
+def _per_call_us(fn, plates) -> float:
+    t0 = time.perf_counter()
+    for p in plates:
+        fn(p)
+    return (time.perf_counter() - t0) / len(plates) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=200_000)
+    ap.add_argument("--seed", type=int, default=3)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    prefixes = _prefixes()
+    plates = [random_plate(rng, prefixes) for _ in range(args.n)]
+
+    t0 = time.perf_counter()
+    data = json.loads(pl_prefix.DATA_PATH.read_text(encoding="utf-8"))
+    json_load_ms = (time.perf_counter() - t0) * 1000.0
+
+    pl_prefix._load.cache_clear()
+    t0 = time.perf_counter()
+    table = pl_prefix._load()
+    table_load_ms = (time.perf_counter() - t0) * 1000.0
+
+    old = _dict_lookup(data)
+    t0 = time.perf_counter()
+    batch = pl_prefix.regions_for_plates(plates)
+    batch_us = (time.perf_counter() - t0) / len(plates) * 1e6
+
+    dump_json({
+        "benchmark": "prefix_lookup",
+        "n": args.n,
+        "mmap_table": pl_prefix.TABLE_PATH.exists(),
+        "load_ms": {"json": round(json_load_ms, 3), "table": round(table_load_ms, 3)},
+        "per_plate_us": {
+            "dict_probes": round(_per_call_us(old, plates), 3),
+            "table_lookup": round(_per_call_us(table.lookup, plates), 3),
+            "region_for_plate": round(_per_call_us(pl_prefix.region_for_plate, plates), 3),
+            "regions_for_plates": round(batch_us, 3),
+        },
+        "batch_matches_scalar": batch == [pl_prefix.region_for_plate(p) for p in plates],
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Czas zimnego startu i RSS: dwa osobne easyocr.Reader (stary OcrWorker)
+vs dwa PlateOcr korzystające ze wspólnej puli readerów.
+
+    python -m benchmarks.bench_reader_pool
+
+Każdy wariant mierzony w osobnym procesie, żeby wagi z jednego nie zaniżały drugiego.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from benchmarks.common import rss_mb, dump_json
+
+
+def _measure(mode: str) -> dict:
+    rss0 = rss_mb()
+    t0 = time.perf_counter()
+
+    # oba warianty importują to samo (torch, cv2), różnią się tylko liczbą readerów
+    import easyocr
+    from app.ocr import PlateOcr
+    t_import = time.perf_counter() - t0
+
+    if mode == "separate":
+        readers = [easyocr.Reader(["en"], gpu=False), easyocr.Reader(["en"], gpu=False)]
+    else:
+        ocrs = [PlateOcr(use_preprocessing=True), PlateOcr(use_preprocessing=False)]
+        readers = [o.reader for o in ocrs]
+
+    t_total = time.perf_counter() - t0
+    return {
+        "mode": mode,
+        "distinct_readers": len({id(r) for r in readers}),
+        "import_s": round(t_import, 3),
+        "startup_s": round(t_total, 3),
+        "rss_before_mb": rss0,
+        "rss_after_mb": rss_mb(),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mode", choices=["separate", "shared"], help="(wewnętrzne) pojedynczy pomiar")
+    args = ap.parse_args()
+
+    if args.mode:
+        print(json.dumps(_measure(args.mode)))
+        return
+
+    results = {}
+    for mode in ("separate", "shared"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_reader_pool", "--mode", mode],
+            capture_output=True, text=True, check=True,
+        )
+        results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    sep, sh = results["separate"], results["shared"]
+    if sep["rss_after_mb"] is not None and sh["rss_after_mb"] is not None:
+        results["rss_saved_mb"] = round(sep["rss_after_mb"] - sh["rss_after_mb"], 1)
+    results["startup_saved_s"] = round(sep["startup_s"] - sh["startup_s"], 3)
+    dump_json(results)
+
+
+if __name__ == "__main__":
+    main()
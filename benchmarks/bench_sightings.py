@@ -0,0 +1,107 @@
+"""
+Dziennik przejazdów (app/sightings.py): koszt observe() po stronie wątku OCR, przepustowość
+pisarza w tle (zdarzenia/s, paczki) i czas zapytań po tablicy / zakresie czasu / tagu
+przy N widzeniach w bazie.
+
+    python -m benchmarks.bench_sightings
+    python -m benchmarks.bench_sightings --sightings 100000 --hits 10
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.common import dump_json, latency_summary
+from benchmarks.synth import _prefixes, random_plate
+
+from app.sightings import SightingLog
+
+TAGS = ["", "", "", "DEMO", "VIP", "ALERT"]
+
+
+def _query_ms(fn: Callable, n: int) -> Dict:
+    times: List[float] = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        fn(i)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return latency_summary(times)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sightings", type=int, default=20_000, help="różnych przejazdów")
+    ap.add_argument("--hits", type=int, default=8, help="odczytów na przejazd (co 400 ms, jak z ekranu)")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=5)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    prefixes = _prefixes()
+    plates = [random_plate(rng, prefixes) for _ in range(max(1, args.sightings // 4))]
+    tag_of = {p: rng.choice(TAGS) for p in plates}
+
+    # przejazdy rozdzielone 6 s przerwy, każdy to `hits` odczytów co 400 ms; tablice się powtarzają
+    events = []
+    t = 1.7e12
+    for _ in range(args.sightings):
+        plate = rng.choice(plates)
+        tag = tag_of[plate]
+        for h in range(args.hits):
+            events.append((plate, rng.uniform(0.5, 1.0), t + h * 400.0, "region", tag))
+        t += 6000.0 + args.hits * 400.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = SightingLog(Path(tmp) / "sightings.sqlite", gap_ms=5000.0)
+        obs_us = np.empty(len(events))
+        t_start = time.perf_counter()
+        for i, (plate, conf, t_ms, region, tag) in enumerate(events):
+            t0 = time.perf_counter()
+            log.observe(plate, conf, t_ms, region=region, tag=tag, source="screen")
+            obs_us[i] = (time.perf_counter() - t0) * 1e6
+        t_enqueued = time.perf_counter() - t_start
+        log.flush(timeout=600.0)
+        t_written = time.perf_counter() - t_start
+        stored = log.count()
+
+        t_min, t_max = events[0][2], events[-1][2]
+        span = (t_max - t_min) / 100.0  # okno 1% osi czasu
+        results = {
+            "by_plate": _query_ms(lambda i: log.query(plate=plates[i % len(plates)]), args.queries),
+            "by_time_range_1pct": _query_ms(
+                lambda i: log.query(since_ms=t_min + (i % 99) * span, until_ms=t_min + (i % 99 + 1) * span),
+                args.queries),
+            "by_tag_last_100": _query_ms(lambda i: log.query(tag=TAGS[3 + i % 3], limit=100), args.queries),
+            "by_plate_and_range": _query_ms(
+                lambda i: log.query(plate=plates[i % len(plates)], since_ms=t_min, until_ms=t_min + 10 * span),
+                args.queries),
+        }
+        batches = log.batches
+        log.close()
+
+    dump_json({
+        "benchmark": "sightings",
+        "events": len(events),
+        "sightings_stored": stored,
+        "dedup_ratio": round(len(events) / max(1, stored), 2),
+        "observe_us": {
+            "p50": round(float(np.percentile(obs_us, 50)), 2),
+            "p99": round(float(np.percentile(obs_us, 99)), 2),
+            "max": round(float(obs_us.max()), 1),
+        },
+        "enqueue_s": round(t_enqueued, 3),
+        "written_s": round(t_written, 3),
+        "writer_events_per_s": round(len(events) / t_written, 0),
+        "writer_batches": batches,
+        "query_ms": results,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Odtworzenie śladu JSONL z aplikacji (ANPR_TRACE=trace.jsonl python run.py): percentyle etapów
+i liczniki jak w panelu wydajności, opcjonalnie porównanie z innym śladem lub wynikiem JSON.
+
+    python -m benchmarks.bench_trace_replay trace.jsonl --out przed.json
+    python -m benchmarks.bench_trace_replay trace_po.jsonl --baseline przed.json
+    python -m benchmarks.bench_trace_replay trace_po.jsonl --baseline trace.jsonl --include-skipped
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.bench_ocr_pipeline import compare
+from benchmarks.common import dump_json, latency_summary
+
+from app.telemetry import read_trace, replay
+
+
+def summarize(path: str, include_skipped: bool) -> Dict:
+    # latency_summary (interpolowane percentyle) na pełnym śladzie, nie na oknie ostatnich N klatek
+    stages: Dict[str, List[float]] = {}
+    strategies: Dict[str, int] = {}
+    for rec in read_trace(path):
+        if rec.get("skipped") and not include_skipped:
+            continue  # klatki bez OCR zaniżają percentyle całości
+        for name, ms in rec.get("stages", {}).items():
+            stages.setdefault(name, []).append(ms)
+        for strategy, ms in rec.get("attempts", []):
+            stages.setdefault("ocr:" + strategy, []).append(ms)
+            strategies[strategy] = strategies.get(strategy, 0) + 1
+
+    tel = replay(path)
+    return {
+        "benchmark": "trace_replay",
+        "trace": str(path),
+        "params": {"include_skipped": include_skipped},
+        "stages": {name: latency_summary(v) for name, v in stages.items()},
+        "attempts_by_strategy": strategies,
+        "counters": tel.counters,
+    }
+
+
+def _load_baseline(path: str, include_skipped: bool) -> Dict:
+    if path.endswith((".jsonl", ".ndjson")):
+        return summarize(path, include_skipped)
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("trace", help="ślad JSONL z ANPR_TRACE")
+    ap.add_argument("--include-skipped", action="store_true", help="licz też klatki pominięte (bez zmian)")
+    ap.add_argument("--baseline", help="poprzedni ślad (.jsonl) albo wynik (.json) do porównania")
+    ap.add_argument("--out", help="zapisz JSON również do pliku")
+    args = ap.parse_args()
+
+    result = summarize(args.trace, args.include_skipped)
+    if args.baseline:
+        result["vs_baseline"] = compare(result, _load_baseline(args.baseline, args.include_skipped))
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    dump_json(result)
+
+
+if __name__ == "__main__":
+    main()
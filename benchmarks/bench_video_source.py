@@ -0,0 +1,89 @@
+"""
+Źródła plikowe bez OCR: ile klatek/s daje VideoFileSource przy różnym stride
+(pominięte klatki tylko grab()) i ile kosztuje seek. Film generowany lokalnie z benchmarks.synth.
+
+    python -m benchmarks.bench_video_source
+    python -m benchmarks.bench_video_source --video nagranie.mp4 --strides 1 5 25
+
+realtime_factor = ile razy szybciej niż tempo nagrania przechodzi samo dekodowanie.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.common import dump_json, latency_summary
+from benchmarks.synth import make_dataset, write_video
+
+from app.sources import VideoFileSource
+
+
+def measure_stride(path: str, stride: int) -> Dict:
+    t0 = time.perf_counter()
+    n = 0
+    last_index = 0
+    with VideoFileSource(path, stride=stride) as src:
+        fps = src.fps
+        while True:
+            sf = src.read()
+            if sf is None:
+                break
+            n += 1
+            last_index = sf.index
+    wall = time.perf_counter() - t0
+    covered_s = (last_index + stride) / fps if fps > 0 else 0.0
+    return {
+        "stride": stride,
+        "frames_out": n,
+        "wall_s": round(wall, 3),
+        "frames_out_per_s": round(n / wall, 1) if wall > 0 else None,
+        "realtime_factor": round(covered_s / wall, 1) if wall > 0 else None,
+    }
+
+
+def measure_seek(path: str, n: int, seed: int = 7) -> Dict:
+    rng = random.Random(seed)
+    times: List[float] = []
+    with VideoFileSource(path) as src:
+        total = src.frame_count or 1
+        for _ in range(n):
+            t0 = time.perf_counter()
+            src.seek(rng.randrange(total))
+            src.read()  # seek + pierwsza klatka po nim (tak jak start od --start-ms)
+            times.append((time.perf_counter() - t0) * 1000.0)
+    return latency_summary(times)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--video", help="istniejący plik (domyślnie syntetyczny)")
+    ap.add_argument("-n", type=int, default=20, help="tablic w filmie syntetycznym")
+    ap.add_argument("--fps", type=float, default=25.0)
+    ap.add_argument("--strides", type=int, nargs="+", default=[1, 2, 5, 10])
+    ap.add_argument("--seeks", type=int, default=30)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.video
+        if not path:
+            path, _ = write_video(make_dataset(args.n, seed=11), Path(tmp) / "synth.mp4", fps=args.fps)
+            path = str(path)
+
+        with VideoFileSource(path) as src:
+            info = {"fps": src.fps, "frame_count": src.frame_count}
+
+        dump_json({
+            "benchmark": "video_source",
+            "video": Path(path).name,
+            **info,
+            "strides": [measure_stride(path, s) for s in args.strides],
+            "seek_ms": measure_seek(path, args.seeks),
+        })
+
+
+if __name__ == "__main__":
+    main()
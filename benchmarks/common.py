@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+
+def rss_mb() -> Optional[float]:
+    # bieżące RSS procesu; psutil jeśli jest, inaczej szczyt z resource (Linux/macOS)
+    try:
+        import psutil  # type: ignore
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux podaje KB, macOS bajty
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return None
+
+
+def dump_json(payload: Any) -> None:
+    print(json.dumps(payload, ensure_ascii=False, indent=2))
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    # interpolacja liniowa jak numpy.percentile(..., method="linear"), bez zależności od numpy
+    if not values:
+        return float("nan")
+    s = sorted(values)
+    k = (len(s) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def latency_summary(samples_ms: Sequence[float]) -> Dict[str, Any]:
+    return {
+        "n": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 50), 4),
+        "p95_ms": round(percentile(samples_ms, 95), 4),
+        "p99_ms": round(percentile(samples_ms, 99), 4),
+        "mean_ms": round(sum(samples_ms) / len(samples_ms), 4) if samples_ms else None,
+    }
+
+
+def timed(fn: Callable, *args, **kwargs) -> Tuple[Any, float]:
+    # (wynik, czas w ms)
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, (time.perf_counter() - t0) * 1000.0
@@ -0,0 +1,175 @@
+"""
+Syntetyczne polskie tablice do benchmarków (offline, deterministyczne dla danego seeda):
+tekst na białej tablicy z niebieskim paskiem UE, czarna ramka,
+potem szum, rozmycie, skala i czarne marginesy (jak screen z przeglądarki zdjęć).
+"""
+from __future__ import annotations
+
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.plate_grammar import PATTERNS_2, PATTERNS_3, SUFFIX_LETTERS
+
+PREFIX_MAP = Path(__file__).resolve().parent.parent / "data" / "prefix_map_pl.json"
+
+# układy i litery wyróżnika pojazdu – te same, których oczekuje gramatyka tablic
+LETTERS = SUFFIX_LETTERS
+DIGITS = "0123456789"
+
+PLATE_W, PLATE_H = 520, 114  # mm -> px 1:1 przy renderze bazowym
+
+
+def _prefixes() -> List[str]:
+    try:
+        data = json.loads(PREFIX_MAP.read_text(encoding="utf-8"))
+        known = [k for k in data.get("known_prefixes_optional", {}) if k.isalpha() and 2 <= len(k) <= 3]
+        if known:
+            return sorted(known)
+    except (OSError, ValueError):
+        pass
+    return ["KR", "WA", "ERA", "KWA", "DWR", "GD", "PO"]
+
+
+def random_plate(rng: random.Random, prefixes: Optional[List[str]] = None) -> str:
+    prefixes = prefixes or _prefixes()
+    p = rng.choice(prefixes)
+    pattern = rng.choice(PATTERNS_2 if len(p) == 2 else PATTERNS_3)
+    rest = "".join(rng.choice(LETTERS if c == "L" else DIGITS) for c in pattern)
+    return p + rest
+
+
+def render_plate(text: str, prefix_len: int) -> np.ndarray:
+    img = np.full((PLATE_H, PLATE_W, 3), 255, dtype=np.uint8)
+    # pasek UE
+    cv2.rectangle(img, (0, 0), (44, PLATE_H), (153, 51, 0), -1)
+    cv2.putText(img, "PL", (6, PLATE_H - 14), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+
+    label = text[:prefix_len] + " " + text[prefix_len:]
+    font, scale, thick = cv2.FONT_HERSHEY_DUPLEX, 2.6, 6
+    (tw, th), _ = cv2.getTextSize(label, font, scale, thick)
+    fit = min(1.0, (PLATE_W - 70) / float(tw))
+    scale *= fit
+    (tw, th), _ = cv2.getTextSize(label, font, scale, thick)
+    x = 50 + (PLATE_W - 50 - tw) // 2
+    y = (PLATE_H + th) // 2
+    cv2.putText(img, label, (x, y), font, scale, (0, 0, 0), thick, cv2.LINE_AA)
+    cv2.rectangle(img, (0, 0), (PLATE_W - 1, PLATE_H - 1), (0, 0, 0), 3)
+    return img
+
+
+@dataclass
+class Sample:
+    plate: str
+    img_bgr: np.ndarray
+    params: dict
+
+
+def make_sample(rng: random.Random, prefixes: Optional[List[str]] = None,
+                scene: bool = False) -> Sample:
+    plate = random_plate(rng, prefixes)
+    prefix_len = 2 if plate[2].isdigit() else 3
+    img = render_plate(plate, prefix_len)
+
+    scale = rng.uniform(0.35, 1.0)
+    img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    blur = rng.choice([0, 0, 3, 5])
+    if blur:
+        img = cv2.GaussianBlur(img, (blur, blur), 0)
+
+    noise = rng.uniform(0, 12)
+    if noise > 0:
+        nrng = np.random.default_rng(rng.randrange(1 << 30))
+        img = np.clip(img.astype(np.int16) + nrng.normal(0, noise, img.shape), 0, 255).astype(np.uint8)
+
+    if scene:
+        # tablica w większym kadrze (np. cały samochód) – dla lokalizatora ROI
+        H, W = 480, 854
+        bg = np.random.default_rng(rng.randrange(1 << 30)).integers(40, 160, (H, W, 3), dtype=np.uint8)
+        bg = cv2.GaussianBlur(bg, (9, 9), 0)
+        h, w = img.shape[:2]
+        y, x = rng.randrange(0, H - h), rng.randrange(0, W - w)
+        bg[y:y + h, x:x + w] = img
+        img = bg
+    else:
+        # czarne marginesy jak z okna przeglądarki zdjęć (dla crop_non_black)
+        pad = [rng.choice([0, 0, 20, 60]) for _ in range(4)]
+        img = cv2.copyMakeBorder(img, pad[0], pad[1], pad[2], pad[3], cv2.BORDER_CONSTANT, value=(0, 0, 0))
+
+    return Sample(plate=plate, img_bgr=np.ascontiguousarray(img),
+                  params={"scale": round(scale, 3), "blur": blur, "noise": round(noise, 2), "scene": scene})
+
+
+def make_dataset(n: int, seed: int = 1234, scene_ratio: float = 0.25) -> List[Sample]:
+    rng = random.Random(seed)
+    prefixes = _prefixes()
+    return [make_sample(rng, prefixes, scene=rng.random() < scene_ratio) for _ in range(n)]
+
+
+def write_dataset(samples: List[Sample], out_dir: Path) -> Tuple[Path, Path]:
+    # format zgodny ze scripts/evaluate_ocr.py: obrazy + labels.csv (filename,plate)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rows = []
+    for i, s in enumerate(samples):
+        name = f"synth_{i:05d}.png"
+        cv2.imwrite(str(out_dir / name), s.img_bgr)
+        rows.append(f"{name},{s.plate}")
+    labels = out_dir / "labels.csv"
+    labels.write_text("\n".join(rows) + "\n", encoding="utf-8")
+    return out_dir, labels
+
+
+def write_video(samples: List[Sample], path: Path, fps: float = 10.0, hold_s: float = 1.0,
+                size: Tuple[int, int] = (854, 480), fourcc: str = "mp4v") -> Tuple[Path, List[Tuple[float, str]]]:
+    # film z kolejnymi tablicami (każda przez hold_s) dla app.sources.VideoFileSource;
+    # zwraca listę (czas_startu_ms, tablica) do porównania ze znacznikami czasu wyników
+    # fourcc "MJPG" (.avi): same klatki kluczowe – dokładne przewijanie w testach
+    w, h = size
+    path.parent.mkdir(parents=True, exist_ok=True)
+    vw = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*fourcc), fps, (w, h))
+    if not vw.isOpened():
+        raise OSError(f"nie można zapisać wideo: {path}")
+    per_plate = max(1, int(round(fps * hold_s)))
+    timeline = []
+    try:
+        for i, s in enumerate(samples):
+            frame = np.zeros((h, w, 3), dtype=np.uint8)
+            img = s.img_bgr
+            fit = min(1.0, w / float(img.shape[1]), h / float(img.shape[0]))
+            if fit < 1.0:
+                img = cv2.resize(img, None, fx=fit, fy=fit, interpolation=cv2.INTER_AREA)
+            ih, iw = img.shape[:2]
+            y, x = (h - ih) // 2, (w - iw) // 2
+            frame[y:y + ih, x:x + iw] = img
+            timeline.append((i * per_plate * 1000.0 / fps, s.plate))
+            for _ in range(per_plate):
+                vw.write(frame)
+    finally:
+        vw.release()
+    return path, timeline
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Zapisz syntetyczny zbiór do katalogu (dla evaluate_ocr.py)")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("-n", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--video", action="store_true",
+                    help="zamiast katalogu zapisz film (--out plik.mp4), każda tablica przez --hold s")
+    ap.add_argument("--fps", type=float, default=10.0)
+    ap.add_argument("--hold", type=float, default=1.0)
+    args = ap.parse_args()
+    if args.video:
+        p, timeline = write_video(make_dataset(args.n, args.seed), Path(args.out), fps=args.fps, hold_s=args.hold)
+        print(f"[OK] film {p}: {len(timeline)} tablic, {args.hold:g} s każda")
+    else:
+        d, lbl = write_dataset(make_dataset(args.n, args.seed), Path(args.out))
+        print(f"[OK] {args.n} obrazów w {d}, etykiety: {lbl}")
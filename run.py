@@ -1,4 +1,8 @@
+from multiprocessing import freeze_support
+
 from app.gui import main
 
 if __name__ == "__main__":
+    # pula procesów OCR (wiele obszarów) używa spawn – potrzebne też w zamrożonym .exe
+    freeze_support()
     main()
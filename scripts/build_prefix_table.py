@@ -0,0 +1,125 @@
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+from app.pl_prefix import (
+    DATA_PATH, TABLE_PATH, VOIVODESHIPS, PrefixTable, compile_table, fix_region, fix_voivodeship,
+)
+
+# Walidacja data/prefix_map_pl.json + kompilacja do data/prefix_map_pl.bin (ładowanego przez mmap).
+#   python -m scripts.build_prefix_table              # walidacja + .bin
+#   python -m scripts.build_prefix_table --fix-json   # dodatkowo zapisz poprawione nazwy do JSON
+# Uruchamiać po każdym update_prefix_map_from_*.py.
+
+RX_PREFIX = re.compile(r"^[A-Z]{1,3}$")
+RX_BROKEN = re.compile(r"(^|[\s-])[A-ZĄĆĘŁŃÓŚŹŻ] [a-ząćęłńóśźż]|-$")
+
+
+def normalize(data: dict):
+    fixes = []
+    voiv1 = {}
+    for k, v in (data.get("voivodeship_by_first_letter") or {}).items():
+        nv = fix_voivodeship(v)
+        if nv != v:
+            fixes.append(f"{k}: {v!r} -> {nv!r}")
+        voiv1[k] = nv
+    known = {}
+    for k, v in (data.get("known_prefixes_optional") or {}).items():
+        nv = fix_region(v)
+        if nv != v:
+            fixes.append(f"{k}: {v!r} -> {nv!r}")
+        known[k] = nv
+    return dict(data, voivodeship_by_first_letter=voiv1, known_prefixes_optional=known), fixes
+
+
+def validate(data: dict):
+    errors, warnings = [], []
+    voiv1 = data["voivodeship_by_first_letter"]
+    known = data["known_prefixes_optional"]
+
+    for k, v in voiv1.items():
+        if not re.fullmatch(r"[A-Z]", k):
+            errors.append(f"litera województwa {k!r} nie jest pojedynczą literą A-Z")
+        if v not in VOIVODESHIPS:
+            errors.append(f"{k}: nieznane województwo {v!r}")
+    missing = sorted(set(VOIVODESHIPS) - set(voiv1.values()))
+    if missing:
+        errors.append(f"brak liter dla województw: {', '.join(missing)}")
+
+    for k, v in known.items():
+        if not RX_PREFIX.match(k):
+            errors.append(f"niepoprawny wyróżnik {k!r}")
+            continue
+        parts = v.split(" / ")
+        if len(parts) != 2 or not parts[0]:
+            errors.append(f"{k}: oczekiwano 'powiat / województwo', jest {v!r}")
+            continue
+        if parts[1] not in VOIVODESHIPS:
+            errors.append(f"{k}: nieznane województwo {parts[1]!r}")
+        if RX_BROKEN.search(parts[0]):
+            errors.append(f"{k}: uszkodzona nazwa {parts[0]!r}")
+        if k[0] not in voiv1:
+            errors.append(f"{k}: brak województwa dla litery {k[0]!r}")
+        elif voiv1[k[0]] != parts[1]:
+            warnings.append(f"{k}: {parts[1]} != {voiv1[k[0]]} (litera {k[0]})")
+
+    covered = {v.split(" / ")[-1] for v in known.values()}
+    for v in sorted(set(VOIVODESHIPS) - covered):
+        warnings.append(f"brak wyróżników powiatów dla: {v}")
+    return errors, warnings
+
+
+def check_roundtrip(table: PrefixTable, data: dict):
+    # skompilowana tablica musi dawać dokładnie to, co mapa (najdłuższe dopasowanie)
+    errors = []
+    known, voiv1 = data["known_prefixes_optional"], data["voivodeship_by_first_letter"]
+    for k, v in known.items():
+        plate = k + "1" * (7 - len(k))
+        if table.lookup(plate) != v:
+            errors.append(f"roundtrip {plate}: {table.lookup(plate)!r} != {v!r}")
+    for k, v in voiv1.items():
+        if table.lookup(k) != v:
+            errors.append(f"roundtrip {k}: {table.lookup(k)!r} != {v!r}")
+    return errors
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--json", default=str(DATA_PATH))
+    ap.add_argument("--out", default=str(TABLE_PATH))
+    ap.add_argument("--fix-json", action="store_true", help="zapisz poprawione nazwy z powrotem do JSON")
+    ap.add_argument("--force", action="store_true", help="zapisz .bin mimo błędów walidacji")
+    args = ap.parse_args()
+
+    src, out = Path(args.json), Path(args.out)
+    data, fixes = normalize(json.loads(src.read_text(encoding="utf-8")))
+    for f in fixes:
+        print("[FIX]", f)
+
+    errors, warnings = validate(data)
+    for w in warnings:
+        print("[WARN]", w)
+    for e in errors:
+        print("[ERR]", e)
+    if errors and not args.force:
+        print(f"Walidacja: {len(errors)} błędów – .bin nie zapisany (--force, aby wymusić)")
+        sys.exit(1)
+
+    blob = compile_table(data)
+    rt = check_roundtrip(PrefixTable(blob), data)
+    for e in rt:
+        print("[ERR]", e)
+    if rt:
+        sys.exit(1)
+
+    if args.fix_json and fixes:
+        src.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[OK] Poprawiono {len(fixes)} nazw w {src}")
+    out.write_bytes(blob)  # po JSON – .bin musi być nowszy, inaczej app.pl_prefix skompiluje mapę od nowa
+    print(f"[OK] {out} ({len(blob)} B, {len(data['known_prefixes_optional'])} wyróżników)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,112 @@
 import argparse
-from app.db import load_plates_db, upsert_plate, delete_plate
+import csv
+import itertools
+import json
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.db import delete_many, delete_plate, iter_plates, upsert_many, upsert_plate
+
+# Import/eksport strumieniowy: CSV (plate,opis,tag – nagłówek opcjonalny) albo JSONL
+# ({"plate": ..., "opis": ..., "tag": ...} w linii). "-" = stdin/stdout.
+# .json = słownik {tablica: {"opis", "tag"}} jak data/plates_db.json (import wczytuje go w całości).
+#   python -m scripts.db_cli import lista.csv
+#   python -m scripts.db_cli import stara_baza.json
+#   python -m scripts.db_cli export - --format jsonl --tag DEMO
+#   python -m scripts.db_cli delete-many do_usuniecia.txt
+
+
+FORMATS = ["auto", "csv", "jsonl", "json"]
+
+
+def _detect_format(path: str, fmt: str) -> str:
+    if fmt != "auto":
+        return fmt
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "json" if suffix == ".json" else "csv"
+
+
+@contextmanager
+def _open(path: str, mode: str):
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+    else:
+        with open(path, mode, encoding="utf-8", newline="") as f:
+            yield f
+
+
+def read_rows(f, fmt: str):
+    # generator (tablica, opis, tag) – plik nie jest wczytywany w całości (poza .json);
+    # błędny wpis -> ValueError z numerem linii, zanim cokolwiek trafi do bazy (upsert_many: jeden zapis)
+    if fmt == "json":
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"linia {e.lineno}: niepoprawny JSON ({e.msg})")
+        if not isinstance(data, dict):
+            raise ValueError('plik .json: oczekiwany słownik {"TABLICA": {"opis": ..., "tag": ...}}; '
+                             "lista wpisów -> JSONL (--format jsonl)")
+        for plate, v in data.items():
+            if not isinstance(v, dict):
+                raise ValueError(f'{plate}: oczekiwany obiekt {{"opis": ..., "tag": ...}}')
+            yield plate, v.get("opis", ""), v.get("tag", "")
+        return
+
+    if fmt == "jsonl":
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"linia {n}: niepoprawny JSON ({e.msg})")
+            if not isinstance(rec, dict):
+                raise ValueError(f'linia {n}: oczekiwany obiekt {{"plate": ..., "opis": ..., "tag": ...}}')
+            yield rec.get("plate", ""), rec.get("opis", ""), rec.get("tag", "")
+        return
+
+    reader = csv.reader(f)
+    try:
+        for row in reader:
+            if not row:
+                continue
+            if reader.line_num == 1 and row[0].strip().lower() in ("plate", "tablica"):
+                continue  # nagłówek
+            row = row + ["", ""]
+            yield row[0], row[1], row[2]
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"linia {reader.line_num + 1}: {e}")
+
+
+def write_rows(f, fmt: str, items) -> int:
+    n = 0
+    if fmt == "json":
+        # słownik jak data/plates_db.json, pisany wpis po wpisie
+        f.write("{")
+        for plate, v in items:
+            f.write(("," if n else "") + f"\n  {json.dumps(plate)}: "
+                    + json.dumps({"opis": v["opis"], "tag": v["tag"]}, ensure_ascii=False))
+            n += 1
+        f.write("\n}\n")
+        return n
+
+    if fmt == "jsonl":
+        for plate, v in items:
+            f.write(json.dumps({"plate": plate, "opis": v["opis"], "tag": v["tag"]}, ensure_ascii=False) + "\n")
+            n += 1
+        return n
+
+    w = csv.writer(f)
+    w.writerow(["plate", "opis", "tag"])
+    for plate, v in items:
+        w.writerow([plate, v["opis"], v["tag"]])
+        n += 1
+    return n
 
 
 def main():
@@ -14,7 +121,24 @@ def main():
     d = sub.add_parser("del")
     d.add_argument("--plate", required=True)
 
-    sub.add_parser("list")
+    ls = sub.add_parser("list")
+    ls.add_argument("--prefix", default="", help="tylko tablice zaczynające się od (np. ERA)")
+    ls.add_argument("--tag", help="tylko wpisy z tym tagiem")
+    ls.add_argument("--limit", type=int, help="najwyżej tyle wpisów")
+
+    imp = sub.add_parser("import", help="wczytaj wpisy (upsert) jednym zapisem/transakcją")
+    imp.add_argument("file", help="plik CSV/JSONL albo - (stdin)")
+    imp.add_argument("--format", choices=FORMATS, default="auto")
+
+    exp = sub.add_parser("export", help="zapisz wpisy strumieniowo")
+    exp.add_argument("file", help="plik CSV/JSONL albo - (stdout)")
+    exp.add_argument("--format", choices=FORMATS, default="auto")
+    exp.add_argument("--prefix", default="")
+    exp.add_argument("--tag")
+
+    dm = sub.add_parser("delete-many", help="usuń tablice z pliku (pierwsza kolumna CSV / pole plate w JSONL)")
+    dm.add_argument("file")
+    dm.add_argument("--format", choices=FORMATS, default="auto")
 
     args = p.parse_args()
 
@@ -25,9 +149,32 @@ def main():
         ok = delete_plate(args.plate.upper().replace(" ", ""))
         print("OK" if ok else "NOT_FOUND")
     elif args.cmd == "list":
-        db = load_plates_db()
-        for k, v in db.items():
+        items = iter_plates(prefix=args.prefix, tag=args.tag)
+        if args.limit is not None:
+            items = itertools.islice(items, args.limit)
+        for k, v in items:
             print(k, v)
+    elif args.cmd == "import":
+        t0 = time.perf_counter()
+        try:
+            with _open(args.file, "r") as f:
+                n = upsert_many(read_rows(f, _detect_format(args.file, args.format)))
+        except ValueError as e:
+            print(f"[ERR] {args.file}: {e} – nic nie zapisano", file=sys.stderr)
+            sys.exit(2)
+        print(f"OK: {n} wpisów ({time.perf_counter() - t0:.2f} s)", file=sys.stderr)
+    elif args.cmd == "export":
+        with _open(args.file, "w") as f:
+            n = write_rows(f, _detect_format(args.file, args.format), iter_plates(prefix=args.prefix, tag=args.tag))
+        print(f"OK: {n} wpisów", file=sys.stderr)
+    elif args.cmd == "delete-many":
+        try:
+            with _open(args.file, "r") as f:
+                n = delete_many(plate for plate, _, _ in read_rows(f, _detect_format(args.file, args.format)))
+        except ValueError as e:
+            print(f"[ERR] {args.file}: {e} – nic nie usunięto", file=sys.stderr)
+            sys.exit(2)
+        print(f"OK: usunięto {n}", file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -1,28 +1,24 @@
 import argparse
 import csv
+import hashlib
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 import cv2
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
-from app.ocr import PlateOcr
+from app.ocr import PLATE_PROFILE, PlateOcr
 
+# podbić, gdy zmieni się coś, co wpływa na surowe wyjście EasyOCR (preprocess, lokalizator, ...)
+# 2: read_raw czyta pełny kadr, gdy wycinki ROI nie dały tablicy
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "ocr_eval"
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--images", required=True, help="folder z obrazami (np. samples/)")
-    ap.add_argument("--labels", required=True, help="labels.csv: filename,plate")
-    ap.add_argument("--no-pre", action="store_true", help="wyłącz preprocessing (wariant A)")
-    args = ap.parse_args()
-
-    images_dir = Path(args.images)
-    labels_path = Path(args.labels)
-
-    ocr = PlateOcr(use_preprocessing=not args.no_pre, gpu=False)
-
-    y_true = []
-    y_pred = []
 
+def iter_labels(labels_path: Path):
     with labels_path.open("r", encoding="utf-8") as f:
         r = csv.reader(f)
         for row in r:
@@ -30,18 +26,187 @@ def main():
                 continue
             fname = row[0].strip()
             plate = row[1].strip().upper().replace(" ", "")
+            yield fname, plate
+
+
+def settings_key(use_pre: bool, use_locator: bool, profile=None, batch_size: int = 1) -> str:
+    # cache surowych odczytów zależy tylko od tego, co widzi EasyOCR – nie od post-processingu.
+    # Ścieżka też: batch_size <= 1 -> read_raw (ROI + fallback), większe -> readtext_batched,
+    # gdzie parametry detektora liczone są z rozmiaru slotu paczki (zależy od batch_size)
+    path = "read_raw" if batch_size <= 1 else f"batched;bs={batch_size}"
+    s = f"v={CACHE_VERSION};pre={int(use_pre)};loc={int(use_locator)};langs=en;path={path}"
+    if profile is not None:
+        s += f";profile={profile!r}"
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()[:12]
+
+
+class RawCache:
+    """
+    Surowe wyjścia EasyOCR w JSONL (dopisywane na bieżąco, flush po każdym wpisie),
+    klucz = sha1 zawartości obrazu. Przerwany run wznawia się od pierwszego brakującego obrazu.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._data = {}
+        if path.exists():
+            with path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # urwana ostatnia linia po przerwaniu
+                    self._data[rec["key"]] = rec["raw"]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = path.open("a", encoding="utf-8")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str):
+        return self._data.get(key)
+
+    def put(self, key: str, raw) -> None:
+        raw = [[list(box) if box is not None else None, text, conf] for box, text, conf in raw]
+        self._data[key] = raw
+        self._f.write(json.dumps({"key": key, "raw": raw}, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+# --- strona procesu roboczego: jeden PlateOcr (jeden reader) na proces ---
+
+_worker_ocr = None
+
+
+def _init_worker(use_pre: bool, profile) -> None:
+    global _worker_ocr
+    _worker_ocr = PlateOcr(use_preprocessing=use_pre, gpu=False, profile=profile)
+
+
+def _ocr_chunk(chunk, batch_size: int, ocr=None):
+    # -> ([(klucz, surowy wynik)], [ścieżki, których cv2 nie zdekodował])
+    ocr = ocr or _worker_ocr
+    keys, images, unreadable = [], [], []
+    for key, path in chunk:
+        img = cv2.imread(path)
+        if img is None:
+            print(f"\nWARNING: nie mogę zdekodować {path}")
+            unreadable.append(path)
+            continue
+        keys.append(key)
+        images.append(img)
+    if not images:
+        return [], unreadable
+    if batch_size <= 1:
+        raws = [ocr.read_raw(img) for img in images]
+    else:
+        raws = ocr.read_plates_raw(images, batch_size=batch_size)
+    return list(zip(keys, raws)), unreadable
 
-            img_path = images_dir / fname
-            img = cv2.imread(str(img_path))
-            if img is None:
-                print(f"WARNING: nie mogę wczytać {img_path}")
-                continue
 
-            res = ocr.read_plate(img)
-            pred = (res.plate or "").upper().replace(" ", "")
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--images", required=True, help="folder z obrazami (np. samples/)")
+    ap.add_argument("--labels", required=True, help="labels.csv: filename,plate")
+    ap.add_argument("--no-pre", action="store_true", help="wyłącz preprocessing (wariant A)")
+    ap.add_argument("--default-ocr", action="store_true",
+                    help="EasyOCR z domyślnymi parametrami zamiast profilu tablic (PLATE_PROFILE)")
+    ap.add_argument("--batch-size", type=int, default=8,
+                    help="ile obrazów naraz do PlateOcr.read_plates_raw (1 = pojedynczo)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="liczba procesów OCR (każdy z własnym readerem EasyOCR)")
+    ap.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR),
+                    help="katalog cache surowych odczytów EasyOCR")
+    ap.add_argument("--no-cache", action="store_true", help="nie czytaj istniejącego cache (nadpisz od zera)")
+    args = ap.parse_args()
 
-            y_true.append(plate)
-            y_pred.append(pred)
+    images_dir = Path(args.images)
+    labels_path = Path(args.labels)
+    use_pre = not args.no_pre
+    batch_size = max(1, args.batch_size)
+    profile = None if args.default_ocr else PLATE_PROFILE
+
+    ocr = PlateOcr(use_preprocessing=use_pre, gpu=False, profile=profile)
+
+    cache_path = Path(args.cache_dir) / f"raw_{settings_key(use_pre, ocr.use_locator, profile, batch_size)}.jsonl"
+    if args.no_cache and cache_path.exists():
+        cache_path.unlink()
+    cache = RawCache(cache_path)
+
+    t_start = time.perf_counter()
+
+    # 1) klucze (hash zawartości) – tanie, robione zawsze
+    samples = []  # (plate, key)
+    todo = {}     # key -> ścieżka (bez duplikatów)
+    for fname, plate in iter_labels(labels_path):
+        img_path = images_dir / fname
+        try:
+            data = img_path.read_bytes()
+        except OSError:
+            print(f"WARNING: nie mogę wczytać {img_path}")
+            continue
+        key = hashlib.sha1(data).hexdigest()
+        samples.append((plate, key))
+        if key not in cache and key not in todo:
+            todo[key] = str(img_path)
+
+    print(f"Obrazów: {len(samples)}, w cache: {len(samples) - len(todo)}, do OCR: {len(todo)}")
+
+    # 2) OCR tylko dla brakujących, wyniki do cache od razu (wznawialne)
+    items = list(todo.items())
+    chunks = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    done = 0
+    unreadable = []
+    t_ocr = time.perf_counter()
+
+    def store(out):
+        nonlocal done
+        results, bad = out
+        for key, raw in results:
+            cache.put(key, raw)
+        unreadable.extend(bad)
+        done += len(results) + len(bad)
+        print(f"  OCR {done}/{len(items)}", end="\r", flush=True)
+
+    try:
+        if args.workers > 1 and chunks:
+            with ProcessPoolExecutor(
+                max_workers=args.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(use_pre, profile),
+            ) as pool:
+                futures = [pool.submit(_ocr_chunk, chunk, batch_size) for chunk in chunks]
+                for fut in as_completed(futures):
+                    store(fut.result())
+        else:
+            for chunk in chunks:
+                store(_ocr_chunk(chunk, batch_size, ocr=ocr))
+    finally:
+        cache.close()
+    ocr_s = time.perf_counter() - t_ocr
+    if items:
+        print()
+    if unreadable:
+        print(f"Nieczytelne obrazy (pominięte w ocenie): {len(unreadable)}")
+
+    # 3) post-processing zawsze z cache – zmiany PLATE_RE / oceny kandydatów bez ponownego OCR
+    y_true = []
+    y_pred = []
+    for plate, key in samples:
+        raw = cache.get(key)
+        if raw is None:
+            continue  # nieczytelny obraz
+        res = PlateOcr.result_from_raw(raw)
+        y_true.append(plate)
+        y_pred.append((res.plate or "").upper().replace(" ", ""))
+    total_s = time.perf_counter() - t_start
 
     if not y_true:
         print("Brak danych do ewaluacji.")
@@ -57,6 +222,8 @@ def main():
     print("Precision:", precision_score(y_bin_true, y_bin_pred, zero_division=0))
     print("Recall:", recall_score(y_bin_true, y_bin_pred, zero_division=0))
     print("F1:", f1_score(y_bin_true, y_bin_pred, zero_division=0))
+    print(f"Images/s (OCR): {len(items) / ocr_s:.2f}" if items and ocr_s > 0 else "Images/s (OCR): — (wszystko z cache)")
+    print(f"Images/s (całość): {len(correct) / total_s:.2f}")
 
 
 if __name__ == "__main__":
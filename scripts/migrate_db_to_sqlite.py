@@ -0,0 +1,44 @@
+import argparse
+import time
+from pathlib import Path
+
+from app.db import PLATES_DB_PATH, PLATES_SQLITE_PATH, JsonBackend
+from app.db_sqlite import SqliteBackend
+
+# Jednorazowa migracja data/plates_db.json -> data/plates_db.sqlite.
+# Po migracji app.db sam wybiera SQLite (plik istnieje); JSON zostaje jako kopia.
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--json", default=str(PLATES_DB_PATH), help="źródło (plates_db.json)")
+    ap.add_argument("--sqlite", default=str(PLATES_SQLITE_PATH), help="cel (plates_db.sqlite)")
+    ap.add_argument("--force", action="store_true", help="nadpisz istniejącą bazę SQLite")
+    args = ap.parse_args()
+
+    src, dst = Path(args.json), Path(args.sqlite)
+    if not src.exists():
+        raise SystemExit(f"Brak pliku: {src}")
+    if dst.exists():
+        if not args.force:
+            raise SystemExit(f"{dst} już istnieje (użyj --force, aby nadpisać)")
+        for suffix in ("", "-wal", "-shm"):
+            Path(str(dst) + suffix).unlink(missing_ok=True)
+
+    t0 = time.perf_counter()
+    json_db = JsonBackend(src)
+    sqlite_db = SqliteBackend(dst)
+    try:
+        sqlite_db.upsert_many((plate, v["opis"], v["tag"]) for plate, v in json_db.items())
+        n_src, n_dst = json_db.count(), sqlite_db.count()
+    finally:
+        sqlite_db.close()
+        json_db.close()  # zatrzymuje wątek obserwujący plik
+
+    print(f"[OK] {n_dst} wpisów -> {dst} ({time.perf_counter() - t0:.2f} s)")
+    if n_src != n_dst:
+        print(f"WARNING: w JSON {n_src} wpisów, w SQLite {n_dst}")
+
+
+if __name__ == "__main__":
+    main()
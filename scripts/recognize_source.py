@@ -0,0 +1,108 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from PyQt6.QtCore import QCoreApplication
+
+from app.gui import OcrWorker
+from app.alerts import open_alert_engine
+from app.db import exact_tag
+from app.sightings import SightingLog, parse_time
+from app.sources import open_source
+
+# Rozpoznawanie z pliku wideo lub katalogu obrazów bez okna – ten sam potok co w GUI
+# (OcrWorker: kaskada OCR, tracker, region, baza). Wynik: JSONL, jedna klatka w linii,
+# ze znacznikiem czasu w nagraniu (t_ms). Dziennik widzeń dostaje czas epoki: --epoch + t_ms.
+#   python -m scripts.recognize_source nagranie.mp4 --stride 5 --out wyniki.jsonl
+#   python -m scripts.recognize_source zdjecia/ --changes-only
+#   python -m scripts.recognize_source nagranie.mp4 --sightings data/sightings.sqlite --epoch 2026-10-16T08:00
+
+
+def result_row(data: dict) -> dict:
+    return {
+        "t_ms": round(float(data.get("source_t_ms") or 0.0), 1),
+        "index": data.get("source_index"),
+        "name": data.get("source_name"),
+        "plate": data.get("plate"),
+        "confidence": round(float(data.get("confidence") or 0.0), 4),
+        "frame_plate": data.get("frame_plate"),
+        "region": data.get("region"),
+        "skipped": bool(data.get("skipped")),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rozpoznawanie tablic z pliku wideo / katalogu obrazów")
+    ap.add_argument("source", help="plik wideo, katalog obrazów albo screen:x,y,w,h")
+    ap.add_argument("--stride", type=int, default=1, help="co która klatka / który obraz")
+    ap.add_argument("--speed", type=float, default=0.0, help="tempo: 0 = maks., 1 = czas rzeczywisty nagrania")
+    ap.add_argument("--start-ms", type=float, default=0.0, help="przewiń do tej pozycji przed startem")
+    ap.add_argument("--fps", type=float, default=1.0, help="katalog obrazów: obrazy na sekundę osi czasu")
+    ap.add_argument("--no-pre", action="store_true", help="bez preprocessingu (jak odznaczony checkbox w GUI)")
+    ap.add_argument("--changes-only", action="store_true", help="tylko klatki, w których zmieniła się tablica")
+    ap.add_argument("--out", help="plik JSONL (domyślnie stdout)")
+    ap.add_argument("--alerts", metavar="RULES", help="reguły listy obserwowanych (np. data/alert_rules.json)")
+    ap.add_argument("--sightings", metavar="DB", help="dopisz widzenia do dziennika SQLite (np. data/sightings.sqlite)")
+    ap.add_argument("--epoch", type=parse_time, metavar="CZAS",
+                    help="początek nagrania (t=0) dla dziennika: data ISO albo ms epoki; domyślnie chwila startu")
+    args = ap.parse_args()
+
+    try:
+        source = open_source(args.source, stride=args.stride, fps=args.fps, start_ms=args.start_ms)
+    except (OSError, ValueError) as e:
+        print(f"[ERR] {e}", file=sys.stderr)
+        sys.exit(2)
+
+    app = QCoreApplication(sys.argv[:1])
+    out = Path(args.out).open("w", encoding="utf-8") if args.out else sys.stdout
+    state = {"last": None, "rows": 0, "errors": 0}
+    log = SightingLog(args.sightings) if args.sightings else None
+    alerts = open_alert_engine(args.alerts) if args.alerts else None
+    source_name = Path(args.source.rstrip("/\\")).name
+    # dziennik trzyma ms epoki (jak GUI z ekranu) – oś nagrania przesunięta o jego początek
+    epoch_ms = args.epoch if args.epoch is not None else time.time() * 1000.0 - args.start_ms
+
+    def on_result(data: dict):
+        row = result_row(data)
+        if log is not None:
+            log.observe(row["plate"], row["confidence"], epoch_ms + row["t_ms"], region=row["region"],
+                        tag=exact_tag(data), source=source_name)
+        if alerts is not None and row["plate"]:
+            fired = alerts.evaluate(row["plate"], tag=exact_tag(data), region=row["region"],
+                                    confidence=row["confidence"])
+            row["alerts"] = [a.rule for a in fired]
+        if args.changes_only:
+            if row["plate"] == state["last"]:
+                return
+            state["last"] = row["plate"]
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        state["rows"] += 1
+
+    def on_error(msg: str):
+        state["errors"] += 1
+        print(f"[ERR] {msg}", file=sys.stderr)
+
+    worker = OcrWorker()
+    worker.resultReady.connect(on_result)
+    worker.error.connect(on_error)
+    worker.finished.connect(app.quit)
+    worker.configure(region=None, interval_ms=0, use_preprocessing=not args.no_pre,
+                     preview_fps=0.0, source=source, speed=args.speed)
+    worker.start()
+    app.exec()
+
+    if out is not sys.stdout:
+        out.close()
+    if log is not None:
+        log.close()
+    if alerts is not None:
+        alerts.close()
+    print(f"[OK] {source.describe()}: {state['rows']} wierszy, "
+          f"koniec źródła: {worker.source_finished}", file=sys.stderr)
+    sys.exit(1 if state["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
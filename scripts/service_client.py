@@ -0,0 +1,65 @@
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+
+# Klient testowy dla app/service.py (lokalnie, bez GUI):
+#   python scripts/service_client.py samples/ --concurrency 8
+#   python scripts/service_client.py samples/a.png --raw
+
+
+def post_image(url: str, path: Path, raw: bool, timeout: float = 60.0):
+    if raw:
+        img = cv2.imread(str(path))
+        if img is None:
+            return 0, {"error": "nie mogę wczytać"}
+        h, w = img.shape[:2]
+        data = img.tobytes()
+        headers = {"Content-Type": "application/x-raw-bgr", "X-Width": str(w), "X-Height": str(h)}
+    else:
+        data = path.read_bytes()
+        headers = {"Content-Type": "application/octet-stream"}
+
+    req = urllib.request.Request(url.rstrip("/") + "/recognize", data=data, headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("paths", nargs="+", help="obrazy lub katalogi z obrazami")
+    ap.add_argument("--url", default="http://127.0.0.1:8765")
+    ap.add_argument("--raw", action="store_true", help="wyślij surowy bufor BGR zamiast pliku")
+    ap.add_argument("--concurrency", type=int, default=1)
+    args = ap.parse_args()
+
+    files = []
+    for p in map(Path, args.paths):
+        if p.is_dir():
+            files.extend(sorted(f for f in p.iterdir() if f.suffix.lower() in (".png", ".jpg", ".jpeg", ".bmp")))
+        else:
+            files.append(p)
+
+    t0 = time.perf_counter()
+    codes = {}
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        for path, (code, payload) in zip(files, pool.map(lambda f: post_image(args.url, f, args.raw), files)):
+            codes[code] = codes.get(code, 0) + 1
+            print(f"{path.name}: {code} {json.dumps(payload, ensure_ascii=False)}")
+    dt = time.perf_counter() - t0
+
+    print(f"Obrazów: {len(files)}, kody: {codes}, {len(files) / dt:.2f} obr/s" if dt > 0 else "")
+    with urllib.request.urlopen(args.url.rstrip("/") + "/metrics", timeout=10) as resp:
+        print(json.dumps(json.loads(resp.read()), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
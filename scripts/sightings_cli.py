@@ -0,0 +1,50 @@
+import argparse
+import json
+import sys
+from datetime import datetime
+
+from app.sightings import SIGHTINGS_PATH, SightingLog, parse_time
+
+# Zapytania do dziennika przejazdów (data/sightings.sqlite), wynik JSONL na stdout.
+#   python -m scripts.sightings_cli --plate KR12345
+#   python -m scripts.sightings_cli --since 2026-10-16T08:00 --until 2026-10-16T09:00 --tag DEMO
+#   python -m scripts.sightings_cli --source nagranie.mp4 --since 2026-10-16T08:00
+
+
+def _iso(ms: float) -> str:
+    # małe wartości – oś czasu nagrania z dzienników sprzed przejścia plików na czas epoki
+    if ms < 1e11:
+        return f"{ms / 1000.0:.2f}s"
+    return datetime.fromtimestamp(ms / 1000.0).isoformat(timespec="seconds")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Dziennik przejazdów: zapytania")
+    ap.add_argument("--db", default=str(SIGHTINGS_PATH))
+    ap.add_argument("--plate")
+    ap.add_argument("--tag")
+    ap.add_argument("--source")
+    ap.add_argument("--since", type=parse_time)
+    ap.add_argument("--until", type=parse_time)
+    ap.add_argument("--limit", type=int, default=1000)
+    ap.add_argument("--count", action="store_true", help="tylko liczba widzeń w bazie")
+    args = ap.parse_args()
+
+    log = SightingLog(args.db)
+    try:
+        if args.count:
+            print(log.count())
+            return
+        rows = log.query(plate=args.plate.upper().replace(" ", "") if args.plate else None,
+                         since_ms=args.since, until_ms=args.until, tag=args.tag,
+                         source=args.source, limit=args.limit)
+        for s in rows:
+            rec = s.as_dict()
+            rec["first"], rec["last"] = _iso(s.first_ms), _iso(s.last_ms)
+            sys.stdout.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    finally:
+        log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+app/alerts.py: kompilacja reguł (RuleSet), kolejność dopasowań w match, debounce w AlertEngine
+i tag z bazy tylko dla dokładnego trafienia (app/db.py: lookup_plate + exact_tag).
+"""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app import db
+from app.alerts import AlertEngine, Rule, RuleSet, load_rules
+from app.db import JsonBackend, exact_tag, find_similar_plates, fuzzy_match, lookup_plate
+
+
+def _rules(*dicts):
+    return RuleSet([Rule.from_dict(d) for d in dicts])
+
+
+def test_rule_from_dict_needs_exactly_one_kind():
+    r = Rule.from_dict({"plate": "wa 12345", "max_dist": 1})
+    assert (r.name, r.kind, r.value, r.max_dist, r.sinks) == ("plate:wa 12345", "plate", "wa 12345", 1.0, None)
+    with pytest.raises(ValueError):
+        Rule.from_dict({"name": "nic"})
+    with pytest.raises(ValueError):
+        Rule.from_dict({"name": "dwa", "plate": "WA12345", "tag": "x"})
+
+
+def test_load_rules_reads_config(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"debounce_s": 5, "rules": [{"tag": "Nieoznakowani", "sinks": ["log"]}]}),
+                    encoding="utf-8")
+    rules, config = load_rules(path)
+    assert config["debounce_s"] == 5
+    assert [(r.name, r.kind, r.sinks) for r in rules] == [("tag:Nieoznakowani", "tag", ["log"])]
+
+
+def test_ruleset_compiles_to_lookup_tables():
+    rs = _rules({"plate": "wa 12345", "max_dist": 1.0}, {"plate": "KR1", "name": "dokładna"},
+                {"tag": " Nieoznakowani "}, {"prefix": "kraxyz"},
+                {"powiat": "Kraków"}, {"voivodeship": "mazowieckie"})
+    assert len(rs) == 6
+    assert set(rs.by_plate) == {"WA12345", "KR1"}
+    assert set(rs.fuzzy_rules) == {"WA12345"}      # tylko reguły z max_dist > 0
+    assert set(rs.by_tag) == {"nieoznakowani"}      # casefold + strip
+    assert set(rs.by_prefix) == {"KRA"}             # najwyżej 3 znaki
+    assert "Kraków / małopolskie" in rs.by_region
+    assert "Warszawa / mazowieckie" in rs.by_region  # województwo rozwinięte na powiaty z mapy
+    assert "Kraków / małopolskie" not in [n for n, rules in rs.by_region.items()
+                                         if any(r.kind == "voivodeship" for r in rules)]
+
+
+def test_match_order_and_each_rule_once():
+    rs = _rules({"name": "lista", "plate": "KR12345", "max_dist": 1.0},
+                {"name": "tag", "tag": "nieoznakowani"},
+                {"name": "p1", "prefix": "K"}, {"name": "p3", "prefix": "KR1"},
+                {"name": "krakow", "powiat": "Kraków"})
+    hits = rs.match("kr 12345", tag="Nieoznakowani")
+    # dokładna tablica, tag, prefiksy od najdłuższego, region; reguła plate nie wraca z indeksu przybliżonego
+    assert [(r.name, matched, d) for r, matched, d in hits] == [
+        ("lista", "KR12345", 0.0), ("tag", "Nieoznakowani", 0.0),
+        ("p3", "KR1", 0.0), ("p1", "K", 0.0), ("krakow", "Kraków / małopolskie", 0.0)]
+    assert rs.match("") == [] and rs.match(None) == []
+
+
+def test_match_fuzzy_respects_rule_max_dist():
+    rs = _rules({"name": "szeroka", "plate": "WA12345", "max_dist": 1.0},
+                {"name": "wąska", "plate": "WA12345", "max_dist": 0.4})
+    # S/5 to tania pomyłka OCR (0.4), zamiana dowolnej litery – pełny koszt 1.0
+    assert {(r.name, m) for r, m, _ in rs.match("WA1234S")} == {("szeroka", "WA12345"), ("wąska", "WA12345")}
+    hits = rs.match("WA12346")
+    assert [(r.name, m, d) for r, m, d in hits] == [("szeroka", "WA12345", 1.0)]
+    assert rs.match("GD99999") == []
+
+
+def test_region_argument_overrides_plate_prefix():
+    rs = _rules({"name": "krakow", "powiat": "Kraków"})
+    assert rs.match("WA12345") == []
+    assert [r.name for r, _, _ in rs.match("WA12345", region="Kraków / małopolskie")] == ["krakow"]
+
+
+def test_engine_debounces_per_plate_and_rule():
+    engine = AlertEngine(_rules({"name": "kra", "prefix": "KR"}, {"name": "wa", "plate": "WA12345"}),
+                         debounce_s=10.0)
+    assert [a.rule for a in engine.evaluate("KR11111", now=100.0)] == ["kra"]
+    assert engine.evaluate("KR11111", now=105.0) == []          # ta sama tablica + reguła
+    assert [a.rule for a in engine.evaluate("KR22222", now=105.0)] == ["kra"]  # inna tablica
+    assert [a.plate for a in engine.evaluate("kr 11111", now=110.5)] == ["KR11111"]  # po debounce_s
+    assert engine.evaluate("GD12345", now=111.0) == []
+    assert (engine.fired, engine.suppressed) == (3, 1)
+
+    a = engine.evaluate("WA12345", confidence=0.8, region="Warszawa / mazowieckie", now=120.0)[0]
+    assert (a.rule, a.kind, a.matched, a.confidence, a.region) == ("wa", "plate", "WA12345", 0.8,
+                                                                   "Warszawa / mazowieckie")
+
+
+def test_engine_sinks_get_alerts_in_background():
+    got = []
+
+    class Sink:
+        name = "log"
+
+        def __call__(self, alert):
+            got.append(alert.plate)
+
+    class Other(Sink):
+        name = "webhook"
+
+    engine = AlertEngine(_rules({"name": "tylko-log", "plate": "WA12345", "sinks": ["log"]}),
+                         sinks=[Sink(), Other()])
+    engine.evaluate("WA12345")
+    engine.close()
+    assert got == ["WA12345"]
+
+
+@pytest.fixture
+def plates_db(tmp_path):
+    path = tmp_path / "plates.json"
+    path.write_text(json.dumps({"ERAZ5TM": {"opis": "sąsiad", "tag": "nieoznakowani"},
+                                "KR12345": {"opis": "swój", "tag": "nieoznakowani"}}), encoding="utf-8")
+    db.set_backend(JsonBackend(path, revalidate_s=0))
+    yield
+    db.set_backend(None)
+
+
+def _payload(plate):
+    # jak OcrWorker._emit: db_info tylko dla dokładnego trafienia, wpis sąsiada osobno
+    info, similar = lookup_plate(plate)
+    return {"plate": plate, "db_info": info, "db_fuzzy": fuzzy_match(similar) if info is None else None}
+
+
+def test_plate_missing_from_db_does_not_fire_tag_rule(plates_db):
+    engine = AlertEngine(_rules({"name": "nieoznakowani", "tag": "nieoznakowani"}))
+    find_similar_plates("ERA25TM")  # zbuduj indeks przybliżony od razu (ścieżka klatki nie czeka)
+
+    data = _payload("ERA25TM")
+    assert data["db_info"] is None
+    assert data["db_fuzzy"]["match"] == "ERAZ5TM" and data["db_fuzzy"]["tag"] == "nieoznakowani"
+    assert exact_tag(data) is None
+    assert exact_tag({"db_info": data["db_fuzzy"]}) is None  # wpis z fuzzy_match nigdy nie daje tagu
+    assert engine.evaluate("ERA25TM", tag=exact_tag(data)) == []
+
+    data = _payload("KR12345")
+    assert exact_tag(data) == "nieoznakowani"
+    assert [a.rule for a in engine.evaluate("KR12345", tag=exact_tag(data))] == ["nieoznakowani"]
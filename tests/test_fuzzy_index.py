@@ -0,0 +1,143 @@
+"""
+app/fuzzy_index.py: sklejanie pomyłek OCR, ważona odległość, add/remove z przebudową
+oraz unieważnianie indeksu w app/db.py po zapisach do SQLite z innego połączenia.
+"""
+from __future__ import annotations
+
+import sqlite3
+import time
+
+import pytest
+
+from app import db
+from app import fuzzy_index as fi
+from app.db_sqlite import SqliteBackend
+from app.fuzzy_index import CONFUSION_COST, FuzzyPlateIndex, fold, weighted_distance
+
+KEYS = ["ERA25TM", "KR12345", "WA00001", "GD5S123"]
+
+
+def test_fold_glues_ocr_confusions():
+    assert fold("OIZS") == "0125"
+    assert fold("0125") == "0125"
+    assert fold("ERAZ5TM") == fold("ERA25TM") == fold("ERA2STM")
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("ERAZ5TM", [("ERA25TM", CONFUSION_COST)]),      # Z/2
+    ("KRI2345", [("KR12345", CONFUSION_COST)]),      # I/1
+    ("WA0O001", [("WA00001", CONFUSION_COST)]),      # O/0
+    ("GD55123", [("GD5S123", CONFUSION_COST)]),      # S/5
+    ("GDSS123", [("GD5S123", CONFUSION_COST)]),      # jedna para pomyłki, jedna zgodna
+    ("KR1234", [("KR12345", 1.0)]),                  # usunięcie
+    ("KR123456", [("KR12345", 1.0)]),                # wstawienie
+    ("KR12346", [("KR12345", 1.0)]),                 # zwykła podmiana
+    ("PO99999", []),
+])
+def test_search_finds_confusions_cheaply(query, expected):
+    assert FuzzyPlateIndex(KEYS).search(query, max_dist=1.0) == expected
+
+
+def test_search_respects_max_dist_and_k():
+    index = FuzzyPlateIndex(["KR12345", "KR12346", "KR12347", "KRI2345"])
+    assert index.search("KR12345", max_dist=0.5) == [("KR12345", 0.0), ("KRI2345", CONFUSION_COST)]
+    assert [k for k, _ in index.search("KR12345", max_dist=1.0, k=3)] == ["KR12345", "KRI2345", "KR12346"]
+    assert index.search("") == []
+
+
+def test_weighted_distance():
+    assert weighted_distance("WA12345", "WA12345") == 0.0
+    assert weighted_distance("WA12345", "WA1234S") == CONFUSION_COST
+    assert weighted_distance("WA12345", "WA12346") == 1.0
+    assert weighted_distance("WA12345", "WA1245") == 1.0
+    assert weighted_distance("WA12345", "WAX12345") == 1.0
+    assert weighted_distance("WAOI2345", "WA012345", max_dist=1.0) == pytest.approx(2 * CONFUSION_COST)
+    # ponad max_dist -> inf (przerwane wcześniej), bez limitu – pełny Levenshtein
+    assert weighted_distance("WA12345", "WA19995", max_dist=1.0) == float("inf")
+    assert weighted_distance("WA12345", "WA1", max_dist=1.0) == float("inf")
+    assert weighted_distance("WA12345", "WA19995") == 3.0
+    assert weighted_distance("AB", "BA") == 2.0
+
+
+def test_max_deletes_two_reaches_distance_two():
+    index = FuzzyPlateIndex(["KR12345"], max_deletes=2)
+    assert index.search("KR12399", max_dist=2.0) == [("KR12345", 2.0)]
+    assert FuzzyPlateIndex(["KR12345"]).search("KR12399", max_dist=2.0) == []
+    with pytest.raises(ValueError):
+        FuzzyPlateIndex(max_deletes=3)
+
+
+def test_add_and_remove_without_rebuild():
+    index = FuzzyPlateIndex(KEYS)
+    index.add("PO77777")
+    index.add("PO77777")  # drugi raz bez zmian
+    index.add("")
+    assert len(index) == 5
+    assert index.search("P077777") == [("PO77777", CONFUSION_COST)]
+
+    assert index.remove("KR12345") is True
+    assert index.remove("KR12345") is False
+    assert index.remove("XX00000") is False
+    assert len(index) == 4
+    assert index.search("KR12345") == []
+
+    index.add("KR12345")  # ponownie po usunięciu
+    assert index.search("KR12345") == [("KR12345", 0.0)]
+
+
+def test_compaction_keeps_results(monkeypatch):
+    monkeypatch.setattr(fi, "COMPACT_MIN", 4)
+    index = FuzzyPlateIndex(KEYS)
+    added = [f"KR{i:05d}" for i in range(30)]
+    for k in added:
+        index.add(k)
+    for k in added[::2]:
+        assert index.remove(k)
+    for k in added[1::2]:
+        index.add(k)  # już jest – bez duplikatu
+    # delta przekroczyła próg -> przebudowa do głównej tablicy hashy
+    assert index._extra_count <= 4 and len(index._removed) <= 4
+    assert len(index) == len(KEYS) + 15
+    assert index.search("KR00003", max_dist=0.0) == [("KR00003", 0.0)]
+    assert index.search("KR00002", max_dist=0.0) == []
+    assert index.search("ERAZ5TM") == [("ERA25TM", CONFUSION_COST)]
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    backend = SqliteBackend(tmp_path / "plates.sqlite", revalidate_s=0.01)
+    db.set_backend(backend)
+    yield backend
+    db.set_backend(None)
+
+
+def _external_upsert(path, plate):
+    # inny proces (db_cli import, migracja): własne połączenie, poza API app.db
+    conn = sqlite3.connect(str(path))
+    with conn:
+        conn.execute("INSERT INTO plates (plate, opis, tag) VALUES (?, '', '')", (plate,))
+    conn.close()
+
+
+def test_sqlite_generation_bumps_only_on_external_writes(sqlite_db):
+    g0 = sqlite_db.generation
+    db.upsert_plate("ERA25TM", "opis", "tag")
+    time.sleep(0.02)
+    assert sqlite_db.generation == g0  # własny zapis – indeks aktualizowany przez add()
+
+    _external_upsert(sqlite_db.path, "KR12345")
+    time.sleep(0.02)
+    assert sqlite_db.generation == g0 + 1
+    time.sleep(0.02)
+    assert sqlite_db.generation == g0 + 1
+
+
+def test_fuzzy_index_rebuilt_after_external_write(sqlite_db):
+    db.upsert_plate("ERA25TM", "", "")
+    assert db.find_similar_plates("ERAZ5TM") == [("ERA25TM", CONFUSION_COST)]
+    db.upsert_plate("WA00001", "", "")  # przez API – od razu w indeksie
+    assert db.find_similar_plates("WA0O001") == [("WA00001", CONFUSION_COST)]
+
+    _external_upsert(sqlite_db.path, "KR12345")
+    time.sleep(0.02)  # następne sprawdzenie data_version (revalidate_s)
+    assert db.find_similar_plates("KRI2345") == [("KR12345", CONFUSION_COST)]
@@ -0,0 +1,67 @@
+"""
+app/ocr.py: wspólny reader z puli wołany z kilku wątków (OcrWorker, RecognitionService, rozgrzewka).
+"""
+from __future__ import annotations
+
+import threading
+import time
+
+import numpy as np
+
+from app import ocr as ocr_mod
+from app.ocr import PlateOcr
+
+
+class CountingReader:
+    """Atrapa readera, która notuje największą liczbę jednoczesnych wywołań."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def _call(self, img):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.005)
+        with self._lock:
+            self.active -= 1
+        h, w = img.shape[:2]
+        return [([[0, 0], [w, 0], [w, h], [0, h]], "WA 12345", 0.9)]
+
+    def readtext(self, img, **kw):
+        return self._call(img)
+
+    def recognize(self, img, **kw):
+        return self._call(img)
+
+    def readtext_batched(self, imgs, **kw):
+        return [self._call(img) for img in imgs]
+
+
+def test_reader_calls_are_serialized_across_threads_and_instances(monkeypatch):
+    reader = CountingReader()
+    monkeypatch.setitem(ocr_mod._readers, (("en",), False), reader)
+    img = np.full((40, 160, 3), 255, dtype=np.uint8)
+    errors = []
+
+    def run(ocr: PlateOcr, i: int):
+        try:
+            for _ in range(5):
+                if i % 3 == 2:
+                    ocr.read_plates([img, img], batch_size=2)
+                else:
+                    assert ocr.read_plate(img).plate == "WA12345"
+        except Exception as e:  # pragma: no cover - widoczne w asercji niżej
+            errors.append(e)
+
+    # dwie instancje PlateOcr na tym samym readerze z puli
+    instances = [PlateOcr(gpu=False), PlateOcr(gpu=False, use_preprocessing=False)]
+    threads = [threading.Thread(target=run, args=(instances[i % 2], i)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10.0)
+    assert errors == []
+    assert reader.max_active == 1
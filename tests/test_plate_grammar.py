@@ -0,0 +1,76 @@
+"""
+app/plate_grammar.py: układy PATTERNS_2/PATTERNS_3, naprawa pomyłek OCR, fallback REGEX_ONLY
+oraz filtr w PlateOcr.result_from_raw (teksty od cyfry bez naprawy gramatyki to nie tablice).
+"""
+from __future__ import annotations
+
+import pytest
+
+from app.ocr import PlateOcr
+from app.plate_grammar import PATTERNS_2, PATTERNS_3, REGEX_ONLY, rank_plates, score_candidates
+from app.recognizer import PL_PLATE_RX
+
+
+def _layout(prefix: str, pattern: str) -> str:
+    # L/D -> kolejne litery z SUFFIX_LETTERS / cyfry, np. ("KR", "DDDLL") -> KR123AC
+    letters, digits = iter("ACEFG"), iter("12345")
+    return prefix + "".join(next(digits) if c == "D" else next(letters) for c in pattern)
+
+
+@pytest.mark.parametrize("plate", [_layout("KR", p) for p in PATTERNS_2] + [_layout("KRA", p) for p in PATTERNS_3])
+def test_every_layout_scores_as_is(plate):
+    assert score_candidates([plate]) == [(plate, 1.0)]
+
+
+def test_layout_counts():
+    # 2-literowy wyróżnik + 5 znaków, 3-literowy + 4 – obie rodziny dają tablice 7-znakowe
+    assert {len(p) for p in PATTERNS_2} == {5} and {len(p) for p in PATTERNS_3} == {4}
+    assert len(set(PATTERNS_2)) == 5 and len(set(PATTERNS_3)) == 7
+
+
+@pytest.mark.parametrize("text, fixed", [
+    ("ERAZ5TM", "ERA25TM"),   # Z -> 2 w części cyfrowej
+    ("ERA75OM", "ERA750M"),   # O -> 0
+    ("8A12345", "BA12345"),   # 8 -> B w wyróżniku
+    ("KR12B45", "KR12845"),   # B -> 8
+])
+def test_confusions_are_repaired_at_lower_likelihood(text, fixed):
+    [(plate, like)] = score_candidates([text])
+    assert plate == fixed
+    assert 0.0 < like < 1.0
+
+
+def test_out_of_grammar_texts_score_zero():
+    assert score_candidates(["KWA2137A", "ABC", "", "WA 12345", "ŁÓ12345"]) == [(None, 0.0)] * 5
+
+
+def test_eight_char_plate_falls_back_to_regex_only():
+    # KWA2137A: 8 znaków, poza układami gramatyki, ale pasuje do PL_PLATE_RX
+    assert score_candidates(["KWA2137A"]) == [(None, 0.0)]
+    assert rank_plates([("KWA2137A", 0.9)]) == []
+    [(plate, score, idx)] = rank_plates([("KWA2137A", 0.9)], fallback_rx=PL_PLATE_RX)
+    assert (plate, idx) == ("KWA2137A", 0)
+    assert score == pytest.approx(0.9 * REGEX_ONLY)
+
+
+def test_rank_keeps_best_candidate_per_plate():
+    ranked = rank_plates([("ERAZ5TM", 0.95), ("ERA25TM", 0.8), ("KR12345", 0.5)])
+    assert [(p, i) for p, _, i in ranked] == [("ERA25TM", 1), ("KR12345", 2)]
+    assert ranked[0][1] == pytest.approx(0.8)  # 0.8 x 1.0 > 0.95 x wiarygodność naprawy
+
+
+def _read(*texts):
+    return PlateOcr.result_from_raw([(None, t, 0.9) for t in texts])
+
+
+@pytest.mark.parametrize("text", ["12:34:56 78", "2024-10-16", "20241016", "0800 123 456"])
+def test_result_from_raw_drops_digit_first_texts(text):
+    res = _read(text)
+    assert res.plate is None and res.raw_candidates == []
+
+
+def test_result_from_raw_keeps_repaired_and_regex_only_plates():
+    assert _read("8A12345").plate == "BA12345"  # pierwsza cyfra naprawiona gramatyką – zostaje
+    res = _read("12:34:56", "KWA2137A")
+    assert res.plate == "KWA2137A"
+    assert res.confidence == pytest.approx(0.9 * REGEX_ONLY)
@@ -0,0 +1,198 @@
+"""
+app/service.py lokalnie: serwer HTTP na wolnym porcie, zamiast EasyOCR – atrapa readera w puli get_reader.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import cv2
+import numpy as np
+import pytest
+
+from app import ocr as ocr_mod
+from app.service import RecognitionService, make_server
+
+READER_KEY = (("en",), False)
+
+
+class StubReader:
+    """Każdy obraz -> "WA 12345"; gate pozwala przytrzymać wątek OCR, fail – zasymulować brak wag."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.gate = threading.Event()
+        self.gate.set()
+        self.busy = threading.Event()
+        self.batches = []
+
+    def _read(self, img):
+        h, w = img.shape[:2]
+        return [([[0, 0], [w, 0], [w, h], [0, h]], "WA 12345", 0.9)]
+
+    def readtext_batched(self, imgs, **kw):
+        if self.fail:
+            raise RuntimeError("brak wag modelu")
+        self.busy.set()
+        self.gate.wait(5.0)
+        self.batches.append(len(imgs))
+        return [self._read(img) for img in imgs]
+
+    def readtext(self, img, **kw):
+        return self._read(img)
+
+    def recognize(self, img, **kw):
+        return self._read(img)
+
+
+@pytest.fixture
+def stub_reader(monkeypatch):
+    reader = StubReader()
+    monkeypatch.setitem(ocr_mod._readers, READER_KEY, reader)
+    return reader
+
+
+def _serve(service):
+    server = make_server(service, port=0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as r:
+            return r.status, dict(r.headers), json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read())
+
+
+def _post_png(url, img):
+    _, png = cv2.imencode(".png", img)
+    req = urllib.request.Request(url, data=png.tobytes(), headers={"Content-Type": "image/png"})
+    return _get(req)
+
+
+def _plate_img():
+    return np.full((40, 160, 3), 255, dtype=np.uint8)
+
+
+def _wait(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "timeout"
+        time.sleep(0.01)
+
+
+def test_health_metrics_and_recognize(stub_reader):
+    service = RecognitionService(workers=1, batch_size=4, queue_size=8)
+    service.start(warmup=True)
+    server, base = _serve(service)
+    try:
+        _wait(service.ready.is_set)
+        code, _, body = _get(base + "/health")
+        assert (code, body) == (200, {"status": "ok"})
+
+        code, _, body = _post_png(base + "/recognize?raw=1", _plate_img())
+        assert code == 200
+        assert body["plate"] == "WA12345"
+        assert body["candidates"]
+
+        # opóźnienie całkowite dopisywane tuż po oddaniu wyniku
+        _wait(lambda: service.lat_total.count == 1)
+        code, _, metrics = _get(base + "/metrics")
+        assert code == 200
+        assert metrics["ready"] and metrics["warmup_error"] is None
+        assert metrics["batches"] == 1 and metrics["rejected"] == 0
+        assert metrics["latency"]["total"]["count"] == 1
+    finally:
+        server.shutdown()
+        service.shutdown()
+
+
+def test_full_queue_returns_503_with_retry_after(stub_reader):
+    service = RecognitionService(workers=1, batch_size=1, queue_size=1)
+    service.start(warmup=False)
+    server, base = _serve(service)
+    try:
+        stub_reader.gate.clear()
+        busy = service.submit(_plate_img())   # wątek OCR zajęty tym zadaniem
+        stub_reader.busy.wait(5.0)
+        queued = service.submit(_plate_img())  # jedyne miejsce w kolejce
+
+        code, headers, body = _post_png(base + "/recognize", _plate_img())
+        assert code == 503
+        assert headers.get("Retry-After") == "1"
+        assert service.metrics()["rejected"] == 1
+
+        stub_reader.gate.set()
+        assert busy.result(timeout=5)["plate"] == "WA12345"
+        assert queued.result(timeout=5)["plate"] == "WA12345"
+    finally:
+        stub_reader.gate.set()
+        server.shutdown()
+        service.shutdown()
+
+
+def test_queued_jobs_are_coalesced_into_one_batch(stub_reader):
+    service = RecognitionService(workers=1, batch_size=4, batch_wait_ms=50, queue_size=8)
+    # zadania czekają w kolejce, zanim wystartuje wątek OCR -> jedna paczka
+    futures = [service.submit(_plate_img()) for _ in range(4)]
+    service.start(warmup=False)
+    try:
+        results = [f.result(timeout=5) for f in futures]
+        assert [r["batch_size"] for r in results] == [4] * 4
+        assert stub_reader.batches == [4]
+        m = service.metrics()
+        assert m["batches"] == 1 and m["avg_batch"] == 4.0
+    finally:
+        service.shutdown()
+
+
+def test_raw_buffer_headers_are_case_insensitive(stub_reader):
+    service = RecognitionService(workers=1, batch_size=1)
+    service.start(warmup=False)
+    server, base = _serve(service)
+    try:
+        img = _plate_img()
+        h, w = img.shape[:2]
+        req = urllib.request.Request(base + "/recognize", data=img.tobytes(), headers={
+            "content-type": "application/x-raw-bgr", "x-width": str(w), "X-HEIGHT": str(h)})
+        code, _, body = _get(req)
+        assert code == 200 and body["plate"] == "WA12345"
+    finally:
+        server.shutdown()
+        service.shutdown()
+
+
+def test_failed_warmup_keeps_health_503(monkeypatch):
+    monkeypatch.setitem(ocr_mod._readers, READER_KEY, StubReader(fail=True))
+    service = RecognitionService(workers=2)
+    # przyjęte, zanim rozgrzewanie się wyłożyło
+    queued = [service.submit(_plate_img()) for _ in range(3)]
+    service.start(warmup=True)
+    server, base = _serve(service)
+    try:
+        _wait(lambda: service.warmup_error is not None)
+        code, _, body = _get(base + "/health")
+        assert code == 503
+        assert body["status"] == "error" and "brak wag modelu" in body["error"]
+        assert not service.ready.is_set()
+
+        # błąd od razu, nie timeout; wątki OCR wychodzą
+        for fut in queued:
+            with pytest.raises(RuntimeError, match="brak wag modelu"):
+                fut.result(timeout=5)
+        _wait(lambda: not any(t.is_alive() for t in service._threads))
+        assert service.metrics()["errors"] == 3
+
+        code, _, body = _post_png(base + "/recognize", _plate_img())
+        assert code == 503 and "brak wag modelu" in body["error"]
+    finally:
+        server.shutdown()
+        t0 = time.monotonic()
+        service.shutdown()
+        assert time.monotonic() - t0 < 1.0
@@ -0,0 +1,42 @@
+"""
+app/sightings.py: zwijanie odczytów w widzenia i zapytania po czasie przy kilku pisarzach na jednym pliku.
+"""
+from __future__ import annotations
+
+from app.sightings import SightingLog, parse_time
+
+
+def test_repeated_reads_fold_into_one_sighting(tmp_path):
+    log = SightingLog(tmp_path / "s.sqlite", gap_ms=1000.0, flush_interval_s=0.01)
+    try:
+        for t in (0.0, 400.0, 800.0):
+            log.observe("WA12345", 0.5 + t / 10000.0, t, region="R", tag="x", source="cam")
+        log.observe("WA12345", 0.9, 5000.0, source="cam")  # po przerwie > gap_ms – nowe widzenie
+        assert log.flush()
+        rows = log.query(plate="WA12345")
+        assert [(s.first_ms, s.last_ms, s.hits) for s in rows] == [(5000.0, 5000.0, 1), (0.0, 800.0, 3)]
+        assert rows[1].best_conf == 0.58 and rows[1].tag == "x"
+    finally:
+        log.close()
+
+
+def test_time_query_sees_long_sightings_of_other_writers(tmp_path):
+    path = tmp_path / "s.sqlite"
+    reader = SightingLog(path, flush_interval_s=0.01)
+    writer = SightingLog(path, gap_ms=10_000.0, flush_interval_s=0.01)
+    try:
+        # widzenie 0..60 s dopisane przez inny proces po otwarciu reader
+        for t in range(0, 60_001, 5000):
+            writer.observe("KR12345", 0.9, float(t), source="plik")
+        assert writer.flush()
+        rows = reader.query(since_ms=50_000.0, until_ms=55_000.0)
+        assert [(s.plate, s.first_ms, s.last_ms) for s in rows] == [("KR12345", 0.0, 60_000.0)]
+        assert reader.query(since_ms=61_000.0) == []
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_parse_time_accepts_ms_and_iso():
+    assert parse_time("1500") == 1500.0
+    assert parse_time("2026-10-16T08:00") > 1.7e12
@@ -0,0 +1,157 @@
+"""
+app/sources.py i scripts/recognize_source.py na plikach generowanych lokalnie: krótki film MJPG
+(benchmarks/synth.write_video) i katalog obrazów z plikami nie do odczytania.
+"""
+from __future__ import annotations
+
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from app.sources import ImageDirSource, VideoFileSource, open_source
+from benchmarks.synth import make_dataset, write_video
+
+FPS = 10.0
+N_FRAMES = 12
+
+
+@pytest.fixture(scope="module")
+def video(tmp_path_factory):
+    # jedna tablica = jedna klatka, więc każda klatka jest inna
+    path = tmp_path_factory.mktemp("video") / "synth.avi"
+    write_video(make_dataset(N_FRAMES, seed=7, scene_ratio=0.0), path, fps=FPS, hold_s=1.0 / FPS,
+                size=(320, 160), fourcc="MJPG")
+    cap = cv2.VideoCapture(str(path))
+    frames = []
+    while True:
+        ok, img = cap.read()
+        if not ok:
+            break
+        frames.append(img)
+    cap.release()
+    assert len(frames) == N_FRAMES
+    return path, frames
+
+
+def _read_all(source):
+    with source:
+        out = []
+        while True:
+            f = source.read()
+            if f is None:
+                return out
+            out.append(f)
+
+
+def _same(a: np.ndarray, b: np.ndarray) -> bool:
+    return a.shape == b.shape and float(np.abs(a.astype(np.int16) - b).mean()) < 1.0
+
+
+def test_video_reads_every_frame_with_timestamps(video):
+    path, frames = video
+    src = VideoFileSource(str(path))
+    got = _read_all(src)
+    assert src.fps == pytest.approx(FPS)
+    assert src.frame_count == N_FRAMES
+    assert [f.index for f in got] == list(range(N_FRAMES))
+    assert [f.t_ms for f in got] == pytest.approx([i * 1000.0 / FPS for i in range(N_FRAMES)])
+    assert all(_same(f.img, frames[f.index]) for f in got)
+
+
+@pytest.mark.parametrize("stride", [2, 5])
+def test_video_stride_keeps_original_indices(video, stride):
+    path, frames = video
+    got = _read_all(VideoFileSource(str(path), stride=stride))
+    assert [f.index for f in got] == list(range(0, N_FRAMES, stride))
+    assert [f.t_ms for f in got] == pytest.approx([f.index * 100.0 for f in got])
+    assert all(_same(f.img, frames[f.index]) for f in got)
+
+
+def test_video_start_ms_and_seek_ms(video):
+    path, frames = video
+    got = _read_all(VideoFileSource(str(path), stride=3, start_ms=500.0))
+    assert [f.index for f in got] == [5, 8, 11]
+    assert got[0].t_ms == pytest.approx(500.0)
+    assert _same(got[0].img, frames[5])
+
+    with VideoFileSource(str(path)) as src:
+        src.read()
+        src.seek_ms(300.0)
+        f = src.read()
+        assert (f.index, f.t_ms) == (3, pytest.approx(300.0))
+        assert _same(f.img, frames[3])
+
+
+def test_video_missing_file_raises(tmp_path):
+    with pytest.raises(OSError):
+        VideoFileSource(str(tmp_path / "brak.avi")).open()
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    imgs = [np.full((20, 40, 3), 30 * i, dtype=np.uint8) for i in range(6)]
+    for i, img in enumerate(imgs):
+        cv2.imwrite(str(tmp_path / f"f{i:02d}.png"), img)
+    # uszkodzony obraz w środku i plik spoza IMAGE_EXTS
+    (tmp_path / "f02.png").write_bytes(b"to nie jest png")
+    (tmp_path / "labels.csv").write_text("f00.png,WA12345\n", encoding="utf-8")
+    return tmp_path, imgs
+
+
+def test_image_dir_skips_unreadable_files(image_dir):
+    path, imgs = image_dir
+    src = ImageDirSource(str(path), fps=2.0)
+    got = _read_all(src)
+    assert src.frame_count == 6  # labels.csv nie liczy się jako klatka
+    assert [f.name for f in got] == ["f00.png", "f01.png", "f03.png", "f04.png", "f05.png"]
+    assert [f.index for f in got] == [0, 1, 3, 4, 5]
+    assert [f.t_ms for f in got] == [0.0, 500.0, 1500.0, 2000.0, 2500.0]
+    assert all(np.array_equal(f.img, imgs[f.index]) for f in got)
+
+
+def test_image_dir_stride_and_start_ms(image_dir):
+    path, _ = image_dir
+    # stride 2 trafia w uszkodzony f02 -> pominięty, bez przesunięcia kolejnych indeksów
+    assert [f.index for f in _read_all(ImageDirSource(str(path), stride=2))] == [0, 4]
+    got = _read_all(ImageDirSource(str(path), fps=2.0, start_ms=1500.0))
+    assert [f.index for f in got] == [3, 4, 5]
+
+
+def test_open_source_dispatch(video, image_dir, tmp_path):
+    assert isinstance(open_source(str(video[0]), stride=2), VideoFileSource)
+    assert isinstance(open_source(str(image_dir[0])), ImageDirSource)
+    with pytest.raises(FileNotFoundError):
+        open_source(str(tmp_path / "brak.mp4"))
+
+
+class _StubReader:
+    # zamiast EasyOCR: każdy obraz to "WA 12345"
+    def _read(self, img):
+        h, w = img.shape[:2]
+        return [([[0, 0], [w, 0], [w, h], [0, h]], "WA 12345", 0.9)]
+
+    def readtext(self, img, **kw):
+        return self._read(img)
+
+    def recognize(self, img, **kw):
+        return self._read(img)
+
+
+def test_recognize_source_writes_rows_with_video_time(video, tmp_path, monkeypatch):
+    pytest.importorskip("PyQt6")
+    from app import ocr as ocr_mod
+    from scripts import recognize_source
+
+    monkeypatch.setitem(ocr_mod._readers, (("en",), False), _StubReader())
+    out = tmp_path / "rows.jsonl"
+    monkeypatch.setattr("sys.argv", ["recognize_source", str(video[0]), "--stride", "3",
+                                     "--start-ms", "300", "--out", str(out)])
+    with pytest.raises(SystemExit) as exit_info:
+        recognize_source.main()
+    assert exit_info.value.code == 0
+
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [(r["index"], r["t_ms"]) for r in rows] == [(3, 300.0), (6, 600.0), (9, 900.0)]
+    assert all(r["plate"] == "WA12345" for r in rows)